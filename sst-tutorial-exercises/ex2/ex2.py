@@ -7,9 +7,14 @@ from utils import *
 # Parse commandline arguments
 parser = argparse.ArgumentParser()
 parser.add_argument("-c", "--config", help="specify configuration file", required=True)
-parser.add_argument("-v", "--verbose", help="increase verbosity of output", action="store_true")
+parser.add_argument("-v", "--verbose", help="increase verbosity of output (-vv for every component)", action="count", default=0)
 parser.add_argument("-s", "--statfile", help="statistics file", default="./stats.csv")
 parser.add_argument("-l", "--statlevel", help="statistics level", type=int, default=16)
+parser.add_argument("-p", "--statprofile", help="statistics to enable", choices=STAT_PROFILE_NAMES, default="all")
+parser.add_argument("--profile", help="write a profile of building the model to this file (folded stacks)")
+parser.add_argument("--manifest", help="write a JSON record of the build to this file")
+parser.add_argument("--sample", help="write and reset the statistics every INTERVAL (e.g. 10us), one sample each")
+parser.add_argument("--warmup", help="simulated time before statistics are collected (e.g. 50us)")
 
 args = parser.parse_args()
 
@@ -17,24 +22,38 @@ verbose = args.verbose
 cfgFile = args.config
 statFile = args.statfile
 statLevel = args.statlevel
+statProfile = args.statprofile
+profileFile = args.profile
+manifestFile = args.manifest
+sampleInterval = args.sample
+warmup = args.warmup
+
+if profileFile:
+    buildProfile = BuildProfile(profileFile)
+    buildProfile.start()
+
+log = BuildLog(verbose, manifestFile)
 
 # Build Configuration Information
 config = Config(cfgFile, verbose=verbose)
 
+# Components and links are recorded in the graph and handed to sst in one pass
+model = ModelGraph()
+
 # Connect Cores & caches
-print "Configuring CPU..."
+log.info("Configuring CPU...")
 
-cpu = sst.Component("cpu", "miranda.BaseCPU")
+cpu = model.Component("cpu", config.workload.cpuType)
 cpu.addParams(config.getCoreConfig(0))
 
-l1 = sst.Component("l1cache", "memHierarchy.Cache")
+l1 = model.Component("l1cache", "memHierarchy.Cache")
 l1.addParams(config.getL1Params())
 
-l2 = sst.Component("l2cache", "memHierarchy.Cache")
+l2 = model.Component("l2cache", "memHierarchy.Cache")
 l2.addParams(config.getL2Params())
 
 connect("cpu_cache_link",
-        cpu, "cache_link",
+        cpu, config.workload.cpuPort(0),
         l1, "high_network_0",
         config.cache_link_latency).setNoCut()
 
@@ -45,8 +64,8 @@ connect("l2cache_link",
 
 
 # Connect Memory and Memory Controller to the ring
-print "Configuring Memory"
-mem = sst.Component("memory", "memHierarchy.MemController")
+log.info("Configuring Memory")
+mem = model.Component("memory", "memHierarchy.MemController")
 mem.addParams(config.getMemParams())
 
 connect("l2cache_mem_link",
@@ -55,11 +74,13 @@ connect("l2cache_mem_link",
         config.cache_link_latency)
 
 
+model.validate()
+model.emit()
+
 # ===============================================================================
 
 # Enable SST Statistics Outputs for this simulation
-sst.setStatisticLoadLevel(statLevel)
-sst.enableAllStatisticsForAllComponents({"type":"sst.AccumulatorStatistic"})
+enableStatistics(statProfile, statLevel, statisticParams(sampleInterval, warmup))
 
 sst.setStatisticOutput("sst.statOutputCSV")
 sst.setStatisticOutputOptions( {
@@ -67,4 +88,7 @@ sst.setStatisticOutputOptions( {
     "separator" : ", "
     } )
 
-print "Completed configuring the EX2 model"
+if profileFile:
+    buildProfile.stop()
+
+log.finish("Completed configuring the EX2 model", model)
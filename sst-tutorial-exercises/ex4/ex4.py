@@ -7,9 +7,14 @@ from utils import *
 # Parse commandline arguments
 parser = argparse.ArgumentParser()
 parser.add_argument("-c", "--config", help="specify configuration file", required=True)
-parser.add_argument("-v", "--verbose", help="increase verbosity of output", action="store_true")
+parser.add_argument("-v", "--verbose", help="increase verbosity of output (-vv for every component)", action="count", default=0)
 parser.add_argument("-s", "--statfile", help="statistics file", default="./stats.csv")
 parser.add_argument("-l", "--statlevel", help="statistics level", type=int, default=16)
+parser.add_argument("-p", "--statprofile", help="statistics to enable", choices=STAT_PROFILE_NAMES, default="all")
+parser.add_argument("--profile", help="write a profile of building the model to this file (folded stacks)")
+parser.add_argument("--manifest", help="write a JSON record of the build to this file")
+parser.add_argument("--sample", help="write and reset the statistics every INTERVAL (e.g. 10us), one sample each")
+parser.add_argument("--warmup", help="simulated time before statistics are collected (e.g. 50us)")
 
 args = parser.parse_args()
 
@@ -17,36 +22,49 @@ verbose = args.verbose
 cfgFile = args.config
 statFile = args.statfile
 statLevel = args.statlevel
+statProfile = args.statprofile
+profileFile = args.profile
+manifestFile = args.manifest
+sampleInterval = args.sample
+warmup = args.warmup
+
+if profileFile:
+    buildProfile = BuildProfile(profileFile)
+    buildProfile.start()
+
+log = BuildLog(verbose, manifestFile)
 
 # Build Configuration Information
 config = Config(cfgFile, verbose=verbose)
 
-if 'ariel' in config.app:
-    arielCPU = sst.Component("A0", "ariel.ariel")
+# Components and links are recorded in the graph and handed to sst in one pass
+model = ModelGraph()
+
+if config.workload.sharedCPU:
+    arielCPU = model.Component("A0", config.workload.cpuType)
     arielCPU.addParams(config.getCoreConfig(0))
 
-print "Configuring Network-on-Chip..."
+log.info("Configuring Network-on-Chip...")
 
-router = sst.Component("router", "merlin.hr_router")
+router = model.Component("router", "merlin.hr_router")
 router.addParams(config.getRouterParams())
 router.addParam('id', 0)
 
 # Connect Cores & caches
 for next_core_id in range(config.total_cores):
-    print "Configuring core %d..."%next_core_id
+    log.debug("Configuring core %d...", next_core_id)
 
-    if 'miranda' in config.app:
-        cpu = sst.Component("cpu%d"%(next_core_id), "miranda.BaseCPU")
-        cpu.addParams(config.getCoreConfig(next_core_id))
-        cpuPort = "cache_link"
-    elif 'ariel' in config.app:
+    if config.workload.sharedCPU:
         cpu = arielCPU
-        cpuPort = "cache_link_%d"%next_core_id
+    else:
+        cpu = model.Component("cpu%d"%(next_core_id), config.workload.cpuType)
+        cpu.addParams(config.getCoreConfig(next_core_id))
+    cpuPort = config.workload.cpuPort(next_core_id)
 
-    l1 = sst.Component("l1cache_%d"%(next_core_id), "memHierarchy.Cache")
+    l1 = model.Component("l1cache_%d"%(next_core_id), "memHierarchy.Cache")
     l1.addParams(config.getL1Params())
 
-    l2 = sst.Component("l2cache_%d"%(next_core_id), "memHierarchy.Cache")
+    l2 = model.Component("l2cache_%d"%(next_core_id), "memHierarchy.Cache")
     l2.addParams(config.getL2Params())
     l2.addParam( "network_address", next_core_id )
 
@@ -66,10 +84,10 @@ for next_core_id in range(config.total_cores):
             config.ring_latency)
 
 # Connect Memory and Memory Controller to the ring
-mem = sst.Component("memory", "memHierarchy.MemController")
+mem = model.Component("memory", "memHierarchy.MemController")
 mem.addParams(config.getMemParams())
 
-dc = sst.Component("dc", "memHierarchy.DirectoryController")
+dc = model.Component("dc", "memHierarchy.DirectoryController")
 dc.addParams(config.getDCParams(0))
 dc.addParam("network_address", config.total_cores)
 
@@ -83,11 +101,13 @@ connect("dc_link_0",
         router, "port%d"%config.total_cores,
         config.ring_latency)
 
+model.validate()
+model.emit()
+
 # ===============================================================================
 
 # Enable SST Statistics Outputs for this simulation
-sst.setStatisticLoadLevel(statLevel)
-sst.enableAllStatisticsForAllComponents({"type":"sst.AccumulatorStatistic"})
+enableStatistics(statProfile, statLevel, statisticParams(sampleInterval, warmup))
 
 sst.setStatisticOutput("sst.statOutputCSV")
 sst.setStatisticOutputOptions( {
@@ -95,4 +115,7 @@ sst.setStatisticOutputOptions( {
     "separator" : ", "
     } )
 
-print "Completed configuring the EX4 model"
+if profileFile:
+    buildProfile.stop()
+
+log.finish("Completed configuring the EX4 model", model)
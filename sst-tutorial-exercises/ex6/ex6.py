@@ -7,9 +7,14 @@ from utils import *
 # Parse commandline arguments
 parser = argparse.ArgumentParser()
 parser.add_argument("-c", "--config", help="specify configuration file", required=True)
-parser.add_argument("-v", "--verbose", help="increase verbosity of output", action="store_true")
+parser.add_argument("-v", "--verbose", help="increase verbosity of output (-vv for every component)", action="count", default=0)
 parser.add_argument("-s", "--statfile", help="statistics file", default="./stats.csv")
 parser.add_argument("-l", "--statlevel", help="statistics level", type=int, default=16)
+parser.add_argument("-p", "--statprofile", help="statistics to enable", choices=STAT_PROFILE_NAMES, default="all")
+parser.add_argument("--profile", help="write a profile of building the model to this file (folded stacks)")
+parser.add_argument("--manifest", help="write a JSON record of the build to this file")
+parser.add_argument("--sample", help="write and reset the statistics every INTERVAL (e.g. 10us), one sample each")
+parser.add_argument("--warmup", help="simulated time before statistics are collected (e.g. 50us)")
 
 args = parser.parse_args()
 
@@ -17,71 +22,61 @@ verbose = args.verbose
 cfgFile = args.config
 statFile = args.statfile
 statLevel = args.statlevel
+statProfile = args.statprofile
+profileFile = args.profile
+manifestFile = args.manifest
+sampleInterval = args.sample
+warmup = args.warmup
+
+if profileFile:
+    buildProfile = BuildProfile(profileFile)
+    buildProfile.start()
+
+log = BuildLog(verbose, manifestFile)
 
 # Build Configuration Information
 config = Config(cfgFile, verbose=verbose)
 
-router_map = {}
+# Components and links are recorded in the graph and handed to sst in one pass
+model = ModelGraph()
+
+routers = []
 next_core_id = 0
 next_network_id = 0
 next_memory_ctrl_id = 0
 next_l3_cache_id = 0
 
 
-if 'ariel' in config.app:
-    arielCPU = sst.Component("A0", "ariel.ariel")
+if config.workload.sharedCPU:
+    arielCPU = model.Component("A0", config.workload.cpuType)
     arielCPU.addParams(config.getCoreConfig(0))
 
-print "Configuring Ring Network-on-Chip..."
+log.info("Configuring Ring Network-on-Chip...")
 
+ring = topology.ring(config.num_ring_stops)
 for next_ring_stop in range(config.num_ring_stops):
-    ring_rtr = sst.Component("rtr.%d"%next_ring_stop, "merlin.hr_router")
+    ring_rtr = model.Component("rtr.%d"%next_ring_stop, "merlin.hr_router")
     ring_rtr.addParams(config.getRingParams())
     ring_rtr.addParam( "id", next_ring_stop)
-    router_map["rtr.%d"%next_ring_stop] = ring_rtr
+    routers.append(ring_rtr)
 
-for next_ring_stop in range(config.num_ring_stops):
-    if next_ring_stop == 0:
-        # First stop
-        connect("rtr_pos_%d"%next_ring_stop,
-                router_map["rtr.0"], "port0",
-                router_map["rtr.1"], "port1", config.ring_latency)
-        connect("rtr_neg_%d"%next_ring_stop,
-                router_map["rtr.0"], "port1",
-                router_map["rtr.%d"%(config.num_ring_stops-1)], "port0", config.ring_latency)
-    elif next_ring_stop == (config.num_ring_stops) - 1:
-        # Last Stop
-        connect("rtr_pos_%d"%next_ring_stop,
-                router_map["rtr.%d"%next_ring_stop], "port0",
-                router_map["rtr.0"], "port1", config.ring_latency)
-        connect("rtr_neg_%d"%next_ring_stop,
-                router_map["rtr.%d"%next_ring_stop], "port1",
-                router_map["rtr.%d"%(next_ring_stop-1)], "port0", config.ring_latency)
-    else:
-        # Middle stops
-        connect("rtr_pos_%d"%next_ring_stop,
-                router_map["rtr.%d"%next_ring_stop], "port0",
-                router_map["rtr.%d"%(next_ring_stop+1)], "port1", config.ring_latency)
-        connect("rtr_neg_%d"%next_ring_stop,
-                router_map["rtr.%d"%next_ring_stop], "port1",
-                router_map["rtr.%d"%(next_ring_stop-1)], "port0", config.ring_latency)
+connectBatch(routers, ring.linkTuples(config.ring_latency), "rtr_link_%d")
 
 # Connect Cores & caches
 for next_active_core in range(config.total_cores):
-    print "Configuring core %d..."%next_active_core
+    log.debug("Configuring core %d...", next_active_core)
 
-    if 'miranda' in config.app:
-        cpu = sst.Component("cpu%d"%(next_core_id), "miranda.BaseCPU")
-        cpu.addParams(config.getCoreConfig(next_core_id))
-        cpuPort = "cache_link"
-    elif 'ariel' in config.app:
+    if config.workload.sharedCPU:
         cpu = arielCPU
-        cpuPort = "cache_link_%d"%next_core_id
+    else:
+        cpu = model.Component("cpu%d"%(next_core_id), config.workload.cpuType)
+        cpu.addParams(config.getCoreConfig(next_core_id))
+    cpuPort = config.workload.cpuPort(next_core_id)
 
-    l1 = sst.Component("l1cache_%d"%(next_core_id), "memHierarchy.Cache")
+    l1 = model.Component("l1cache_%d"%(next_core_id), "memHierarchy.Cache")
     l1.addParams(config.getL1Params())
 
-    l2 = sst.Component("l2cache_%d"%(next_core_id), "memHierarchy.Cache")
+    l2 = model.Component("l2cache_%d"%(next_core_id), "memHierarchy.Cache")
     l2.addParams(config.getL2Params())
     l2.addParam( "network_address", next_network_id )
 
@@ -97,7 +92,7 @@ for next_active_core in range(config.total_cores):
 
     connect("l2_ring_link_%d"%next_core_id,
             l2, "directory",
-            router_map["rtr.%d"%next_network_id], "port2",
+            routers[next_network_id], "port2",
             config.ring_latency)
 
     next_network_id = next_network_id + 1
@@ -105,10 +100,10 @@ for next_active_core in range(config.total_cores):
 
 # Connect Memory and Memory Controllers to the ring
 for next_mem_ctrl in range(config.num_memory_controllers):	
-    mem = sst.Component("memory_%d"%(next_memory_ctrl_id), "memHierarchy.MemController")
+    mem = model.Component("memory_%d"%(next_memory_ctrl_id), "memHierarchy.MemController")
     mem.addParams(config.getMemParams())
 
-    dc = sst.Component("dc_%d"%(next_memory_ctrl_id), "memHierarchy.DirectoryController")
+    dc = model.Component("dc_%d"%(next_memory_ctrl_id), "memHierarchy.DirectoryController")
     dc.addParams(config.getDCParams(next_memory_ctrl_id))
     dc.addParam("network_address", next_network_id)
 
@@ -119,17 +114,19 @@ for next_mem_ctrl in range(config.num_memory_controllers):
 
     connect("dc_link_%d"%next_memory_ctrl_id,
             dc, "network",
-            router_map["rtr.%d"%next_network_id], "port2",
+            routers[next_network_id], "port2",
             config.ring_latency)
 
     next_network_id = next_network_id + 1
     next_memory_ctrl_id = next_memory_ctrl_id + 1
 
+model.validate()
+model.emit()
+
 # ===============================================================================
 
 # Enable SST Statistics Outputs for this simulation
-sst.setStatisticLoadLevel(statLevel)
-sst.enableAllStatisticsForAllComponents({"type":"sst.AccumulatorStatistic"})
+enableStatistics(statProfile, statLevel, statisticParams(sampleInterval, warmup))
 
 sst.setStatisticOutput("sst.statOutputCSV")
 sst.setStatisticOutputOptions( {
@@ -137,4 +134,7 @@ sst.setStatisticOutputOptions( {
     "separator" : ", "
     } )
 
-print "Completed configuring the EX6 model"
+if profileFile:
+    buildProfile.stop()
+
+log.finish("Completed configuring the EX6 model", model)
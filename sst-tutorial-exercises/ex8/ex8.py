@@ -8,9 +8,15 @@ from sst import merlin
 # Parse commandline arguments
 parser = argparse.ArgumentParser()
 parser.add_argument("-c", "--config", help="specify configuration file", required=True)
-parser.add_argument("-v", "--verbose", help="increase verbosity of output", action="store_true")
+parser.add_argument("-v", "--verbose", help="increase verbosity of output (-vv for every component)", action="count", default=0)
 parser.add_argument("-s", "--statfile", help="statistics file", default="./stats.csv")
 parser.add_argument("-l", "--statlevel", help="statistics level", type=int, default=16)
+parser.add_argument("-p", "--statprofile", help="statistics to enable", choices=STAT_PROFILE_NAMES, default="all")
+parser.add_argument("-P", "--partition", help="rank partition file (run sst with --partitioner=sst.self)")
+parser.add_argument("--profile", help="write a profile of building the model to this file (folded stacks)")
+parser.add_argument("--manifest", help="write a JSON record of the build to this file")
+parser.add_argument("--sample", help="write and reset the statistics every INTERVAL (e.g. 10us), one sample each")
+parser.add_argument("--warmup", help="simulated time before statistics are collected (e.g. 50us)")
 
 args = parser.parse_args()
 
@@ -18,13 +24,28 @@ verbose = args.verbose
 cfgFile = args.config
 statFile = args.statfile
 statLevel = args.statlevel
+statProfile = args.statprofile
+partitionFile = args.partition
+profileFile = args.profile
+manifestFile = args.manifest
+sampleInterval = args.sample
+warmup = args.warmup
+
+if profileFile:
+    buildProfile = BuildProfile(profileFile)
+    buildProfile.start()
+
+log = BuildLog(verbose, manifestFile)
 
 # Build Configuration Information
-config = SNBConfig(cfgFile, verbose=verbose)
+config = Config(cfgFile, verbose=verbose)
 
+# Components and links are recorded in the graph and handed to sst in one pass
+model = ModelGraph()
 
-if 'ariel' in config.app:
-    arielCPU = sst.Component("A0", "ariel.ariel")
+
+if config.workload.sharedCPU:
+    arielCPU = model.Component("A0", config.workload.cpuType)
     arielCPU.addParams(config.getCoreConfig(0))
 
 
@@ -39,6 +60,7 @@ class EndpointCreator(merlin.EndPoint):
             self.coreCount = 0
             self.L3Count = 0
             self.MemCCount = 0
+            log.count("groups")
 
         def isDone(self, config):
             return ((self.coreCount == config.cores_per_group) and
@@ -78,7 +100,7 @@ class EndpointCreator(merlin.EndPoint):
             self.next_group_id += 1
             self.groupInfo = self.GroupInfo(self.next_group_id)
 
-        sst.pushNamePrefix("g%d"%self.groupInfo.groupNum)
+        model.pushNamePrefix("g%d"%self.groupInfo.groupNum)
 
         nodeType = self.groupInfo.nextItem(self.config)
         if nodeType == EndpointCreator._CORE:
@@ -88,29 +110,29 @@ class EndpointCreator(merlin.EndPoint):
         elif nodeType == EndpointCreator._MEMORY:
             ret = self.buildMemory(nID)
         else:
-            print "Unknonw Next item type:  ", nodeType
+            log.warning("Unknown next item type: %s", nodeType)
             sst.exit(1)
 
-        sst.popNamePrefix()
+        model.popNamePrefix()
         return ret
 
 
     def buildCore(self, nID):
         local_core_id = self.next_core_id % self.config.cores_per_group
-        print "Creating Core %d in Group %d"%(local_core_id, self.next_group_id)
+        log.debug("Creating Core %d in Group %d", local_core_id, self.next_group_id)
+        log.count("cores")
 
-        if 'miranda' in config.app:
-            cpu = sst.Component("cpu%d"%(self.next_core_id), "miranda.BaseCPU")
-            cpu.addParams(self.config.getCoreConfig(self.next_core_id))
-            cpuPort = "cache_link"
-        elif 'ariel' in config.app:
+        if config.workload.sharedCPU:
             cpu = arielCPU
-            cpuPort = "cache_link_%d"%self.next_core_id
+        else:
+            cpu = model.Component("cpu%d"%(self.next_core_id), config.workload.cpuType)
+            cpu.addParams(self.config.getCoreConfig(self.next_core_id))
+        cpuPort = config.workload.cpuPort(self.next_core_id)
 
-        l1 = sst.Component("l1cache_%d"%(self.next_core_id), "memHierarchy.Cache")
+        l1 = model.Component("l1cache_%d"%(self.next_core_id), "memHierarchy.Cache")
         l1.addParams(config.getL1Params())
 
-        l2 = sst.Component("l2cache_%d"%(self.next_core_id), "memHierarchy.Cache")
+        l2 = model.Component("l2cache_%d"%(self.next_core_id), "memHierarchy.Cache")
         l2.addParams(config.getL2Params())
         l2.addParam( "network_address", nID )
 
@@ -129,7 +151,8 @@ class EndpointCreator(merlin.EndPoint):
         return (l2, "cache", self.config.ring_latency)
 
     def buildL3(self, nID):
-        l3cache = sst.Component("l3cache_%d"%(self.next_l3_cache_id), "memHierarchy.Cache")
+        log.count("L3 blocks")
+        l3cache = model.Component("l3cache_%d"%(self.next_l3_cache_id), "memHierarchy.Cache")
         l3cache.addParams(config.getL3Params())
 
         l3cache.addParams({
@@ -141,10 +164,11 @@ class EndpointCreator(merlin.EndPoint):
         return (l3cache, "directory", self.config.ring_latency)
 
     def buildMemory(self, nID):
-        mem = sst.Component("memory_%d"%(self.next_memory_ctrl_id), "memHierarchy.MemController")
+        log.count("memory controllers")
+        mem = model.Component("memory_%d"%(self.next_memory_ctrl_id), "memHierarchy.MemController")
         mem.addParams(self.config.getMemParams())
 
-        dc = sst.Component("dc_%d"%(self.next_memory_ctrl_id), "memHierarchy.DirectoryController")
+        dc = model.Component("dc_%d"%(self.next_memory_ctrl_id), "memHierarchy.DirectoryController")
         dc.addParams(self.config.getDCParams(self.next_memory_ctrl_id))
         dc.addParam("network_address", nID)
 
@@ -159,7 +183,7 @@ class EndpointCreator(merlin.EndPoint):
 
 
 
-print "Configuring Ring Network-on-Chip..."
+log.info("Configuring Ring Network-on-Chip...")
 
 # Hacky way to pass parameters into the Topology Builder:
 sst.merlin._params["num_dims"] = 1
@@ -169,17 +193,21 @@ sst.merlin._params.update(config.getRingParams())
 
 
 
-topoGen = merlin.topoTorus()
+topoGen = topology.TopologyGenerator(topology.ring(config.num_ring_stops), model=model)
 topoGen.prepParams()
 topoGen.setEndPoint(EndpointCreator(config))
 topoGen.build()
 
+model.validate()
+if partitionFile:
+    applyPartition(partitionFile, model)
+model.emit()
+
 
 # ===============================================================================
 
 # Enable SST Statistics Outputs for this simulation
-sst.setStatisticLoadLevel(statLevel)
-sst.enableAllStatisticsForAllComponents({"type":"sst.AccumulatorStatistic"})
+enableStatistics(statProfile, statLevel, statisticParams(sampleInterval, warmup))
 
 sst.setStatisticOutput("sst.statOutputCSV")
 sst.setStatisticOutputOptions( {
@@ -187,4 +215,7 @@ sst.setStatisticOutputOptions( {
     "separator" : ", "
     } )
 
-print "Completed configuring the SST Sandy Bridge model"
+if profileFile:
+    buildProfile.stop()
+
+log.finish("Completed configuring the SST Sandy Bridge model", model)
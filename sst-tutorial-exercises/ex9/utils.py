@@ -1,89 +1,64 @@
 import sst
 import os
-import ConfigParser
+import sys
 from sst import merlin
 
-
-
-def connect(name, c0, port0, c1, port1, latency):
-    link = sst.Link(name)
-    link.connect( (c0, port0, latency), (c1, port1, latency) )
-    return link
-
+_parent = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+if _parent not in sys.path:
+    sys.path.insert(0, _parent)
+from sstcommon.config import loadConfigFile, FrozenParams, l1Params, l2Params, l3Params
+from sstcommon.links import connect, connectBatch
+from sstcommon.graph import ModelGraph
+from sstcommon.statistics import enableStatistics, statisticParams, STAT_PROFILE_NAMES
+from sstcommon.buildprofile import BuildProfile
+from sstcommon.buildlog import BuildLog
+from sstcommon.partition import applyPartition
+from sstcommon.addrmap import AddressMap
+from sstcommon.workloads import loadWorkload
+from sstcommon import topology
 
 
 
 class CPUConfig:
-    def __init__(self, cp):
-        self.cfg = dict(cp.items('CPU'))
+    def __init__(self, cp, model):
+        self.model = model
+        self.cfg = cp.section('CPU')
         self.app = self.cfg['application']
-        self.applicationParams = dict(cp.items(self.app))
+        self.applicationParams = cp.section(self.app)
         self.total_cores = 0
         self.next_id = 0
+        self.l1Params = FrozenParams(l1Params(self.cfg["clock"]))
+        self.l2Params = None
 
-        if self.app == 'miranda.STREAMBenchGenerator':
-            self.coreConfig = self._streamCoreConfig
-        else:
-            raise Exception("Unknown application '%s'"%app)
+        self.max_reqs_cycle = self.cfg['max_reqs_cycle']
+        self.workload = loadWorkload(self.app, self.applicationParams)
+        if self.workload.sharedCPU:
+            raise Exception("Application '%s' is not supported; each core needs its own CPU component"%self.app)
 
     def updateTotalCores(self, nCores):
         self.total_cores = nCores
 
+    def coreCommonParams(self):
+        # clock is set on each cpu in build()
+        return FrozenParams()
 
-    def _streamCoreConfig(self, core_id):
-        streamN = int(self.applicationParams['total_streamn'])
-        params = dict()
-        params['max_reqs_cycle'] =  self.cfg['max_reqs_cycle']
-        params['generator'] = 'miranda.STREAMBenchGenerator'
-        params['generatorParams.n'] = streamN / self.total_cores
-        params['generatorParams.start_a'] = ( (streamN * 32) / self.total_cores ) * core_id
-        params['generatorParams.start_b'] = ( (streamN * 32) / self.total_cores ) * core_id + (streamN * 32)
-        params['generatorParams.start_c'] = ( (streamN * 32) / self.total_cores ) * core_id + (2 * streamN * 32)
-        params['generatorParams.operandwidth'] = 32
-        #params['generatorParams.verbose'] = int(self.verbose)
-        return params
+    def coreConfig(self, core_id):
+        return self.workload.coreConfig(self, core_id)
 
     def build(self, nID, netCfg):
-        cpu = sst.Component("cpu%d"%(self.next_id), "miranda.BaseCPU")
+        cpu = self.model.Component("cpu%d"%(self.next_id), self.workload.cpuType)
         cpu.addParams(self.coreConfig(self.next_id))
         cpu.addParam("clock", self.cfg["clock"])
-        cpuPort = "cache_link"
-
-        l1 = sst.Component("l1cache_%d"%(self.next_id), "memHierarchy.Cache")
-        l1.addParams(dict({
-            "prefetcher": "cassini.StridePrefetcher",
-            "prefetcher.reach": 4,
-            "prefetcher.detect_range" : 1,
-            "cache_frequency": self.cfg["clock"],
-            "cache_size": "32KB",
-            "associativity": 8,
-            "access_latency_cycles": 4,
-            "L1": 1,
-            # Default params
-            # "cache_line_size": 64,
-            # "coherence_protocol": self.coherence_protocol,
-            # "replacement_policy": "lru",
-            # Not neccessary for simple cases:
-            #"maxRequestDelay" : "1000000",
-            }))
+        cpuPort = self.workload.cpuPort(self.next_id)
 
-        l2 = sst.Component("l2cache_%d"%(self.next_id), "memHierarchy.Cache")
-        l2.addParams(dict({
-            "prefetcher": "cassini.StridePrefetcher",
-            "prefetcher.reach": 16,
-            "prefetcher.detect_range" : 1,
-            "cache_frequency": self.cfg["clock"],
-            "cache_size": "256KB",
-            "associativity": 8,
-            "access_latency_cycles": 6,
-            "mshr_num_entries" : 16,
-            "network_bw": netCfg.cfg["bandwidth"],
-            # Default params
-            #"cache_line_size": 64,
-            #"coherence_protocol": self.coherence_protocol,
-            #"replacement_policy": "lru",
-            "network_address": nID 
-            }))
+        l1 = self.model.Component("l1cache_%d"%(self.next_id), "memHierarchy.Cache")
+        l1.addParams(self.l1Params)
+
+        if self.l2Params is None:
+            self.l2Params = FrozenParams(l2Params(self.cfg["clock"], netCfg.cfg["bandwidth"]))
+        l2 = self.model.Component("l2cache_%d"%(self.next_id), "memHierarchy.Cache")
+        l2.addParams(self.l2Params)
+        l2.addParam("network_address", nID)
 
         connect("cpu_cache_link_%d"%self.next_id,
                 cpu, cpuPort,
@@ -101,34 +76,39 @@ class CPUConfig:
 
 
 class MemConfig:
-    def __init__(self, cp):
-        self.cfg = dict(cp.items('Memory'))
+    def __init__(self, cp, model):
+        self.model = model
+        self.cfg = cp.section('Memory')
         self.next_id = 0
     def updateTotalMems(self, nMC):
         self.num_MC = nMC
-
-    def build(self, nID, netCfg):
-        mem = sst.Component("memory_%d"%(self.next_id), "memHierarchy.MemController")
-        mem.addParams(dict({
+        # Plans every controller's address range up front and checks that
+        # together they cover the whole capacity exactly once.
+        self.addressMap = AddressMap(self.cfg["capacity"], self.num_MC,
+                                     int(self.cfg["interleave_size"]))
+        self.dcRanges = self.addressMap.table(prefix="memNIC.")
+        self.memParams = FrozenParams({
             "backend" : "memHierarchy.simpleMem",
             "backend.access_time" : "30ns",
-            "backend.mem_size" : "%d%s"%(int(filter(str.isdigit, self.cfg["capacity"])) / (self.num_MC), filter(str.isalpha, self.cfg["capacity"])),
+            "backend.mem_size" : self.addressMap.mem_size,
             "clock" : self.cfg["clock"],
             "network_bw": self.cfg["network_bw"],
             "do_not_back" : 1,
-            }))
-
-        dc = sst.Component("dc_%d"%(self.next_id), "memHierarchy.DirectoryController")
-        dc.addParams(dict({
-            "memNIC.interleave_size": "%dB"%int(self.cfg["interleave_size"]),
-            "memNIC.interleave_step": "%dB"%(self.num_MC * int(self.cfg["interleave_size"])),
+            })
+        self.dcParams = FrozenParams({
             "entry_cache_size": 256*1024*1024, #Entry cache size of mem/blocksize
             "clock": self.cfg["clock"],
             "memNIC.network_bw": self.cfg["network_bw"],
-            "memNIC.addr_range_start" : self.next_id * int(self.cfg["interleave_size"]),
-            "memNIC.addr_range_end" : (int(filter(str.isdigit, self.cfg["capacity"])) * 1024 * 1024) - (self.num_MC * int(self.cfg["interleave_size"])) + (self.next_id * int(self.cfg["interleave_size"])),
-            "network_address": nID
-            }))
+            })
+
+    def build(self, nID, netCfg):
+        mem = self.model.Component("memory_%d"%(self.next_id), "memHierarchy.MemController")
+        mem.addParams(self.memParams)
+
+        dc = self.model.Component("dc_%d"%(self.next_id), "memHierarchy.DirectoryController")
+        dc.addParams(self.dcParams)
+        dc.addParams(self.dcRanges[self.next_id])
+        dc.addParam("network_address", nID)
 
         connect("mem_link_%d"%self.next_id,
                 mem, "direct_link",
@@ -143,36 +123,47 @@ class MemConfig:
 
 class NetConfig:
     class TopoConfig:
-        def getMerlinGenerator(self):
+        def getMerlinGenerator(self, model=None):
             pass
         def getMerlinParams(self):
             return dict()
         def numEndPoints(self):
             0
 
-    class MeshTopologyConfig(TopoConfig):
-        def __init__(self, params):
+    class ArrayTopologyConfig(TopoConfig):
+        # Topologies generated by sstcommon.topology rather than by merlin's
+        # Python generators, so they can be built into a ModelGraph.
+        # Configured from the [Network] section, e.g.
+        #   topology: mesh         topology: torus        topology: fattree
+        #   mesh_layout: 2x2       torus_shape: 4x4       fattree_radix: 4
+        #                                                 fattree_levels: 2
+        def __init__(self, kind, params):
             self.params = params
-            self.layout = params['layout'].split('x')
+            if kind == "mesh":
+                self.topo = topology.mesh(params['layout'])
+            elif kind == "ring":
+                self.topo = topology.ring(int(params['stops']))
+            elif kind == "torus":
+                self.topo = topology.torus(params['shape'])
+            elif kind == "fattree":
+                self.topo = topology.fatTree(int(params['radix']), int(params['levels']))
+            elif kind == "dragonfly":
+                self.topo = topology.dragonfly(int(params['hosts_per_router']),
+                                               int(params['routers_per_group']),
+                                               int(params['intergroup_per_router']),
+                                               int(params['num_groups']))
         def numEndPoints(self):
-            return reduce(lambda x,y: x*y, [int(x) for x in self.layout])
-        def getMerlinGenerator(self):
-            return merlin.topoMesh()
+            return self.topo.numEndPoints()
+        def getMerlinGenerator(self, model=None):
+            return topology.TopologyGenerator(self.topo, model=model)
         def getMerlinParams(self):
-            return dict({
-                "num_ports": 1 + 2*len(self.layout),
-                "topology": "mesh",
-                "num_dims": len(self.layout),
-                "mesh:width": "x".join(["1" for x in range(len(self.layout))]),
-                "mesh:shape": "x".join(self.layout),
-                "mesh:local_ports": 1
-            })
+            return dict(self.topo.merlinParams)
 
 
 
     def __init__(self, cp, cfgGroup='Network', cfgPrefix=''):
         self.cfg = { key[len(cfgPrefix):]: value
-                    for (key, value) in dict(cp.items(cfgGroup)).iteritems()
+                    for (key, value) in cp.section(cfgGroup).items()
                     if key[:len(cfgPrefix)] == cfgPrefix }
         if "topology" in self.cfg:
             self.topo = self.buildTopo()
@@ -185,16 +176,16 @@ class NetConfig:
                     for (key, value) in self.cfg.iteritems()
                     if key[:len(topo_type)] == topo_type }
 
-        if topo_type == "mesh_":
-            return self.MeshTopologyConfig(topoParams)
+        if topo_type in ("mesh_", "ring_", "torus_", "fattree_", "dragonfly_"):
+            return self.ArrayTopologyConfig(self.cfg["topology"], topoParams)
         else:
             raise Exception("Unknown topology type '%s'"%topo_type)
 
     def endPointCount(self):
         return self.topo.numEndPoints()
             
-    def getMerlinGenerator(self):
-        return self.topo.getMerlinGenerator()
+    def getMerlinGenerator(self, model=None):
+        return self.topo.getMerlinGenerator(model)
     def getMerlinParams(self):
         p = dict({
             "output_latency": "25ps",
@@ -214,13 +205,16 @@ class NetConfig:
 
 
 class GroupConfig:
-    def __init__(self, cp):
-        self.cfg = dict(cp.items('Groups'))
-        self.cpuConfig = CPUConfig(cp)
-        self.memConfig = MemConfig(cp)
+    def __init__(self, cp, log, model):
+        self.log = log
+        self.model = model
+        self.cfg = cp.section('Groups')
+        self.cpuConfig = CPUConfig(cp, model)
+        self.memConfig = MemConfig(cp, model)
         self.netCfg = NetConfig(cp, cfgGroup='Groups', cfgPrefix='net_')
 
         self.next_l3_id = 0
+        self.l3Params = None
 
     def setNumGroups(self, numGroups):
         self.num_groups = numGroups
@@ -231,34 +225,30 @@ class GroupConfig:
         return int(self.cfg['cores'])
 
     def buildL3(self, nID, netCfg):
-        l3cache = sst.Component("l3cache_%d"%(self.next_l3_id), "memHierarchy.Cache")
-        l3cache.addParams(dict({
-            "access_latency_cycles" : "12",
-            "cache_frequency" : self.cfg["clock"],
-            "associativity" : "16",
-            "cache_size" : self.cfg["l3cache_block_size"],
-            "mshr_num_entries" : "4096",
-            "network_bw": netCfg.cfg["bandwidth"],
-            # Distributed caches
-            "num_cache_slices" : self.num_groups * int(self.cfg["l3cache_blocks"]),
-            "slice_allocation_policy" : "rr",
-            # Default params
-            # "replacement_policy" : "lru",
-            # "cache_line_size" : "64",
-            # "coherence_protocol" : coherence_protocol,
+        if self.l3Params is None:
+            self.l3Params = FrozenParams(l3Params(self.cfg["clock"], self.cfg["l3cache_block_size"],
+                                                  netCfg.cfg["bandwidth"],
+                                                  self.num_groups * int(self.cfg["l3cache_blocks"])))
+        l3cache = self.model.Component("l3cache_%d"%(self.next_l3_id), "memHierarchy.Cache")
+        l3cache.addParams(self.l3Params)
+        l3cache.addParams({
             "network_address" : nID,
             "slice_id": self.next_l3_id
-            }))
+            })
 
         self.next_l3_id += 1
 
         return (l3cache, "directory", netCfg.cfg["latency"])
 
     def buildGroup(self, groupID, bridge):
-        print "Building group", groupID
+        self.log.debug("Building group %d", groupID)
+        self.log.count("groups")
+        self.log.count("cores", int(self.cfg["cores"]))
+        self.log.count("L3 blocks", int(self.cfg["l3cache_blocks"]))
+        self.log.count("memory controllers", int(self.cfg["memory_controllers"]))
         prefix = "Link:Group%d:"%groupID
         # Build rtr
-        rtr = sst.Component("local_rtr", "merlin.hr_router")
+        rtr = self.model.Component("local_rtr", "merlin.hr_router")
         rtr.addParams(self.netCfg.getMerlinParams())
         rtr.addParams(dict({
             "num_ports": 1 +
@@ -269,35 +259,35 @@ class GroupConfig:
             "id": 0
             }))
         # Connect to bridge
-        sst.Link(prefix+"bridgeRtr").connect(
+        self.model.Link(prefix+"bridgeRtr").connect(
             (rtr, "port0", self.netCfg.cfg["latency"]),
                 (bridge, "network0", self.netCfg.cfg["latency"]))
         # Connect CPUs
         port = 1
         for coreID in range(int(self.cfg["cores"])):
-            sst.Link(prefix+"Core%d"%coreID).connect(
+            self.model.Link(prefix+"Core%d"%coreID).connect(
                     (rtr, "port%d"%port, self.netCfg.cfg["latency"]),
                     self.cpuConfig.build(port, self.netCfg))
             port += 1
 
         # Connect L3s
         for l3ID in range(int(self.cfg["l3cache_blocks"])):
-            sst.Link(prefix+"L3_%d"%l3ID).connect(
+            self.model.Link(prefix+"L3_%d"%l3ID).connect(
                     (rtr, "port%d"%port, self.netCfg.cfg["latency"]),
                     self.buildL3(port, self.netCfg))
             port += 1
 
         # Connect Memories
         for memID in range(int(self.cfg["memory_controllers"])):
-            sst.Link(prefix+"MEM_%d"%memID).connect(
+            self.model.Link(prefix+"MEM_%d"%memID).connect(
                     (rtr, "port%d"%port, self.netCfg.cfg["latency"]),
                     self.memConfig.build(port, self.netCfg))
             port += 1
 
 
     def build(self, nID):
-        sst.pushNamePrefix("group%d"%nID)
-        bridge = sst.Component("bridge", "merlin.Bridge")
+        self.model.pushNamePrefix("group%d"%nID)
+        bridge = self.model.Component("bridge", "merlin.Bridge")
         bridge.addParams({
             "translator": "memHierarchy.MemNetBridge",
             "debug": 0,
@@ -306,7 +296,7 @@ class GroupConfig:
             })
         self.buildGroup(nID, bridge)
         ret = (bridge, "network1", self.netCfg.cfg["latency"])
-        sst.popNamePrefix()
+        self.model.popNamePrefix()
         return ret
 
 
@@ -323,18 +313,20 @@ class EndPointGenerator(merlin.EndPoint):
 class ChipConfig:
 
     def __init__(self, cfgFile, **kwargs):
-        cp = ConfigParser.ConfigParser()
-        if not cp.read(cfgFile):
-            raise Exception('Unable to read file "%s"'%cfgFile)
+        cp = loadConfigFile(cfgFile)
 
         self.verbose = "verbose" in kwargs and kwargs["verbose"]
+        self.log = kwargs.get("log") or BuildLog(self.verbose)
+
+        # Components and links are recorded here and emitted by the driver
+        self.model = kwargs.get("model") or ModelGraph()
 
-        self.groupConfig = GroupConfig(cp)
+        self.groupConfig = GroupConfig(cp, self.log, self.model)
         self.netConfig = NetConfig(cp)
         self.groupConfig.setNumGroups(self.netConfig.endPointCount())
 
     def build(self):
-        topoGen = self.netConfig.getMerlinGenerator()
+        topoGen = self.netConfig.getMerlinGenerator(self.model)
         # Hacky way to pass parameters to the Topology Builder
         sst.merlin._params.update(self.netConfig.getMerlinParams())
         topoGen.prepParams()
@@ -0,0 +1,10 @@
+# Code shared by the exercise drivers (ex2 .. ex9, cuda-test).
+#
+# Each exercise directory keeps its own utils.py so the tutorial still reads
+# as a progression, but the parsing of the .cfg file and the construction of
+# the parameter dictionaries handed to sst.Component.addParams() live here.
+#
+# The exercise utils.py files put the parent directory on sys.path before
+# importing this package, so drivers are still launched the usual way:
+#
+#     cd ex7 && sst ex7.py -c miranda.cfg
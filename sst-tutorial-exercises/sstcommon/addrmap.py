@@ -0,0 +1,156 @@
+from sstcommon.params import FrozenParams, parseCapacity, capacityBytes
+from sstcommon.buildlog import BuildLog
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+
+def _arange(n):
+    if numpy is not None:
+        return numpy.arange(n, dtype=numpy.int64)
+    return list(range(n))
+
+
+
+class AddressMap:
+    """The address ranges of every directory controller, computed together.
+
+    With an interleave size the controllers share the whole address space
+    in round-robin stripes of interleave_size bytes: controller i owns the
+    stripes starting at i*interleave_size, every interleave_step bytes, up
+    to and including its last stripe that fits in memory.  Without one,
+    memory is split into num_controllers contiguous blocks and the last
+    controller also gets what does not divide evenly.  Range ends are
+    inclusive.
+
+    starts, ends and sizes are NumPy arrays when NumPy is available and
+    lists otherwise.  The map is checked on construction: it raises if two
+    controllers own the same bytes or leave a hole between them, and warns
+    about a tail of memory too short for a whole stripe.
+    """
+    def __init__(self, capacity, num_controllers, interleave_size=0, log=None):
+        if num_controllers < 1:
+            raise Exception("At least one memory controller is needed, got %d"%num_controllers)
+
+        self.capacity = capacity
+        self.num_controllers = num_controllers
+        self.interleave_size = interleave_size
+        self.capacity_bytes = capacityBytes(capacity)
+
+        value, unit = parseCapacity(capacity)
+        self.mem_size = "%d%s"%(value // num_controllers, unit)
+
+        ids = _arange(num_controllers)
+        if interleave_size:
+            self.interleave_step = num_controllers * interleave_size
+            if self.capacity_bytes < self.interleave_step:
+                raise Exception("Capacity %s is smaller than one interleave step (%d controllers x %dB)"%(
+                    capacity, num_controllers, interleave_size))
+            # the start of each controller's last stripe that ends in memory
+            last = self.capacity_bytes - interleave_size
+            step = self.interleave_step
+            if numpy is not None:
+                self.starts = ids * interleave_size
+                self.ends = self.starts + (last - self.starts) // step * step
+                self.sizes = ((self.ends - self.starts) // step + 1) * interleave_size
+            else:
+                self.starts = [i * interleave_size for i in ids]
+                self.ends = [s + (last - s) // step * step for s in self.starts]
+                self.sizes = [((e - s) // step + 1) * interleave_size
+                              for (s, e) in zip(self.starts, self.ends)]
+        else:
+            self.interleave_step = 0
+            block = self.capacity_bytes // num_controllers
+            if numpy is not None:
+                self.starts = ids * block
+                self.ends = self.starts + (block - 1)
+                self.ends[-1] = self.capacity_bytes - 1
+                self.sizes = self.ends - self.starts + 1
+            else:
+                self.starts = [i * block for i in ids]
+                self.ends = [s + block - 1 for s in self.starts]
+                self.ends[-1] = self.capacity_bytes - 1
+                self.sizes = [e - s + 1 for (s, e) in zip(self.starts, self.ends)]
+
+        self._params = {}
+        self.validate()
+        self.unmapped = self.capacity_bytes - self._covered()
+        if self.unmapped:
+            (log or BuildLog()).warning("Capacity %s is not a multiple of the %dB interleave size; "
+                                        "the last %dB are not mapped to any controller",
+                                        capacity, interleave_size, self.unmapped)
+
+    def _covered(self):
+        if numpy is not None:
+            return int(self.sizes.sum())
+        return sum(self.sizes)
+
+    def validate(self):
+        """Check the start and end columns: no two controllers own the same
+        bytes, none owns bytes past the end of memory and only a tail shorter
+        than one stripe is left unmapped."""
+        if self.interleave_size:
+            size = self.interleave_size
+            step = self.interleave_step
+            if numpy is not None:
+                offsets = self.starts // size
+                aligned = bool(numpy.all(self.starts % size == 0)) and \
+                    bool(numpy.all((self.ends - self.starts) % step == 0))
+                # n distinct offsets below n: one stripe of each controller per step
+                distinct = bool(numpy.all(offsets < self.num_controllers)) and \
+                    len(numpy.unique(offsets)) == self.num_controllers
+                inside = bool(numpy.all(self.ends + size <= self.capacity_bytes))
+                # a whole step past any controller's last stripe would not fit
+                full = bool(numpy.all(self.ends + step + size > self.capacity_bytes))
+            else:
+                offsets = [s // size for s in self.starts]
+                aligned = all(s % size == 0 and (e - s) % step == 0
+                              for (s, e) in zip(self.starts, self.ends))
+                distinct = all(o < self.num_controllers for o in offsets) and \
+                    len(set(offsets)) == self.num_controllers
+                inside = all(e + size <= self.capacity_bytes for e in self.ends)
+                full = all(e + step + size > self.capacity_bytes for e in self.ends)
+            if not (aligned and distinct):
+                raise Exception("Interleaved address ranges overlap or leave holes")
+            if not inside:
+                raise Exception("Interleaved address ranges end past the %dB of memory"%self.capacity_bytes)
+            if not full:
+                raise Exception("Interleaved address ranges stop short of the end of memory")
+            if self.capacity_bytes - self._covered() >= size:
+                raise Exception("Address map covers %dB of %dB"%(self._covered(), self.capacity_bytes))
+        else:
+            if numpy is not None:
+                ok = bool(numpy.all(self.starts[1:] - self.ends[:-1] == 1)) and \
+                    bool(numpy.all(self.ends >= self.starts))
+            else:
+                ok = all(self.starts[i] == self.ends[i - 1] + 1
+                         for i in range(1, self.num_controllers)) and \
+                    all(e >= s for (s, e) in zip(self.starts, self.ends))
+            if not ok:
+                raise Exception("Contiguous address ranges overlap or leave holes")
+            if self.starts[0] != 0 or self.ends[-1] != self.capacity_bytes - 1:
+                raise Exception("Contiguous address ranges do not span the %dB of memory"%self.capacity_bytes)
+
+    def _buildParams(self, dc_id, prefix):
+        params = {
+            prefix + "addr_range_start" : int(self.starts[dc_id]),
+            prefix + "addr_range_end" : int(self.ends[dc_id]),
+            }
+        if self.interleave_size:
+            params[prefix + "interleave_size"] = "%dB"%self.interleave_size
+            params[prefix + "interleave_step"] = "%dB"%self.interleave_step
+        return FrozenParams(params)
+
+    def table(self, prefix=""):
+        """Per-controller parameter sets, optionally with a key prefix such
+        as "memNIC." for controllers that take them on their NIC."""
+        if prefix not in self._params:
+            self._params[prefix] = [self._buildParams(i, prefix)
+                                    for i in range(self.num_controllers)]
+        return self._params[prefix]
+
+    def dcParams(self, dc_id, prefix=""):
+        return self.table(prefix)[dc_id]
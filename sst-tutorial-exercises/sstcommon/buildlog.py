@@ -0,0 +1,81 @@
+"""Progress messages and a build summary for the drivers.
+
+The drivers used to print a line for every core, L3 block and group, which
+for thousands of cores is most of what a model build does.  Messages now go
+through a BuildLog, at a level chosen by how often -v is given:
+
+    (default)  warnings and the final "Completed configuring ..." line
+    -v         the build phases, and a count of what was built
+    -vv        every core, L3 block and group
+
+Messages below the level are not even formatted.  With --manifest FILE the
+driver also writes a JSON record of the build: its arguments, the counters
+and, for drivers that build a ModelGraph, the components per type.
+"""
+import json
+import sys
+import time
+
+
+
+QUIET = 0
+INFO = 1
+DEBUG = 2
+
+
+class BuildLog:
+    def __init__(self, verbosity=QUIET, manifest=None, out=None):
+        self.verbosity = int(verbosity or 0)
+        self.manifest = manifest
+        self.out = out if out is not None else sys.stdout
+        self.counters = {}
+        self.started = time.time()
+
+    def _write(self, message, args):
+        if args:
+            message = message%args
+        self.out.write(message + "\n")
+
+    def warning(self, message, *args):
+        self._write("Warning: " + message, args)
+
+    def info(self, message, *args):
+        if self.verbosity >= INFO:
+            self._write(message, args)
+
+    def debug(self, message, *args):
+        if self.verbosity >= DEBUG:
+            self._write(message, args)
+
+    def count(self, kind, n=1):
+        self.counters[kind] = self.counters.get(kind, 0) + n
+
+    def record(self, model=None):
+        """The build manifest, as a dict."""
+        record = {
+            "driver" : sys.argv[0] if sys.argv else None,
+            "args" : sys.argv[1:],
+            "seconds" : round(time.time() - self.started, 6),
+            "counters" : dict(self.counters),
+            }
+        if model is not None:
+            types = {}
+            for code in model.componentType:
+                types[code] = types.get(code, 0) + 1
+            record["components"] = dict((model.types[code], n) for (code, n) in types.items())
+            record["numComponents"] = model.numComponents
+            record["numLinks"] = model.numLinks
+        return record
+
+    def finish(self, message, model=None):
+        """Print message, the counters at -v, and write the manifest."""
+        record = self.record(model)
+        self._write(message, ())
+        if self.verbosity >= INFO:
+            counts = sorted(record.get("components", {}).items()) + sorted(self.counters.items())
+            for (kind, n) in counts:
+                self._write("  %8d  %s", (n, kind))
+            self._write("  built in %.3fs", (record["seconds"],))
+        if self.manifest:
+            with open(self.manifest, "w") as f:
+                json.dump(record, f, indent=1, sort_keys=True)
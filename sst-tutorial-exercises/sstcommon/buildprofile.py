@@ -0,0 +1,192 @@
+"""Profile the Python phase of a driver: the time from parsing its options
+until the model has been handed to sst.
+
+    sst ex8/ex8.py -c ex8/miranda.cfg --profile build.folded
+
+records every Python and builtin call the driver makes (buildCore,
+GroupInfo.nextItem, getL1Params, connect, ...) and writes
+ * build.folded: one "frame;frame;frame microseconds" line per call stack,
+   the collapsed-stack format read by flamegraph.pl and speedscope,
+ * build.folded.alloc: the same stacks weighted by bytes allocated (only
+   under Python 3, from tracemalloc), and
+ * build.folded.txt: time, calls and allocations per function and, for the
+   components created, per component type.
+
+Component() calls and the parameter calls on their handles are labelled with
+the component type, e.g. "Component[memHierarchy.Cache]".
+"""
+import os
+import sys
+import time
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from sstcommon.graph import ModelGraph, ComponentRef
+
+_clock = getattr(time, "perf_counter", time.time)
+
+
+
+def _code(function):
+    function = getattr(function, "__func__", function)
+    return getattr(function, "__code__", None)
+
+
+def _makeComponent(real):
+    def Component(name, componentType):
+        return real(name, componentType)
+    return Component
+
+
+# code objects whose frame is labelled with the type of the component
+_COMPONENT_CODES = set([_code(ModelGraph.Component)])
+_REF_CODES = set(_code(getattr(ComponentRef, m)) for m in
+                 ("addParams", "addParam", "setRank", "enableAllStatistics", "enableStatistics"))
+_WRAPPER_CODE = _makeComponent(None).__code__
+_COMPONENT_CODES.add(_WRAPPER_CODE)
+
+
+class _Entry:
+    __slots__ = ("calls", "total", "own", "bytes")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.own = 0.0
+        self.bytes = 0
+
+
+
+class BuildProfile:
+    """Records call stacks with sys.setprofile between start() and stop()."""
+    def __init__(self, path, memory=True):
+        self.path = path
+        self.memory = memory and tracemalloc is not None
+        self.folded = {}
+        self.allocated = {}
+        self.functions = {}
+        self.types = {}
+        self.componentCounts = {}
+        self._stack = []
+        self._patched = None
+        self._started = None
+        self._elapsed = 0.0
+
+    def _label(self, frame):
+        code = frame.f_code
+        name = "%s:%s"%(os.path.basename(code.co_filename), getattr(code, "co_qualname", code.co_name))
+        componentType = None
+        if code in _COMPONENT_CODES:
+            componentType = frame.f_locals.get("componentType")
+            if componentType is not None:
+                self.componentCounts[componentType] = self.componentCounts.get(componentType, 0) + 1
+        elif code in _REF_CODES:
+            ref = frame.f_locals.get("self")
+            if ref is not None:
+                componentType = ref.model.componentTypeName(ref.index)
+        if componentType is not None:
+            if code is _WRAPPER_CODE:
+                name = "Component"
+            name = "%s[%s]"%(name, componentType)
+        return name, componentType
+
+    def _memory(self):
+        return tracemalloc.get_traced_memory()[0] if self.memory else 0
+
+    def _push(self, label, componentType):
+        key = self._stack[-1][1] + ";" + label if self._stack else label
+        # label, stack key, component type, start, memory at start, time and
+        # bytes of the calls made from this one
+        self._stack.append([label, key, componentType, _clock(), self._memory(), 0.0, 0])
+
+    def _pop(self):
+        (label, key, componentType, start, mem, childTime, childBytes) = self._stack.pop()
+        total = _clock() - start
+        grown = self._memory() - mem
+        own = total - childTime
+        self.folded[key] = self.folded.get(key, 0.0) + own
+        if self.memory:
+            self.allocated[key] = self.allocated.get(key, 0) + max(0, grown - childBytes)
+        entry = self.functions.get(label)
+        if entry is None:
+            entry = self.functions[label] = _Entry()
+        entry.calls += 1
+        entry.own += own
+        if not any(frame[0] == label for frame in self._stack):
+            # only the outermost of recursive calls counts towards the total
+            entry.total += total
+            entry.bytes += grown
+        if componentType is not None:
+            (count, seconds) = self.types.get(componentType, (0, 0.0))
+            self.types[componentType] = (count + 1, seconds + total)
+        if self._stack:
+            self._stack[-1][5] += total
+            self._stack[-1][6] += grown
+
+    def _event(self, frame, event, arg):
+        if event == "call":
+            self._push(*self._label(frame))
+        elif event == "c_call":
+            self._push(getattr(arg, "__name__", "builtin"), None)
+        elif len(self._stack) > 1:
+            # return, c_return and c_exception; the root frame stays until
+            # stop()
+            self._pop()
+
+    def start(self):
+        try:
+            import sst
+        except ImportError:
+            sst = None
+        if sst is not None and hasattr(sst, "Component"):
+            self._patched = (sst, sst.Component)
+            sst.Component = _makeComponent(sst.Component)
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._started = _clock()
+        self._push("build", None)
+        sys.setprofile(self._event)
+
+    def stop(self):
+        sys.setprofile(None)
+        # drop the frames of this call and of sys.setprofile
+        del self._stack[-2:]
+        while self._stack:
+            self._pop()
+        self._elapsed = _clock() - self._started
+        if self._patched is not None:
+            (sst, real) = self._patched
+            sst.Component = real
+            self._patched = None
+        if self.memory:
+            tracemalloc.stop()
+        self.write()
+
+    def write(self):
+        with open(self.path, "w") as f:
+            for (key, seconds) in sorted(self.folded.items()):
+                f.write("%s %d\n"%(key, int(round(seconds * 1e6))))
+        if self.memory:
+            with open(self.path + ".alloc", "w") as f:
+                for (key, allocated) in sorted(self.allocated.items()):
+                    if allocated:
+                        f.write("%s %d\n"%(key, allocated))
+        with open(self.path + ".txt", "w") as f:
+            self.summary(f)
+        sys.stdout.write("Build profile: %.3fs, written to %s\n"%(self._elapsed, self.path))
+
+    def summary(self, out, top=40):
+        out.write("build time: %.3fs\n\n"%self._elapsed)
+        out.write("%10s %10s %10s %12s  function\n"%("calls", "total s", "own s", "bytes"))
+        ranked = sorted(self.functions.items(), key=lambda item: -item[1].own)
+        for (label, entry) in ranked[:top]:
+            out.write("%10d %10.4f %10.4f %12s  %s\n"%(entry.calls, entry.total, entry.own,
+                                                      entry.bytes if self.memory else "-", label))
+        if self.types:
+            out.write("\n%10s %10s %10s  component type\n"%("created", "calls", "total s"))
+            for (componentType, (calls, seconds)) in sorted(self.types.items(), key=lambda item: -item[1][1]):
+                out.write("%10d %10d %10.4f  %s\n"%(self.componentCounts.get(componentType, 0),
+                                                   calls, seconds, componentType))
@@ -0,0 +1,319 @@
+import os
+
+try:
+    import ConfigParser
+except ImportError:
+    import configparser as ConfigParser
+
+from sstcommon.params import FrozenParams
+from sstcommon.addrmap import AddressMap
+from sstcommon.workloads import loadWorkload
+
+
+
+class ConfigFile:
+    """The sections of one .cfg file, each frozen into a FrozenParams.
+
+    Keys are lower-cased, as ConfigParser does.  Use loadConfigFile() rather
+    than building these directly so a file is only parsed once per process.
+    """
+    def __init__(self, cfgFile):
+        cp = ConfigParser.ConfigParser()
+        if not cp.read(cfgFile):
+            raise Exception('Unable to read file "%s"'%cfgFile)
+
+        self.path = cfgFile
+        self.sections = FrozenParams((name, FrozenParams(cp.items(name)))
+                                     for name in cp.sections())
+
+    def has(self, section, key=None):
+        if section not in self.sections:
+            return False
+        return key is None or key in self.sections[section]
+
+    def section(self, section):
+        if section not in self.sections:
+            raise Exception("Section '%s' missing from '%s'"%(section, self.path))
+        return self.sections[section]
+
+    def items(self, section):
+        return list(self.section(section).items())
+
+    def get(self, section, key, default=None):
+        values = self.section(section)
+        if key not in values:
+            if default is None:
+                raise Exception("Option '%s' missing from section '%s' of '%s'"%(key, section, self.path))
+            return default
+        return values[key]
+
+    def getint(self, section, key, default=None):
+        return int(self.get(section, key, default))
+
+
+_config_files = {}
+
+def loadConfigFile(cfgFile):
+    """Return the parsed ConfigFile for cfgFile, parsing it only on first use."""
+    path = os.path.abspath(cfgFile)
+    try:
+        key = (path, os.path.getmtime(path))
+    except OSError:
+        raise Exception('Unable to read file "%s"'%cfgFile)
+    if key not in _config_files:
+        _config_files[key] = ConfigFile(path)
+    return _config_files[key]
+
+
+
+def l1Params(clock):
+    """Parameters of a private L1 cache, shared by SNBConfig and ex9."""
+    return dict({
+        "prefetcher": "cassini.StridePrefetcher",
+        "prefetcher.reach": 4,
+        "prefetcher.detect_range" : 1,
+        "cache_frequency": clock,
+        "cache_size": "32KB",
+        "associativity": 8,
+        "access_latency_cycles": 4,
+        "L1": 1,
+        # Default params
+        # "cache_line_size": 64,
+        # "coherence_protocol": self.coherence_protocol,
+        # "replacement_policy": "lru",
+        # Not neccessary for simple cases:
+        #"maxRequestDelay" : "1000000",
+        })
+
+
+def l2Params(clock, networkBandwidth=None):
+    """Parameters of a private L2 cache; network_bw is only set when the L2
+    sits on a network."""
+    params = dict({
+        "prefetcher": "cassini.StridePrefetcher",
+        "prefetcher.reach": 16,
+        "prefetcher.detect_range" : 1,
+        "cache_frequency": clock,
+        "cache_size": "256KB",
+        "associativity": 8,
+        "access_latency_cycles": 6,
+        "mshr_num_entries" : 16,
+        # Default params
+        #"cache_line_size": 64,
+        #"coherence_protocol": self.coherence_protocol,
+        #"replacement_policy": "lru",
+        })
+    if networkBandwidth is not None:
+        params["network_bw"] = networkBandwidth
+    return params
+
+
+def l3Params(clock, blockSize, networkBandwidth, slices):
+    """Parameters of one slice of a distributed L3 cache."""
+    return dict({
+        "access_latency_cycles" : "12",
+        "cache_frequency" : clock,
+        "associativity" : "16",
+        "cache_size" : blockSize,
+        "mshr_num_entries" : "4096",
+        "network_bw": networkBandwidth,
+        # Distributed caches
+        "num_cache_slices" : slices,
+        "slice_allocation_policy" : "rr",
+        # Default params
+        # "replacement_policy" : "lru",
+        # "cache_line_size" : "64",
+        # "coherence_protocol" : coherence_protocol,
+        })
+
+
+
+class SNBConfig:
+    """Configuration shared by the exercise drivers.
+
+    Sections and options that only later exercises use ([Network], [Groups],
+    Memory num_controllers and interleave_size) are optional, so ex2 through
+    ex8 and cuda-test can all read their .cfg files with this class.  Every
+    get*Params() method hands back a cached FrozenParams; values that differ
+    per component (network_address, slice_id, ...) are set by the driver with
+    addParam().
+    """
+    def __init__(self, cfgFile, **kwargs):
+        cp = loadConfigFile(cfgFile)
+        self.cp = cp
+
+        # -v may be given more than once; the components only have on/off
+        self.verbose = "verbose" in kwargs and bool(kwargs["verbose"])
+
+        self.clock = cp.get('CPU', 'clock')
+        self.max_reqs_cycle = cp.get('CPU', 'max_reqs_cycle')
+        self.coherence_protocol = "MESI"
+
+        self.memory_clock = cp.get('Memory', 'clock')
+        self.memory_network_bandwidth = cp.get('Memory', 'network_bw')
+        self.memory_capacity = cp.get('Memory', 'capacity')
+        self.mem_interleave_size = cp.getint('Memory', 'interleave_size', 0)
+        if cp.has('Memory', 'link_latency'):
+            self.cache_link_latency = cp.get('Memory', 'link_latency')
+
+        if cp.has('Groups'):
+            self.cores_per_group = cp.getint('Groups', 'cores')
+            self.memory_controllers_per_group = cp.getint('Groups', 'memory_controllers')
+            self.groups = cp.getint('Groups', 'group_count')
+            self.l3cache_blocks_per_group = cp.getint('Groups', 'l3cache_blocks')
+            self.l3cache_block_size = cp.get('Groups', 'l3cache_block_size')
+
+            self.total_cores = (self.groups * self.cores_per_group)
+            self.num_memory_controllers = self.groups * self.memory_controllers_per_group
+            self.num_ring_stop_per_group = self.cores_per_group + self.memory_controllers_per_group + self.l3cache_blocks_per_group
+            self.num_ring_stops = self.num_ring_stop_per_group * self.groups
+
+            self.l3_cache_per_core  = int(self.l3cache_blocks_per_group / self.cores_per_group)
+            self.l3_cache_remainder = self.l3cache_blocks_per_group - (self.l3_cache_per_core * self.cores_per_group)
+        else:
+            self.total_cores = cp.getint('CPU', 'num_cores', 1)
+            self.num_memory_controllers = cp.getint('Memory', 'num_controllers', 1)
+            self.num_ring_stops = self.total_cores + self.num_memory_controllers
+
+        if cp.has('Network'):
+            self.ring_latency = cp.get('Network', 'latency')
+            self.ring_bandwidth = cp.get('Network', 'bandwidth')
+            self.ring_flit_size = cp.get('Network', 'flit_size')
+        else:
+            self.ring_bandwidth = None
+
+        self.app = cp.get('CPU', 'application')
+        self.coreConfigParams = cp.section(self.app)
+        self.workload = loadWorkload(self.app, self.coreConfigParams)
+
+        self.addressMap = AddressMap(self.memory_capacity,
+                                     self.num_memory_controllers,
+                                     self.mem_interleave_size,
+                                     log=kwargs.get("log"))
+        self._params = {}
+
+    def _cached(self, key, build):
+        if key not in self._params:
+            self._params[key] = FrozenParams(build())
+        return self._params[key]
+
+    def getCoreConfig(self, core_id):
+        return self.workload.coreConfig(self, core_id)
+
+    def _buildCoreCommonParams(self):
+        return dict({
+                'clock': self.clock,
+                'verbose': int(self.verbose)
+                })
+
+    def coreCommonParams(self):
+        """Parameters every CPU component gets, whatever the workload."""
+        return self._cached('core', self._buildCoreCommonParams)
+
+    def arielDefaults(self):
+        return dict({
+            "maxcorequeue"        : 256,
+            "maxtranscore"        : 16,
+            "maxissuepercycle"    : self.max_reqs_cycle,
+            "pipetimeout"         : 0,
+            "appargcount"         : 0,
+            "memorylevels"        : 1,
+            "arielinterceptcalls" : 1,
+            "arielmode"           : 1,
+            "pagecount0"          : 1048576,
+            "corecount"           : self.total_cores,
+            "defaultlevel"        : 0,
+            })
+
+    def _networkParams(self):
+        if self.ring_bandwidth is None:
+            return dict()
+        return dict({"network_bw": self.ring_bandwidth})
+
+    def _buildL1Params(self):
+        return l1Params(self.clock)
+
+    def getL1Params(self):
+        return self._cached('l1', self._buildL1Params)
+
+    def _buildL2Params(self):
+        return l2Params(self.clock, self.ring_bandwidth)
+
+    def getL2Params(self):
+        return self._cached('l2', self._buildL2Params)
+
+    def _buildL3Params(self):
+        return l3Params(self.clock, self.l3cache_block_size, self.ring_bandwidth,
+                        self.groups * self.l3cache_blocks_per_group)
+
+    def getL3Params(self):
+        return self._cached('l3', self._buildL3Params)
+
+    def _buildMemParams(self):
+        params = dict({
+            "backend" : "memHierarchy.simpleMem",
+            "backend.access_time" : "30ns",
+            "backend.mem_size" : self.addressMap.mem_size,
+            "clock" : self.memory_clock,
+            "do_not_back" : 1,
+            })
+        params.update(self._networkParams())
+        return params
+
+    def getMemParams(self):
+        return self._cached('mem', self._buildMemParams)
+
+    def _buildDCParams(self):
+        return dict({
+            "entry_cache_size": 256*1024*1024, #Entry cache size of mem/blocksize
+            "clock": self.memory_clock,
+            "network_bw": self.ring_bandwidth,
+            # Default params
+            # "coherence_protocol": coherence_protocol,
+            })
+
+    def getDCParams(self, dc_id):
+        if 'dc' not in self._params:
+            common = self._buildDCParams()
+            tables = []
+            for ranges in self.addressMap.table():
+                params = dict(common)
+                params.update(ranges)
+                tables.append(FrozenParams(params))
+            self._params['dc'] = tables
+        return self._params['dc'][dc_id]
+
+    def _buildRouterParams(self):
+        return dict({
+            "output_latency" : "25ps",
+            "xbar_bw" : self.ring_bandwidth,
+            "input_buf_size" : "2KB",
+            "input_latency" : "25ps",
+            "num_ports" : self.num_ring_stops,
+            "flit_size" : self.ring_flit_size,
+            "output_buf_size" : "2KB",
+            "link_bw" : self.ring_bandwidth,
+            "topology" : "merlin.singlerouter"
+        })
+
+    def getRouterParams(self):
+        return self._cached('router', self._buildRouterParams)
+
+    def _buildRingParams(self):
+        return dict({
+            "torus:shape" : str(self.num_ring_stops),
+            "output_latency" : "25ps",
+            "xbar_bw" : self.ring_bandwidth,
+            "input_buf_size" : "2KB",
+            "input_latency" : "25ps",
+            "num_ports" : "3",
+            "torus:local_ports" : "1",
+            "flit_size" : self.ring_flit_size,
+            "output_buf_size" : "2KB",
+            "link_bw" : self.ring_bandwidth,
+            "torus:width" : "1",
+            "topology" : "merlin.torus"
+        })
+
+    def getRingParams(self):
+        return self._cached('ring', self._buildRingParams)
@@ -0,0 +1,148 @@
+"""A closed-form estimate of what a STREAM run of an exercise model achieves.
+
+The miranda STREAM generator makes one pass of a[i] = b[i] + s * c[i] over
+total_streamN elements of operandwidth bytes, split evenly across the cores.
+Every line of b and c is read from memory, every line of a is read for
+ownership, and the lines of a that do not fit in the caches are written
+back.  The sustained bandwidth is the smallest of:
+
+ * cores:    each core keeps at most one L2 MSHR's worth of lines in flight
+             (Little's law over the unloaded miss latency), and cannot issue
+             more than max_reqs_cycle requests per cycle
+ * memory:   each controller's simpleMem backend takes one line per memory
+             clock
+ * memlink:  each controller's network_bw
+ * network:  for a ring, the link bandwidth times the ring's capacity over
+             its mean hop count; for a single router, its crossbar
+
+and the runtime is the bytes moved over that bandwidth plus one miss
+latency.  It ignores prefetching, contention below saturation and
+coherence traffic, so use it to rank and prune points, not to replace a
+simulation:
+
+    python -m sstcommon.estimate ex5/miranda.cfg ex7/miranda.cfg
+"""
+import argparse
+import sys
+
+from sstcommon.config import SNBConfig, loadConfigFile
+from sstcommon.params import bandwidthBytes, capacityBytes, frequencyHz, latencyPs
+
+
+
+LINE_SIZE = 64
+STREAM_APP = "miranda.STREAMBenchGenerator"
+# router input and output latency (see SNBConfig's router parameters)
+ROUTER_PS = 50.0
+
+
+class Unsupported(Exception):
+    """The configuration is valid but not one the estimate models."""
+
+
+def _cacheBytes(config):
+    total = capacityBytes(config.getL2Params()["cache_size"]) * config.total_cores
+    if hasattr(config, "groups"):
+        total += capacityBytes(config.l3cache_block_size) * config.groups * config.l3cache_blocks_per_group
+    return total
+
+
+def _missLatency(config):
+    """Unloaded latency, in seconds, of a load that misses every cache."""
+    clock = frequencyHz(config.clock)
+    cycles = int(config.getL1Params()["access_latency_cycles"]) + int(config.getL2Params()["access_latency_cycles"])
+    if hasattr(config, "groups"):
+        cycles += int(config.getL3Params()["access_latency_cycles"])
+    seconds = cycles / clock
+    mem = config.getMemParams()
+    seconds += latencyPs(mem["backend.access_time"]) * 1e-12 + 1.0 / frequencyHz(config.memory_clock)
+    if config.ring_bandwidth is not None:
+        hopPs = latencyPs(config.ring_latency) + ROUTER_PS
+        hops = max(1.0, config.num_ring_stops / 4.0) if hasattr(config, "groups") else 1.0
+        # request and response each cross the network
+        seconds += 2 * hops * hopPs * 1e-12
+    return seconds
+
+
+def bounds(config, latency=None):
+    """{resource: bytes/s it can sustain} for a STREAM run of config."""
+    if latency is None:
+        latency = _missLatency(config)
+    core = config.getCoreConfig(0)
+    operandWidth = int(core["generatorParams.operandwidth"])
+    clock = frequencyHz(config.clock)
+    inFlight = int(config.getL2Params()["mshr_num_entries"]) * LINE_SIZE / latency
+    issue = clock * int(config.max_reqs_cycle) * operandWidth
+    found = {
+        "cores" : config.total_cores * min(inFlight, issue),
+        "memory" : config.num_memory_controllers * frequencyHz(config.memory_clock) * LINE_SIZE,
+        "memlink" : config.num_memory_controllers * bandwidthBytes(config.memory_network_bandwidth),
+        }
+    if config.ring_bandwidth is not None:
+        link = bandwidthBytes(config.ring_bandwidth)
+        if hasattr(config, "groups"):
+            # 2 directions x S links, each transfer crossing S/4 of them
+            stops = config.num_ring_stops
+            found["network"] = link * 2 * stops / max(1.0, stops / 4.0)
+        else:
+            found["network"] = link
+    return found
+
+
+def streamBytes(config):
+    """Bytes the STREAM pass moves to and from memory."""
+    streamN = int(config.coreConfigParams["total_streamn"])
+    operandWidth = int(config.getCoreConfig(0)["generatorParams.operandwidth"])
+    array = streamN * operandWidth
+    moved = 3 * array
+    # the lines of a that stay in the caches are not written back in the run
+    moved += max(0, array - max(0, _cacheBytes(config) - 2 * array))
+    return moved
+
+
+def estimate(config):
+    """The estimate for an SNBConfig running STREAM, as a dict."""
+    if config.app != STREAM_APP:
+        raise Unsupported("Only %s can be estimated, not %s"%(STREAM_APP, config.app))
+    latency = _missLatency(config)
+    found = bounds(config, latency)
+    limiter = min(found, key=lambda k: found[k])
+    bandwidth = found[limiter]
+    moved = streamBytes(config)
+    return {
+        "bandwidth" : bandwidth,
+        "limiter" : limiter,
+        "bounds" : found,
+        "bytes" : moved,
+        "latencyNs" : latency * 1e9,
+        "runtimeUs" : (moved / bandwidth + latency) * 1e6,
+        }
+
+
+def estimateFile(cfgFile):
+    cp = loadConfigFile(cfgFile)
+    if cp.has('Groups') and not cp.has('Groups', 'group_count'):
+        # ex9's groups hang off a [Network] topology of their own routers
+        raise Unsupported("ex9 configurations (groups on a network topology) are not modelled")
+    return estimate(SNBConfig(cfgFile))
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estimate STREAM bandwidth and runtime of exercise configurations")
+    parser.add_argument("configs", nargs="+", help=".cfg files")
+    args = parser.parse_args(argv)
+
+    sys.stdout.write("%-30s %10s %10s %10s  %s\n"%("config", "GB/s", "runtime us", "latency ns", "limited by"))
+    for cfgFile in args.configs:
+        try:
+            found = estimateFile(cfgFile)
+        except Unsupported as e:
+            sys.stdout.write("%-30s cannot be estimated: %s\n"%(cfgFile, e))
+            continue
+        sys.stdout.write("%-30s %10.2f %10.2f %10.1f  %s\n"%(cfgFile, found["bandwidth"] / 1e9, found["runtimeUs"],
+                                                             found["latencyNs"], found["limiter"]))
+
+
+if __name__ == "__main__":
+    main()
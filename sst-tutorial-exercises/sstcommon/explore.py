@@ -0,0 +1,360 @@
+"""Search the .cfg options of a driver for the best configuration with as few
+simulations as possible.
+
+The space is given as for sstcommon.sweep, a list of values per option.
+After an initial Latin hypercube, each round fits a Gaussian process to the
+results so far and simulates the batch of points with the highest expected
+improvement, in parallel:
+
+    python -m sstcommon.explore ex7/ex7.py -c ex7/miranda.cfg -o explore7 \\
+        --set Groups.cores=1,2,4,8 --set Groups.group_count=1,2,4,8 \\
+        --set Groups.l3cache_block_size=512KB,1MB,2MB,4MB \\
+        --set Memory.clock=200MHz,400MHz,800MHz \\
+        --budget "cores * group_count <= 16" --initial 8 --batch 4 --rounds 6
+
+The objective is taken from each point's stats.csv: the final simulated
+time by default (the STREAM completion time), or the total of a statistic
+with --objective NAME.  --budget drops points whose option values (by
+option name, with units converted) fail the expression.
+
+Every simulated point is recorded in <outdir>/history.json as soon as its
+round finishes; running the same command again continues from it.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+
+import numpy
+
+from sstcommon import stats
+from sstcommon.params import bandwidthBytes, capacityBytes, frequencyHz, latencyPs
+from sstcommon.resultcache import ResultCache, DEFAULT_DIR, DEFAULT_BUDGET
+from sstcommon.sweep import (SweepRun, expandGrid, latinHypercube, parseSet, pointName,
+                             runSweep, workerCount)
+
+
+
+HISTORY = "history.json"
+MAX_CANDIDATES = 20000
+
+
+def numericValue(text):
+    """A .cfg value as a number, with capacity, clock, bandwidth and latency
+    units converted; None if it is not a number."""
+    text = text.strip()
+    for convert in (float, capacityBytes, frequencyHz, bandwidthBytes, latencyPs):
+        try:
+            return float(convert(text))
+        except Exception:
+            pass
+    return None
+
+
+def budgetVariables(point):
+    """Names a --budget expression may use: each option's name and
+    Section_option, bound to its numeric value (or its text)."""
+    names = {}
+    for ((section, option), value) in point.items():
+        number = numericValue(value)
+        names[option] = value if number is None else number
+        names["%s_%s"%(section, option)] = names[option]
+    return names
+
+
+def withinBudget(point, budgets):
+    names = budgetVariables(point)
+    for expression in budgets:
+        if not eval(expression, {"__builtins__" : {}, "min" : min, "max" : max}, names):
+            return False
+    return True
+
+
+def encode(space, point):
+    """A point as coordinates in [0, 1]: each option's position in its list
+    of values, so the lists should be given in order."""
+    coords = []
+    for (key, values) in space:
+        n = len(values)
+        coords.append(values.index(point[key]) / float(n - 1) if n > 1 else 0.0)
+    return coords
+
+
+def objective(statFile, name=None):
+    """The final simulated time in a stats.csv, or with name the total of
+    that statistic over every component."""
+    if name is None:
+        last = None
+        for chunk in stats.iterChunks(statFile):
+            if len(chunk):
+                top = float(chunk["simtime"].max())
+                last = top if last is None else max(last, top)
+        return last
+    totals = stats.aggregate(statFile, by="statistic")
+    if name not in totals:
+        return None
+    return totals[name]["sum"]
+
+
+
+class GaussianProcess:
+    """A zero-mean Gaussian process with a squared exponential kernel over
+    the encoded points, fit to standardized objectives.  The length scale is
+    chosen by marginal likelihood from a short list.  If no length scale
+    factors, as with near-duplicate points, the noise term is raised tenfold
+    and the list tried again."""
+    LENGTH_SCALES = (0.1, 0.2, 0.35, 0.5, 0.75, 1.0, 1.5)
+    NOISE = 1e-4
+    MAX_NOISE = 1e-1
+
+    def __init__(self, lengthScale=None):
+        self.lengthScale = lengthScale
+
+    def _kernel(self, a, b, lengthScale):
+        d = ((a[:, None, :] - b[None, :, :]) ** 2).sum(axis=2)
+        return numpy.exp(-0.5 * d / lengthScale ** 2)
+
+    def _factor(self, x, y, lengthScale, noise):
+        k = self._kernel(x, x, lengthScale) + noise * numpy.eye(len(x))
+        chol = numpy.linalg.cholesky(k)
+        alpha = numpy.linalg.solve(chol.T, numpy.linalg.solve(chol, y))
+        logLikelihood = -0.5 * y.dot(alpha) - numpy.log(numpy.diag(chol)).sum()
+        return chol, alpha, logLikelihood
+
+    def fit(self, x, y):
+        self.x = numpy.asarray(x, dtype=float)
+        y = numpy.asarray(y, dtype=float)
+        self.mean = y.mean()
+        self.scale = y.std() or 1.0
+        self.y = (y - self.mean) / self.scale
+        scales = [self.lengthScale] if self.lengthScale else self.LENGTH_SCALES
+        best = None
+        noise = self.NOISE
+        while best is None:
+            for lengthScale in scales:
+                try:
+                    (chol, alpha, logLikelihood) = self._factor(self.x, self.y, lengthScale, noise)
+                except numpy.linalg.LinAlgError:
+                    continue
+                if best is None or logLikelihood > best[3]:
+                    best = (lengthScale, chol, alpha, logLikelihood)
+            if best is None:
+                noise *= 10
+                if noise > self.MAX_NOISE:
+                    raise Exception("Cannot fit the surrogate to %d points: the kernel matrix is "
+                                    "singular for every length scale"%len(self.x))
+        (self.fitted, self.chol, self.alpha, ignored) = best
+        self.noise = noise
+        return self
+
+    def predict(self, x):
+        """Mean and standard deviation, in objective units, at each row of x."""
+        x = numpy.asarray(x, dtype=float)
+        ks = self._kernel(x, self.x, self.fitted)
+        mu = ks.dot(self.alpha)
+        v = numpy.linalg.solve(self.chol, ks.T)
+        var = numpy.maximum(1.0 + self.noise - (v * v).sum(axis=0), 1e-12)
+        return mu * self.scale + self.mean, numpy.sqrt(var) * self.scale
+
+
+_erf = numpy.vectorize(math.erf)
+
+
+def expectedImprovement(mu, sigma, best):
+    """Expected amount by which each prediction falls below best."""
+    z = (best - mu) / sigma
+    cdf = 0.5 * (1.0 + _erf(z / math.sqrt(2.0)))
+    pdf = numpy.exp(-0.5 * z * z) / math.sqrt(2.0 * math.pi)
+    return (best - mu) * cdf + sigma * pdf
+
+
+
+class Explorer:
+    """The exploration state: the space, the budget and the history of
+    simulated points, persisted in outDir/history.json."""
+    def __init__(self, space, outDir, budgets=(), seed=None):
+        self.space = space
+        self.outDir = outDir
+        self.budgets = list(budgets)
+        self.rng = numpy.random.RandomState(seed)
+        self.seed = seed
+        self.history = []
+        self.load()
+
+    def _keyText(self, key):
+        return "%s.%s"%key
+
+    def _fromText(self, point):
+        return dict((tuple(k.split(".", 1)), v) for (k, v) in point.items())
+
+    def _inSpace(self, point):
+        return all(point.get(key) in values for (key, values) in self.space)
+
+    def load(self):
+        path = os.path.join(self.outDir, HISTORY)
+        if os.path.exists(path):
+            with open(path) as f:
+                self.history = json.load(f)["history"]
+
+    def save(self):
+        if not os.path.isdir(self.outDir):
+            os.makedirs(self.outDir)
+        path = os.path.join(self.outDir, HISTORY)
+        with open(path + ".tmp", "w") as f:
+            json.dump({"space" : [[self._keyText(k), v] for (k, v) in self.space],
+                       "budgets" : self.budgets,
+                       "history" : self.history}, f, indent=1, sort_keys=True)
+        os.rename(path + ".tmp", path)
+
+    def _seen(self):
+        return set(tuple(sorted(h["point"].items())) for h in self.history)
+
+    def candidates(self):
+        """Unsimulated points within the budget; a random sample of them if
+        the full grid is too large."""
+        seen = self._seen()
+        size = 1
+        for (key, values) in self.space:
+            size *= len(values)
+        if size <= MAX_CANDIDATES:
+            points = expandGrid(self.space)
+        else:
+            points = [dict((key, values[self.rng.randint(len(values))]) for (key, values) in self.space)
+                      for i in range(MAX_CANDIDATES)]
+        found = []
+        for point in points:
+            text = tuple(sorted((self._keyText(k), v) for (k, v) in point.items()))
+            if text not in seen and withinBudget(point, self.budgets):
+                seen.add(text)
+                found.append(point)
+        return found
+
+    def initial(self, count):
+        """Latin hypercube points within the budget, for the first round."""
+        seen = self._seen()
+        found = []
+        for attempt in range(20):
+            seed = None if self.seed is None else self.seed + attempt
+            for point in latinHypercube(self.space, count, seed):
+                text = tuple(sorted((self._keyText(k), v) for (k, v) in point.items()))
+                if text not in seen and withinBudget(point, self.budgets):
+                    seen.add(text)
+                    found.append(point)
+            if len(found) >= count:
+                break
+        if len(found) < count:
+            # the budget leaves too few points for a hypercube to hit
+            rest = [p for p in self.candidates() if p not in found]
+            for i in self.rng.permutation(len(rest))[:count - len(found)]:
+                found.append(rest[i])
+        return found[:count]
+
+    def finished(self):
+        return [h for h in self.history if h["objective"] is not None]
+
+    def propose(self, count):
+        """The next batch: the candidate with the highest expected
+        improvement, then again with that point assumed to score its
+        predicted mean, and so on."""
+        # points of an earlier run with other --set values are left out
+        done = [h for h in self.finished() if self._inSpace(self._fromText(h["point"]))]
+        candidates = self.candidates()
+        if len(done) < 2:
+            return candidates[:count] if len(candidates) <= count else \
+                [candidates[i] for i in self.rng.choice(len(candidates), count, replace=False)]
+        x = [encode(self.space, self._fromText(h["point"])) for h in done]
+        # objectives are times and counts, so model their logarithm
+        y = [math.log(max(h["objective"], 1e-30)) for h in done]
+        cx = numpy.array([encode(self.space, p) for p in candidates], dtype=float)
+        chosen = []
+        model = GaussianProcess().fit(x, y)
+        for i in range(min(count, len(candidates))):
+            (mu, sigma) = model.predict(cx)
+            ei = expectedImprovement(mu, sigma, min(y))
+            for j in chosen:
+                ei[j] = -1.0
+            best = int(numpy.argmax(ei))
+            chosen.append(best)
+            x.append(list(cx[best]))
+            y.append(float(mu[best]))
+            model = GaussianProcess(model.fitted).fit(x, y)
+        return [candidates[j] for j in chosen]
+
+    def record(self, job, rc, value):
+        self.history.append({
+            "index" : job.index,
+            "point" : dict((self._keyText(k), v) for (k, v) in job.point.items()),
+            "rc" : rc,
+            "objective" : value,
+            })
+
+    def best(self):
+        done = self.finished()
+        return min(done, key=lambda h: h["objective"]) if done else None
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search .cfg options for the best configuration with a surrogate model")
+    parser.add_argument("driver", help="exercise driver, e.g. ex7/ex7.py")
+    parser.add_argument("-c", "--config", help="base configuration file", required=True)
+    parser.add_argument("-o", "--outdir", help="directory for the runs and history", default="explore")
+    parser.add_argument("--set", dest="sets", action="append", default=[], metavar="SECTION.OPTION=V1,V2,...",
+                        help="values, in order, of one .cfg option; repeat for more options")
+    parser.add_argument("--budget", action="append", default=[], metavar="EXPR",
+                        help='constraint on a point, e.g. "cores * group_count <= 16"')
+    parser.add_argument("--objective", metavar="STATISTIC",
+                        help="minimize the total of this statistic (default: the simulated time)")
+    parser.add_argument("--initial", type=int, default=8, help="Latin hypercube points before the model is used")
+    parser.add_argument("--batch", type=int, default=4, help="points simulated per round")
+    parser.add_argument("--rounds", type=int, default=5, help="rounds after the initial points")
+    parser.add_argument("--seed", type=int, help="random seed")
+    parser.add_argument("-j", "--jobs", type=int, help="simulations to run at once (default: one per core)")
+    parser.add_argument("--mem-per-run", help="memory one simulation needs, e.g. 4GB; limits --jobs to what fits")
+    parser.add_argument("--sst", default="sst", help="sst executable")
+    parser.add_argument("--cache", action="store_true",
+                        help="reuse results of models simulated before (see sstcommon/resultcache.py)")
+    parser.add_argument("--cache-dir", default=DEFAULT_DIR, help="result cache directory (default %(default)s)")
+    parser.add_argument("--cache-budget", default=DEFAULT_BUDGET, help="result cache size limit (default %(default)s)")
+    args = parser.parse_args(argv)
+
+    space = [parseSet(s) for s in args.sets]
+    if not space:
+        parser.error("nothing to explore; give at least one --set")
+    explorer = Explorer(space, args.outdir, args.budget, args.seed)
+    cache = ResultCache(args.cache_dir, args.cache_budget) if args.cache else None
+    workers = workerCount(args.jobs, args.mem_per_run)
+    if explorer.history:
+        sys.stdout.write("continuing from %d points in %s\n"%(len(explorer.history), HISTORY))
+
+    rounds = args.rounds + (1 if len(explorer.history) < args.initial else 0)
+    for i in range(rounds):
+        if len(explorer.history) < args.initial:
+            points = explorer.initial(args.initial - len(explorer.history))
+        else:
+            points = explorer.propose(args.batch)
+        if not points:
+            sys.stdout.write("no points left within the budget\n")
+            break
+        start = max([h["index"] for h in explorer.history] + [-1]) + 1
+        runs = [SweepRun(start + j, p, args.outdir, args.driver, args.config, args.sst, cache=cache)
+                for (j, p) in enumerate(points)]
+        results = runSweep(runs, workers)
+        for job in runs:
+            rc = results.get(job.index, -1)
+            value = None
+            if rc == 0 and os.path.exists(job.statFile):
+                value = objective(job.statFile, args.objective)
+            explorer.record(job, rc, value)
+        explorer.save()
+        best = explorer.best()
+        if best is not None:
+            sys.stdout.write("after %d points best %g at %s (%s)\n"%(
+                len(explorer.history), best["objective"], pointName(best["index"]),
+                ", ".join("%s=%s"%kv for kv in sorted(best["point"].items()))))
+            sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Per-core parameters of the Miranda address generators.
+
+A GeneratorTable holds the parameters of every core of a model at once: the
+ones all cores share, and a column per parameter that differs by core (the
+start offsets of STREAM, the region of GUPS, ...).  It is built once per
+configuration, so the driver building the 10000th core only looks up row
+10000 instead of redoing the arithmetic.
+
+The application section of the .cfg file, named after the generator, gives
+the sizes; for example
+
+    [CPU]
+    application: miranda.GUPSGenerator
+    [miranda.GUPSGenerator]
+    mem_length: 1GiB
+    count: 100000
+
+A generator is supported by adding a function to TABLES that fills in the
+shared parameters and returns the columns, and registering MirandaWorkload
+for it in sstcommon.workloads.
+"""
+from sstcommon.params import FrozenParams, capacityBytes
+from sstcommon.workloads import Workload
+
+
+
+OPERAND_WIDTH = 32
+
+
+class GeneratorTable:
+    def __init__(self, common, columns, cores):
+        self.common = FrozenParams(common)
+        self.columns = columns
+        self.cores = cores
+        for (name, column) in columns.items():
+            if len(column) != cores:
+                raise Exception("Column '%s' has %d rows for %d cores"%(name, len(column), cores))
+
+    def __len__(self):
+        return self.cores
+
+    def row(self, core_id):
+        """The parameters of one core, as a new dict."""
+        params = dict(self.common)
+        for (name, column) in self.columns.items():
+            params[name] = column[core_id]
+        return params
+
+
+
+def _setting(settings, key, default=None):
+    if key not in settings:
+        if default is None:
+            raise Exception("Option '%s' missing from the generator section"%key)
+        return default
+    return settings[key]
+
+
+def _bytes(value):
+    value = str(value).strip()
+    return int(value) if value.isdigit() else capacityBytes(value)
+
+
+def _regions(size, cores, start=0):
+    """[start of each core's share] of size bytes split between cores."""
+    share = size // cores
+    return share, [start + share * core for core in range(cores)]
+
+
+def _stream(settings, cores, common):
+    # a[i] = b[i] + s * c[i]: three arrays one after another, each split
+    # evenly across the cores
+    streamN = int(_setting(settings, 'total_streamn'))
+    array = streamN * OPERAND_WIDTH
+    (share, starts) = _regions(array, cores)
+    common['generatorParams.n'] = streamN // cores
+    common['generatorParams.operandwidth'] = OPERAND_WIDTH
+    return {
+        'generatorParams.start_a' : starts,
+        'generatorParams.start_b' : [start + array for start in starts],
+        'generatorParams.start_c' : [start + 2 * array for start in starts],
+        }
+
+
+def _gups(settings, cores, common):
+    # each core updates its own slice of the table
+    size = _bytes(_setting(settings, 'mem_length'))
+    (share, starts) = _regions(size, cores, _bytes(_setting(settings, 'mem_start', 0)))
+    common['generatorParams.mem_length'] = share
+    for key in ('count', 'iterations', 'length'):
+        if key in settings:
+            common['generatorParams.' + key] = settings[key]
+    return {'generatorParams.mem_start' : starts}
+
+
+def _random(settings, cores, common):
+    # every core draws over the whole range; nothing differs by core
+    common['generatorParams.max_address'] = _bytes(_setting(settings, 'max_address'))
+    for key in ('count', 'length'):
+        if key in settings:
+            common['generatorParams.' + key] = settings[key]
+    return {}
+
+
+def _single(settings, cores, common):
+    # each core makes count sequential requests of length bytes over its own
+    # region; SingleStreamGenerator steps by the request length
+    if 'stride' in settings:
+        raise Exception("miranda.SingleStreamGenerator has no stride; it steps by 'length'")
+    count = int(_setting(settings, 'count'))
+    length = _bytes(_setting(settings, 'length', 8))
+    starts = [length * count * core for core in range(cores)]
+    common['generatorParams.count'] = count
+    common['generatorParams.length'] = length
+    common['generatorParams.max_address'] = length * count * cores
+    return {'generatorParams.startat' : starts}
+
+
+def _stencil(settings, cores, common):
+    # each core updates its own slab of z planes
+    nz = int(_setting(settings, 'nz'))
+    if nz < cores:
+        raise Exception("A %d-plane stencil cannot be split between %d cores"%(nz, cores))
+    (share, starts) = _regions(nz, cores)
+    for key in ('nx', 'ny', 'datawidth', 'iterations'):
+        if key in settings:
+            common['generatorParams.' + key] = settings[key]
+    common['generatorParams.nz'] = nz
+    return {
+        'generatorParams.startz' : starts,
+        # the last core takes the planes left over
+        'generatorParams.endz' : starts[1:] + [nz],
+        }
+
+
+TABLES = {
+    'miranda.STREAMBenchGenerator' : _stream,
+    'miranda.GUPSGenerator' : _gups,
+    'miranda.RandomGenerator' : _random,
+    'miranda.SingleStreamGenerator' : _single,
+    'miranda.Stencil3DBenchGenerator' : _stencil,
+    }
+
+
+def generatorTable(generator, settings, cores, common=None):
+    """The GeneratorTable of cores cores running generator, with settings
+    from its .cfg section and common added to every row."""
+    if generator not in TABLES:
+        raise Exception("Unknown Miranda generator '%s'"%generator)
+    if cores < 1:
+        raise Exception("A generator table needs at least one core, not %d"%cores)
+    shared = dict(common or {})
+    shared['generator'] = generator
+    columns = TABLES[generator](settings, cores, shared)
+    return GeneratorTable(shared, columns, cores)
+
+
+
+class MirandaWorkload(Workload):
+    """A Miranda generator on a miranda.BaseCPU per core."""
+    cpuType = "miranda.BaseCPU"
+
+    def __init__(self, application, settings):
+        Workload.__init__(self, application, settings)
+        self.table = None
+
+    def validate(self):
+        generatorTable(self.application, self.settings, 1)
+
+    def coreConfig(self, config, core_id):
+        if self.table is None or len(self.table) != config.total_cores:
+            common = dict(config.coreCommonParams())
+            common['max_reqs_cycle'] = config.max_reqs_cycle
+            if 'verbose' in common:
+                common['generatorParams.verbose'] = common['verbose']
+            self.table = generatorTable(self.application, self.settings, config.total_cores, common)
+        return self.table.row(core_id)
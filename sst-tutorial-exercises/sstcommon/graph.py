@@ -0,0 +1,347 @@
+"""An in-memory model graph that is built first and handed to sst in one pass.
+
+ModelGraph offers the parts of the sst module the drivers use
+(Component(), Link(), pushNamePrefix(), popNamePrefix()), but only records
+the calls:
+
+    model = ModelGraph()
+    cpu = model.Component("cpu0", "miranda.BaseCPU")
+    cpu.addParams(config.getCoreConfig(0))
+    ...
+    connect("cpu_cache_link_0", cpu, "cache_link", l1, "high_network_0", latency)
+    model.validate()
+    model.emit()
+
+connect() and connectBatch() in sstcommon.links record into the graph when
+they are given its components.  Components and links are kept in integer
+tables (array.array), with type, port and latency strings and parameter
+sets interned, so a model with a million components can be checked,
+transformed or saved (save()/load()) without the simulator.
+
+This module does not import sst; only emit() does.
+"""
+import array
+import json
+import os
+import sys
+
+from sstcommon.params import FrozenParams
+
+try:
+    intern = sys.intern
+except AttributeError:
+    pass
+
+
+
+class StringTable:
+    """Interned strings and their integer codes, in order of first use."""
+    def __init__(self, strings=()):
+        self.strings = []
+        self.codes = {}
+        for s in strings:
+            self.code(s)
+
+    def code(self, s):
+        try:
+            return self.codes[s]
+        except KeyError:
+            s = intern(str(s))
+            self.codes[s] = len(self.strings)
+            self.strings.append(s)
+            return self.codes[s]
+
+    def __getitem__(self, code):
+        return self.strings[code]
+
+    def __len__(self):
+        return len(self.strings)
+
+
+
+class ComponentRef:
+    """Handle for one component of a ModelGraph, standing in for the
+    sst.Component a driver would otherwise hold."""
+    __slots__ = ("model", "index")
+
+    def __init__(self, model, index):
+        self.model = model
+        self.index = index
+
+    def getFullName(self):
+        return self.model.componentNames[self.index]
+
+    def addParams(self, params):
+        self.model._addParams(self.index, params)
+
+    def addParam(self, key, value):
+        self.model._addParams(self.index, {key : value})
+
+    def setRank(self, rank, thread=0):
+        self.model.ranks[self.index] = rank
+        self.model.threads[self.index] = thread
+
+    def enableAllStatistics(self, *args):
+        self.model._addCall(self.index, "enableAllStatistics", args)
+
+    def enableStatistics(self, *args):
+        self.model._addCall(self.index, "enableStatistics", args)
+
+
+
+class LinkRef:
+    """Handle for a link of a ModelGraph before and after connect()."""
+    __slots__ = ("model", "name", "index")
+
+    def __init__(self, model, name):
+        self.model = model
+        self.name = name
+        self.index = None
+
+    def connect(self, end0, end1):
+        (c0, port0, latency0) = end0
+        (c1, port1, latency1) = end1
+        self.index = self.model._addLink(self.name, c0.index, port0, latency0,
+                                         c1.index, port1, latency1)
+
+    def setNoCut(self):
+        if self.index is None:
+            raise Exception("setNoCut() on link '%s' before connect()"%self.name)
+        self.model.linkNoCut[self.index] = 1
+
+
+
+class ModelGraph:
+    """Components and links of a model, recorded for a single emit()."""
+    def __init__(self):
+        self._prefix = []
+
+        self.componentNames = []
+        self.types = StringTable()
+        self.componentType = array.array("i")
+        # Each component's parameters are a stack of interned parameter
+        # sets, applied in order; the stacks are interned as well.
+        self.paramSets = []
+        self._paramSetCodes = {}
+        self._paramSetById = {}
+        self.paramStacks = [()]
+        self._paramStackCodes = {() : 0}
+        self.componentParams = array.array("i")
+        self.ranks = array.array("i")
+        self.threads = array.array("i")
+        self.componentCalls = {}
+
+        self.linkNames = []
+        self.ports = StringTable()
+        self.latencies = StringTable()
+        self.linkSrc = array.array("i")
+        self.linkSrcPort = array.array("i")
+        self.linkSrcLatency = array.array("i")
+        self.linkDst = array.array("i")
+        self.linkDstPort = array.array("i")
+        self.linkDstLatency = array.array("i")
+        self.linkNoCut = array.array("b")
+
+    # sst module interface
+
+    def pushNamePrefix(self, prefix):
+        self._prefix.append(prefix)
+
+    def popNamePrefix(self):
+        self._prefix.pop()
+
+    def _fullName(self, name):
+        if self._prefix:
+            return ".".join(self._prefix + [name])
+        return name
+
+    def Component(self, name, componentType):
+        self.componentNames.append(self._fullName(name))
+        self.componentType.append(self.types.code(componentType))
+        self.componentParams.append(0)
+        self.ranks.append(-1)
+        self.threads.append(0)
+        return ComponentRef(self, len(self.componentNames) - 1)
+
+    def Link(self, name):
+        return LinkRef(self, self._fullName(name))
+
+    # recording
+
+    def _paramSet(self, params):
+        # The parameter sets of SNBConfig are shared FrozenParams, so most
+        # lookups are by identity; the object is kept alongside its code so
+        # the id cannot be reused.
+        if isinstance(params, FrozenParams):
+            entry = self._paramSetById.get(id(params))
+            if entry is not None and entry[0] is params:
+                return entry[1]
+        key = tuple(sorted((str(k), str(v)) for (k, v) in params.items()))
+        code = self._paramSetCodes.get(key)
+        if code is None:
+            code = len(self.paramSets)
+            self._paramSetCodes[key] = code
+            self.paramSets.append(FrozenParams(key))
+        if isinstance(params, FrozenParams):
+            self._paramSetById[id(params)] = (params, code)
+        return code
+
+    def _addParams(self, index, params):
+        stack = self.paramStacks[self.componentParams[index]] + (self._paramSet(params),)
+        code = self._paramStackCodes.get(stack)
+        if code is None:
+            code = len(self.paramStacks)
+            self._paramStackCodes[stack] = code
+            self.paramStacks.append(stack)
+        self.componentParams[index] = code
+
+    def _addCall(self, index, method, args):
+        self.componentCalls.setdefault(index, []).append((method, args))
+
+    def _addLink(self, name, c0, port0, latency0, c1, port1, latency1):
+        self.linkNames.append(name)
+        self.linkSrc.append(c0)
+        self.linkSrcPort.append(self.ports.code(port0))
+        self.linkSrcLatency.append(self.latencies.code(latency0))
+        self.linkDst.append(c1)
+        self.linkDstPort.append(self.ports.code(port1))
+        self.linkDstLatency.append(self.latencies.code(latency1))
+        self.linkNoCut.append(0)
+        return len(self.linkNames) - 1
+
+    # queries
+
+    @property
+    def numComponents(self):
+        return len(self.componentNames)
+
+    @property
+    def numLinks(self):
+        return len(self.linkNames)
+
+    def componentTypeName(self, index):
+        return self.types[self.componentType[index]]
+
+    def params(self, index):
+        """The merged parameters of one component, as a new dict."""
+        merged = {}
+        for code in self.paramStacks[self.componentParams[index]]:
+            merged.update(self.paramSets[code])
+        return merged
+
+    def problems(self):
+        """Everything wrong with the graph that sst would reject or that is
+        almost certainly a driver bug, as a list of messages."""
+        found = []
+        seen = {}
+        for (i, name) in enumerate(self.componentNames):
+            if name in seen:
+                found.append("Component name '%s' is used twice"%name)
+            seen[name] = i
+        seen = set()
+        for name in self.linkNames:
+            if name in seen:
+                found.append("Link name '%s' is used twice"%name)
+            seen.add(name)
+        ends = {}
+        for i in range(self.numLinks):
+            for (c, p) in ((self.linkSrc[i], self.linkSrcPort[i]),
+                           (self.linkDst[i], self.linkDstPort[i])):
+                if (c, p) in ends:
+                    found.append("Port %s of '%s' is connected by both '%s' and '%s'"%(
+                        self.ports[p], self.componentNames[c],
+                        self.linkNames[ends[(c, p)]], self.linkNames[i]))
+                ends[(c, p)] = i
+        return found
+
+    def validate(self):
+        found = self.problems()
+        if found:
+            raise Exception("Invalid model:\n  " + "\n  ".join(found))
+
+    # output
+
+    def emit(self):
+        """Create every component and link with sst, in one pass.  Returns
+        the sst.Component objects, indexed like the graph."""
+        import sst
+        Component = sst.Component
+        Link = sst.Link
+        names = self.componentNames
+        types = self.types.strings
+        paramSets = self.paramSets
+        stacks = self.paramStacks
+
+        made = [None] * self.numComponents
+        for i in range(self.numComponents):
+            comp = Component(names[i], types[self.componentType[i]])
+            for code in stacks[self.componentParams[i]]:
+                comp.addParams(paramSets[code])
+            if self.ranks[i] >= 0:
+                comp.setRank(self.ranks[i], self.threads[i])
+            made[i] = comp
+        for (i, calls) in sorted(self.componentCalls.items()):
+            for (method, args) in calls:
+                getattr(made[i], method)(*args)
+
+        ports = self.ports.strings
+        latencies = self.latencies.strings
+        for i in range(self.numLinks):
+            link = Link(self.linkNames[i])
+            link.connect( (made[self.linkSrc[i]], ports[self.linkSrcPort[i]], latencies[self.linkSrcLatency[i]]),
+                          (made[self.linkDst[i]], ports[self.linkDstPort[i]], latencies[self.linkDstLatency[i]]) )
+            if self.linkNoCut[i]:
+                link.setNoCut()
+        return made
+
+    _TABLES = ("componentType", "componentParams", "ranks", "threads",
+               "linkSrc", "linkSrcPort", "linkSrcLatency",
+               "linkDst", "linkDstPort", "linkDstLatency", "linkNoCut")
+
+    def save(self, directory):
+        """Write the graph to directory: the integer tables as raw arrays,
+        everything else as JSON."""
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        for name in self._TABLES:
+            with open(os.path.join(directory, name + ".bin"), "wb") as f:
+                getattr(self, name).tofile(f)
+        meta = {
+            "componentNames" : self.componentNames,
+            "types" : self.types.strings,
+            "paramSets" : [sorted(p.items()) for p in self.paramSets],
+            "paramStacks" : [list(s) for s in self.paramStacks],
+            "componentCalls" : sorted((i, [(m, list(a)) for (m, a) in calls])
+                                      for (i, calls) in self.componentCalls.items()),
+            "linkNames" : self.linkNames,
+            "ports" : self.ports.strings,
+            "latencies" : self.latencies.strings,
+            "tables" : dict((name, [getattr(self, name).typecode, len(getattr(self, name))])
+                            for name in self._TABLES),
+            }
+        with open(os.path.join(directory, "graph.json"), "w") as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, directory):
+        with open(os.path.join(directory, "graph.json")) as f:
+            meta = json.load(f)
+        model = cls()
+        model.componentNames = [intern(str(n)) for n in meta["componentNames"]]
+        model.types = StringTable(meta["types"])
+        for items in meta["paramSets"]:
+            model._paramSet(dict(items))
+        model.paramStacks = [tuple(s) for s in meta["paramStacks"]]
+        model._paramStackCodes = dict((s, i) for (i, s) in enumerate(model.paramStacks))
+        model.componentCalls = dict((i, [(m, tuple(a)) for (m, a) in calls])
+                                    for (i, calls) in meta["componentCalls"])
+        model.linkNames = [intern(str(n)) for n in meta["linkNames"]]
+        model.ports = StringTable(meta["ports"])
+        model.latencies = StringTable(meta["latencies"])
+        for name in cls._TABLES:
+            (typecode, count) = meta["tables"][name]
+            table = array.array(str(typecode))
+            with open(os.path.join(directory, name + ".bin"), "rb") as f:
+                table.fromfile(f, count)
+            setattr(model, name, table)
+        return model
@@ -0,0 +1,81 @@
+import sys
+
+import sst
+
+try:
+    intern = sys.intern
+except AttributeError:
+    pass
+
+
+
+def _linkFactory(component):
+    # Components of a sstcommon.graph.ModelGraph are linked in the graph.
+    model = getattr(component, "model", None)
+    if model is not None:
+        return model.Link
+    return sst.Link
+
+
+def connect(name, c0, port0, c1, port1, latency):
+    link = _linkFactory(c0)(name)
+    link.connect( (c0, port0, latency), (c1, port1, latency) )
+    return link
+
+
+_names = {}
+
+def linkNames(fmt, count, start=0):
+    """Return the interned names fmt%start .. fmt%(start+count-1).
+
+    The list is cached, so asking again for the same names (for example the
+    per-stop names of a ring that is rebuilt in a sweep) costs nothing.
+    """
+    key = (fmt, count, start)
+    if key not in _names:
+        _names[key] = [intern(fmt%i) for i in range(start, start + count)]
+    return _names[key]
+
+
+_ports = {}
+
+def portName(port):
+    """Map an integer port number to its interned "port<N>" name; strings
+    are returned unchanged."""
+    if isinstance(port, str):
+        return port
+    port = int(port)
+    if port not in _ports:
+        _ports[port] = intern("port%d"%port)
+    return _ports[port]
+
+
+def connectBatch(components, links, names, noCut=False):
+    """Create one sst.Link per entry of links and return them as a list.
+
+    components -- sequence of sst.Component, or of ModelGraph components
+    links      -- sequence of (c0, port0, c1, port1, latency) tuples, where
+                  c0 and c1 index components and ports are names or numbers
+    names      -- a format string such as "rtr_pos_%d", expanded once with
+                  linkNames(), or a sequence of names, one per link
+    noCut      -- mark every link with setNoCut()
+
+    Ports and names are resolved once for the whole batch, so building a ring
+    or torus with many thousands of stops does only the sst.Link calls
+    themselves per link.
+    """
+    if isinstance(names, str):
+        names = linkNames(names, len(links))
+    elif len(names) != len(links):
+        raise Exception("%d link names given for %d links"%(len(names), len(links)))
+
+    Link = _linkFactory(components[0]) if len(components) else sst.Link
+    created = [None] * len(links)
+    for i, (c0, port0, c1, port1, latency) in enumerate(links):
+        link = Link(names[i])
+        link.connect( (components[c0], portName(port0), latency),
+                      (components[c1], portName(port1), latency) )
+        if noCut:
+            link.setNoCut()
+        created[i] = link
+    return created
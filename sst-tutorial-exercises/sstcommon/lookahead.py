@@ -0,0 +1,191 @@
+"""Synchronization lookahead of a partitioned model.
+
+Ranks of a parallel SST run synchronize every L, where L is the smallest
+latency of any link between two ranks: the lookahead.  Every link the drivers
+create through connect() gets ring_latency or the network latency, so one
+short link that happens to be cut sets the sync window for the whole run.
+
+    python -m sstcommon.lookahead -P ex7.part ex7/ex7.py -c ex7/miranda.cfg
+
+reports the lookahead of a partition file, the lookahead between each pair
+of ranks, the cut links that limit it and the cut links by name pattern (so
+"rtr_link_#" points at Network.ring_latency).  With --propose N it searches
+partitions over N ranks: for each link latency in the model it partitions
+again with every shorter link kept inside a rank, and lists the lookahead
+each gives against its balance and cut; -o writes the one with the largest
+lookahead whose balance is within --imbalance.
+"""
+import argparse
+import json
+import re
+import sys
+
+from sstcommon.partition import PartitionGraph, partition, readPartition, writePartition
+
+
+
+def crossLinks(graph, ranks):
+    """[(latency, link index, rank, rank)] of every cut link, shortest first."""
+    cut = []
+    for (i, (a, b, latency, noCut)) in enumerate(graph.links):
+        if ranks[a] != ranks[b]:
+            cut.append((latency, i, min(ranks[a], ranks[b]), max(ranks[a], ranks[b])))
+    cut.sort()
+    return cut
+
+
+def lookahead(graph, ranks):
+    """The sync window in ps, or None if no link is cut."""
+    cut = crossLinks(graph, ranks)
+    return cut[0][0] if cut else None
+
+
+def rankPairs(graph, ranks):
+    """{(rank, rank): (cut links, smallest latency)}"""
+    pairs = {}
+    for (latency, i, r0, r1) in crossLinks(graph, ranks):
+        (count, least) = pairs.get((r0, r1), (0, latency))
+        pairs[(r0, r1)] = (count + 1, min(least, latency))
+    return pairs
+
+
+def linkPattern(name):
+    """A link name with its numbers replaced by '#': "g3.rtr_link_12" -> "g#.rtr_link_#"."""
+    return re.sub(r"[0-9]+", "#", name)
+
+
+def patterns(graph, ranks):
+    """[(smallest latency, pattern, cut links)] over the cut links."""
+    found = {}
+    for (latency, i, r0, r1) in crossLinks(graph, ranks):
+        name = graph.linkNames[i] if graph.linkNames else "link"
+        (count, least) = found.get(linkPattern(name), (0, latency))
+        found[linkPattern(name)] = (count + 1, min(least, latency))
+    return sorted((least, pattern, count) for (pattern, (count, least)) in found.items())
+
+
+def balance(ranks, parts):
+    """Largest rank over the average rank, in components."""
+    sizes = [0] * parts
+    for r in ranks:
+        sizes[r] += 1
+    return max(sizes) * float(parts) / len(ranks) if ranks else 1.0
+
+
+def propose(graph, parts, imbalance=0.1):
+    """Partitions over parts ranks with increasing lookahead, as a list of
+    (lookahead, balance, cut links, ranks).  For each distinct latency L the
+    model is partitioned with no link shorter than L cut."""
+    latencies = sorted(set(latency for (a, b, latency, noCut) in graph.links if not noCut and latency > 0))
+    found = []
+    seen = set()
+    for threshold in latencies:
+        ranks = partition(graph, parts, imbalance, minCutLatency=threshold, strict=False)
+        proposal = (lookahead(graph, ranks), balance(ranks, parts), len(crossLinks(graph, ranks)))
+        if proposal in seen:
+            continue
+        seen.add(proposal)
+        found.append(proposal + (ranks,))
+    return found
+
+
+def best(proposals, imbalance=0.1):
+    """The proposal with the largest lookahead within the imbalance, else the
+    best balanced one; None if there are no proposals.
+
+    A proposal without a cut link (lookahead None) only wins when it still
+    spreads the model over more than one rank: those ranks never need to
+    synchronize.  One that leaves everything on a single rank is not a
+    parallel run and is chosen only if nothing else is within the imbalance.
+    """
+    if not proposals:
+        return None
+    within = [p for p in proposals if p[1] <= 1.0 + imbalance + 1e-9]
+    if not within:
+        return min(proposals, key=lambda p: p[1])
+    uncut = [p for p in within if p[0] is None]
+    independent = [p for p in uncut if len(set(p[3])) > 1]
+    if independent:
+        return min(independent, key=lambda p: p[1])
+    cut = [p for p in within if p[0] is not None]
+    if cut:
+        return max(cut, key=lambda p: (p[0], -p[2]))
+    return uncut[0]
+
+
+
+def _ps(latency):
+    return "none" if latency is None else "%gps"%latency
+
+
+def report(graph, ranks, top=10, out=sys.stdout):
+    parts = max(ranks) + 1 if ranks else 0
+    cut = crossLinks(graph, ranks)
+    out.write("ranks: %d, cut links: %d of %d, balance %.2f\n"%(parts, len(cut), len(graph.links),
+                                                               balance(ranks, parts) if parts else 1.0))
+    out.write("lookahead: %s\n"%_ps(cut[0][0] if cut else None))
+    if not cut:
+        return
+    out.write("\nrank pair     links  lookahead\n")
+    for ((r0, r1), (count, least)) in sorted(rankPairs(graph, ranks).items()):
+        out.write("%4d-%-4d  %8d  %9s\n"%(r0, r1, count, _ps(least)))
+    out.write("\nshortest cut links:\n")
+    for (latency, i, r0, r1) in cut[:top]:
+        name = graph.linkNames[i] if graph.linkNames else "#%d"%i
+        (a, b) = graph.links[i][:2]
+        out.write("  %9s  %s (%s on %d, %s on %d)\n"%(_ps(latency), name, graph.names[a], ranks[a],
+                                                     graph.names[b], ranks[b]))
+    out.write("\ncut links by name:\n")
+    for (least, pattern, count) in patterns(graph, ranks)[:top]:
+        out.write("  %9s  %6d  %s\n"%(_ps(least), count, pattern))
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report and improve the sync lookahead of a partitioned model",
+                                     usage="%(prog)s [options] (model.json | driver.py [driver options])")
+    parser.add_argument("-P", "--partition", help="partition file to analyse")
+    parser.add_argument("--propose", type=int, metavar="N", help="search partitions over N ranks")
+    parser.add_argument("--imbalance", type=float, default=0.1,
+                        help="allowed excess of a rank over the average component count")
+    parser.add_argument("-o", "--output", help="with --propose, write the chosen partition here")
+    parser.add_argument("--top", type=int, default=10, help="links and patterns to list")
+    parser.add_argument("--sst", default="sst", help="sst executable, to build the model of a driver")
+    parser.add_argument("model", help="sst --output-json file, or an exercise driver")
+    (args, modelArgs) = parser.parse_known_args(argv)
+    if not args.partition and not args.propose:
+        parser.error("give a partition file (-P) or a rank count to --propose")
+
+    if args.model.endswith(".json"):
+        with open(args.model) as f:
+            model = json.load(f)
+    else:
+        from sstcommon.resultcache import resolveModel, absoluteConfig
+        model = resolveModel(args.model, absoluteConfig(modelArgs), args.sst)
+    graph = PartitionGraph.fromModelJson(model)
+
+    if args.partition:
+        report(graph, graph.ranksFrom(readPartition(args.partition)), args.top)
+    if args.propose:
+        proposals = propose(graph, args.propose, args.imbalance)
+        chosen = best(proposals, args.imbalance)
+        if chosen is None:
+            # no link can be cut, so the whole model stays on one rank
+            sys.stdout.write("\n%d ranks: nothing to cut (no cuttable link of positive latency)\n"%
+                             args.propose)
+            if args.output:
+                writePartition(args.output, graph.names, [0] * len(graph.names))
+                sys.stdout.write("wrote single-rank partition %s\n"%args.output)
+            return
+        sys.stdout.write("\n%d ranks:\n lookahead  balance  cut links\n"%args.propose)
+        for proposal in proposals:
+            (latency, spread, cut, ranks) = proposal
+            sys.stdout.write("%10s  %7.2f  %9d%s\n"%(_ps(latency), spread, cut,
+                                                    "  <-" if proposal is chosen else ""))
+        if args.output:
+            writePartition(args.output, graph.names, chosen[3])
+            sys.stdout.write("wrote %s\n"%args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# Read-only parameter sets and helpers for the capacity strings used in .cfg
+# files.
+
+
+
+class FrozenParams(dict):
+    """A read-only dict.
+
+    sst.Component.addParams() copies the values it is given, so one instance
+    can be handed to every component of a kind instead of building a fresh
+    dict per core.  Use dict(params) to get a mutable copy.
+    """
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("FrozenParams objects are read-only; copy with dict() first")
+
+    __setitem__ = _readonly
+    __delitem__ = _readonly
+    __ior__ = _readonly
+    clear = _readonly
+    pop = _readonly
+    popitem = _readonly
+    setdefault = _readonly
+    update = _readonly
+
+    def copy(self):
+        return dict(self)
+
+    def __reduce__(self):
+        return (FrozenParams, (dict(self),))
+
+    def __repr__(self):
+        return "FrozenParams(%s)"%dict.__repr__(self)
+
+
+def parseCapacity(capacity):
+    """Split a capacity string such as "16384MiB" into (16384, "MiB")."""
+    digits = "".join(c for c in capacity if c.isdigit())
+    unit = "".join(c for c in capacity if c.isalpha())
+    return (int(digits), unit)
+
+
+_UNIT_BYTES = {
+    "B"   : 1,
+    "KB"  : 1000,
+    "KiB" : 1024,
+    "MB"  : 1000 ** 2,
+    "MiB" : 1024 ** 2,
+    "GB"  : 1000 ** 3,
+    "GiB" : 1024 ** 3,
+}
+
+
+def capacityBytes(capacity):
+    """Convert a capacity string such as "16384MiB" to a number of bytes."""
+    value, unit = parseCapacity(capacity)
+    if unit not in _UNIT_BYTES:
+        raise Exception("Unknown capacity unit '%s' in '%s'"%(unit, capacity))
+    return value * _UNIT_BYTES[unit]
+
+
+_UNIT_PS = {
+    "ps" : 1,
+    "ns" : 1000,
+    "us" : 1000 ** 2,
+    "ms" : 1000 ** 3,
+    "s"  : 1000 ** 4,
+}
+
+
+def latencyPs(latency):
+    """Convert a latency string such as "300ps" or "1.5ns" to picoseconds."""
+    number = "".join(c for c in latency if c.isdigit() or c == ".")
+    unit = "".join(c for c in latency if c.isalpha())
+    if unit not in _UNIT_PS or not number:
+        raise Exception("Unknown latency '%s'"%latency)
+    return float(number) * _UNIT_PS[unit]
+
+
+_UNIT_HZ = {
+    "Hz"  : 1,
+    "KHz" : 1000,
+    "kHz" : 1000,
+    "MHz" : 1000 ** 2,
+    "GHz" : 1000 ** 3,
+}
+
+
+def frequencyHz(frequency):
+    """Convert a clock string such as "2660MHz" or "2.4GHz" to Hz."""
+    number = "".join(c for c in frequency if c.isdigit() or c == ".")
+    unit = "".join(c for c in frequency if c.isalpha())
+    if unit not in _UNIT_HZ or not number:
+        raise Exception("Unknown frequency '%s'"%frequency)
+    return float(number) * _UNIT_HZ[unit]
+
+
+def bandwidthBytes(bandwidth):
+    """Convert a bandwidth string such as "96GB/s" to bytes per second."""
+    if not bandwidth.endswith("/s"):
+        raise Exception("Unknown bandwidth '%s'"%bandwidth)
+    return capacityBytes(bandwidth[:-2])
@@ -0,0 +1,397 @@
+"""Split a model over MPI ranks, keeping tightly coupled components together.
+
+The partitioner works on units rather than single components:
+ * components joined by a setNoCut() link (or a zero-latency link) are one
+   unit,
+ * components under the same group name prefix ("g3." in ex7 and ex8,
+   "group3." in ex9) are one unit, and
+ * a component outside any group (a ring or mesh router) that is linked to
+   exactly one group joins it, so each group's router stays with its cores,
+   L3 slices and memory controllers.
+
+Units are grown into parts of about equal component count, then boundary
+units are moved between parts while that lowers the cut, and units are moved
+off any part still over the --imbalance limit.  If indivisible units make
+the limit unreachable the partitioner says so, with the imbalance the best
+split it found would need.  A link counts
+1/latency towards the cut, so short links, which shrink the synchronization
+window most, are the last to be cut.
+
+    python -m sstcommon.partition ex7/ex7.py -c ex7/miranda.cfg -n 4 -o ex7.part
+    mpirun -np 4 sst --partitioner=sst.self ex7/ex7.py -c ex7/miranda.cfg -P ex7.part
+
+The input is either a driver and its options (the model is built with
+sst --run-mode=init) or a model written by sst --output-json.
+"""
+import argparse
+import heapq
+import json
+import re
+import sys
+
+from sstcommon.params import latencyPs
+
+
+
+class PartitionGraph:
+    """Component names and links (a, b, latency in ps, noCut) to partition."""
+    def __init__(self, names, links, linkNames=None):
+        self.names = list(names)
+        self.index = dict((n, i) for (i, n) in enumerate(self.names))
+        self.links = links
+        self.linkNames = linkNames
+
+    @classmethod
+    def fromModelGraph(cls, model):
+        latencies = [latencyPs(l) for l in model.latencies.strings]
+        links = []
+        for i in range(model.numLinks):
+            latency = min(latencies[model.linkSrcLatency[i]], latencies[model.linkDstLatency[i]])
+            links.append((model.linkSrc[i], model.linkDst[i], latency, bool(model.linkNoCut[i])))
+        return cls(model.componentNames, links, model.linkNames)
+
+    @classmethod
+    def fromModelJson(cls, model):
+        """From the dict of an sst --output-json file."""
+        names = [c["name"] for c in model["components"]]
+        index = dict((n, i) for (i, n) in enumerate(names))
+        links = []
+        for link in model["links"]:
+            links.append((index[link["left"]], index[link["right"]],
+                          latencyPs(link["latency"]), bool(link.get("noCut", False))))
+        return cls(names, links, [link["name"] for link in model["links"]])
+
+    def ranksFrom(self, placement):
+        """Rank of every component from a readPartition() dict."""
+        missing = [n for n in self.names if n not in placement]
+        if missing:
+            raise Exception("No rank for component '%s' (and %d more)"%(missing[0], len(missing) - 1))
+        return [placement[n][0] for n in self.names]
+
+
+
+_ROUTER_SUFFIX = re.compile(r"[0-9]+(x[0-9]+)*$")
+
+
+def groupName(name):
+    """The group prefix of a component name, or None.  "g3.cpu0" is in
+    group "g3"; "rtr.3" is ring router number 3 and "rtr.0x1" the mesh
+    router at (0, 1), neither is a group.
+
+    >>> [groupName(n) for n in ("g3.cpu0", "group1.l3cache", "rtr.3", "rtr.0x1", "rtr.12x3x4", "cpu")]
+    ['g3', 'group1', None, None, None, None]
+    """
+    if "." not in name:
+        return None
+    (prefix, rest) = name.split(".", 1)
+    if _ROUTER_SUFFIX.match(rest):
+        return None
+    return prefix
+
+
+class _UnionFind:
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, i):
+        root = i
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[i] != root:
+            (self.parent[i], i) = (root, self.parent[i])
+        return root
+
+    def union(self, a, b):
+        (a, b) = (self.find(a), self.find(b))
+        if a != b:
+            self.parent[max(a, b)] = min(a, b)
+
+
+def units(graph, groupOf=groupName, minCutLatency=0):
+    """The unit of every component, as a list of unit numbers 0..U-1.
+    Links shorter than minCutLatency (ps) are kept inside a unit."""
+    n = len(graph.names)
+    uf = _UnionFind(n)
+    groups = {}
+    for (i, name) in enumerate(graph.names):
+        group = groupOf(name)
+        if group is not None:
+            if group in groups:
+                uf.union(i, groups[group])
+            else:
+                groups[group] = i
+    for (a, b, latency, noCut) in graph.links:
+        if noCut or latency <= 0 or latency < minCutLatency:
+            uf.union(a, b)
+
+    # components outside any group that talk to exactly one group join it
+    grouped = set(uf.find(i) for i in groups.values())
+    neighbours = {}
+    for (a, b, latency, noCut) in graph.links:
+        for (x, y) in ((a, b), (b, a)):
+            if uf.find(x) not in grouped:
+                neighbours.setdefault(x, set())
+                if uf.find(y) in grouped:
+                    neighbours[x].add(uf.find(y))
+    for (x, found) in neighbours.items():
+        if len(found) == 1:
+            uf.union(x, found.pop())
+
+    roots = {}
+    return [roots.setdefault(uf.find(i), len(roots)) for i in range(n)]
+
+
+def _unitGraph(graph, unitOf):
+    count = max(unitOf) + 1 if unitOf else 0
+    weight = [0] * count
+    for u in unitOf:
+        weight[u] += 1
+    adjacency = [dict() for i in range(count)]
+    for (a, b, latency, noCut) in graph.links:
+        (ua, ub) = (unitOf[a], unitOf[b])
+        if ua != ub:
+            w = 1.0 / latency
+            adjacency[ua][ub] = adjacency[ua].get(ub, 0.0) + w
+            adjacency[ub][ua] = adjacency[ub].get(ua, 0.0) + w
+    return weight, adjacency
+
+
+def _grow(weight, adjacency, parts):
+    """Initial parts: grow each from a seed next to the previous part,
+    always taking the unit most strongly linked to the part so far."""
+    count = len(weight)
+    target = float(sum(weight)) / parts
+    partOf = [-1] * count
+    order = sorted(range(count), key=lambda u: -weight[u])
+    last = None
+    for p in range(parts):
+        seed = None
+        if last is not None:
+            for u in sorted(last, key=lambda u: -sum(adjacency[u].values())):
+                free = [v for v in adjacency[u] if partOf[v] < 0]
+                if free:
+                    seed = max(free, key=lambda v: adjacency[u][v])
+                    break
+        if seed is None:
+            free = [u for u in order if partOf[u] < 0]
+            if not free:
+                break
+            seed = free[0]
+        size = 0
+        members = []
+        heap = [(0.0, seed)]
+        gain = {}
+        while heap and (size < target or p == parts - 1):
+            (negGain, u) = heapq.heappop(heap)
+            if partOf[u] >= 0 or -negGain < gain.get(u, 0.0):
+                continue
+            if size and size + weight[u] > target * 1.05 and p < parts - 1:
+                continue
+            partOf[u] = p
+            members.append(u)
+            size += weight[u]
+            for (v, w) in adjacency[u].items():
+                if partOf[v] < 0:
+                    gain[v] = gain.get(v, 0.0) + w
+                    heapq.heappush(heap, (-gain[v], v))
+        last = members
+    # whatever was not reached (disconnected units) goes to the lightest part
+    sizes = [0] * parts
+    for u in range(count):
+        if partOf[u] >= 0:
+            sizes[partOf[u]] += weight[u]
+    for u in order:
+        if partOf[u] < 0:
+            p = sizes.index(min(sizes))
+            partOf[u] = p
+            sizes[p] += weight[u]
+    return partOf
+
+
+def _refine(weight, adjacency, partOf, parts, imbalance, passes=8):
+    """Move boundary units to the neighbouring part they are most strongly
+    linked to, while that lowers the cut and keeps parts within balance."""
+    limit = float(sum(weight)) / parts * (1.0 + imbalance)
+    sizes = [0] * parts
+    for (u, p) in enumerate(partOf):
+        sizes[p] += weight[u]
+    for i in range(passes):
+        moved = 0
+        for u in range(len(weight)):
+            here = partOf[u]
+            links = {}
+            for (v, w) in adjacency[u].items():
+                links[partOf[v]] = links.get(partOf[v], 0.0) + w
+            best = here
+            bestGain = 0.0
+            for (p, w) in links.items():
+                if p == here or sizes[p] + weight[u] > limit:
+                    continue
+                gain = w - links.get(here, 0.0)
+                if gain > bestGain:
+                    (best, bestGain) = (p, gain)
+            if best != here:
+                partOf[u] = best
+                sizes[here] -= weight[u]
+                sizes[best] += weight[u]
+                moved += 1
+        if not moved:
+            break
+    return partOf
+
+
+def _rebalance(weight, adjacency, partOf, parts, limit):
+    """Move units off the heaviest part while it is over limit, each time
+    the unit and destination that cut the fewest links and leave the
+    destination lighter than the heaviest part was.  Units are indivisible,
+    so the limit cannot always be met; this stops when no move helps."""
+    sizes = [0] * parts
+    for (u, p) in enumerate(partOf):
+        sizes[p] += weight[u]
+    while True:
+        heavy = sizes.index(max(sizes))
+        if sizes[heavy] <= limit:
+            break
+        best = None
+        for u in range(len(weight)):
+            if partOf[u] != heavy:
+                continue
+            links = {}
+            for (v, w) in adjacency[u].items():
+                links[partOf[v]] = links.get(partOf[v], 0.0) + w
+            for p in range(parts):
+                if p == heavy or sizes[p] + weight[u] >= sizes[heavy]:
+                    continue
+                # moves that fit within limit first, then the least cut
+                key = (sizes[p] + weight[u] <= limit, links.get(p, 0.0) - links.get(heavy, 0.0), -weight[u])
+                if best is None or key > best[0]:
+                    best = (key, u, p)
+        if best is None:
+            break
+        (key, u, p) = best
+        partOf[u] = p
+        sizes[heavy] -= weight[u]
+        sizes[p] += weight[u]
+    return partOf
+
+
+def partition(graph, parts, imbalance=0.1, groupOf=groupName, minCutLatency=0, strict=True):
+    """Rank of every component of graph, as a list.  No link shorter than
+    minCutLatency (ps) is cut.  With strict, raise if the units cannot be
+    spread so that no rank has more than 1+imbalance times the average
+    component count; otherwise return the best balance found."""
+    if parts < 1:
+        raise Exception("Cannot partition into %d parts"%parts)
+    unitOf = units(graph, groupOf, minCutLatency)
+    if parts == 1 or not unitOf:
+        return [0] * len(graph.names)
+    (weight, adjacency) = _unitGraph(graph, unitOf)
+    partOf = _grow(weight, adjacency, parts)
+    partOf = _refine(weight, adjacency, partOf, parts, imbalance)
+    limit = float(sum(weight)) / parts * (1.0 + imbalance)
+    partOf = _rebalance(weight, adjacency, partOf, parts, limit)
+    if strict:
+        sizes = [0] * parts
+        for (u, p) in enumerate(partOf):
+            sizes[p] += weight[u]
+        if max(sizes) > limit:
+            raise Exception("Cannot split %d components in %d indivisible units (the largest has %d) over %d ranks "
+                            "within an imbalance of %g: the best found has %s components per rank, "
+                            "which needs --imbalance %.2f"%(
+                                sum(weight), len(weight), max(weight), parts, imbalance,
+                                " ".join(str(x) for x in sizes),
+                                max(sizes) * parts / float(sum(weight)) - 1.0 + 0.005))
+    return [partOf[u] for u in unitOf]
+
+
+def cutSummary(graph, ranks):
+    """(components per rank, cut links, smallest cut latency in ps)."""
+    sizes = {}
+    for r in ranks:
+        sizes[r] = sizes.get(r, 0) + 1
+    cut = [(a, b, latency) for (a, b, latency, noCut) in graph.links if ranks[a] != ranks[b]]
+    minLatency = min(latency for (a, b, latency) in cut) if cut else None
+    return ([sizes.get(r, 0) for r in range(max(ranks) + 1)] if ranks else [], len(cut), minLatency)
+
+
+
+def writePartition(path, names, ranks, threads=None):
+    """One line per component: rank, thread and name."""
+    with open(path, "w") as f:
+        f.write("# rank thread component\n")
+        for (i, name) in enumerate(names):
+            f.write("%d %d %s\n"%(ranks[i], threads[i] if threads else 0, name))
+
+
+def readPartition(path):
+    """{component name: (rank, thread)} from a partition file."""
+    placement = {}
+    with open(path) as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line or line.startswith("#"):
+                continue
+            (rank, thread, name) = line.split(" ", 2)
+            placement[name] = (int(rank), int(thread))
+    return placement
+
+
+def applyPartition(path, model=None):
+    """Place components on the ranks given in a partition file.
+
+    With a ModelGraph the ranks are recorded for emit(); otherwise the
+    components already created with sst are looked up by name.  Either way
+    run sst with --partitioner=sst.self.
+    """
+    placement = readPartition(path)
+    if model is not None:
+        for (i, name) in enumerate(model.componentNames):
+            if name in placement:
+                (model.ranks[i], model.threads[i]) = placement[name]
+        return
+    import sst
+    if not hasattr(sst, "findComponentByName"):
+        raise Exception("This version of sst cannot look up components by name; partition files need a ModelGraph driver")
+    for (name, (rank, thread)) in placement.items():
+        comp = sst.findComponentByName(name)
+        if comp is None:
+            raise Exception("Partition file '%s' names unknown component '%s'"%(path, name))
+        comp.setRank(rank, thread)
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Partition an SST model over MPI ranks",
+                                     usage="%(prog)s [options] (model.json | driver.py [driver options])")
+    parser.add_argument("-n", "--ranks", type=int, required=True, help="number of ranks")
+    parser.add_argument("-o", "--output", default="model.part", help="partition file to write")
+    parser.add_argument("--imbalance", type=float, default=0.1,
+                        help="allowed excess of a rank over the average component count")
+    parser.add_argument("--sst", default="sst", help="sst executable, to build the model of a driver")
+    parser.add_argument("model", help="sst --output-json file, or an exercise driver")
+    (args, modelArgs) = parser.parse_known_args(argv)
+
+    if args.model.endswith(".json"):
+        with open(args.model) as f:
+            model = json.load(f)
+    else:
+        from sstcommon.resultcache import resolveModel, absoluteConfig
+        model = resolveModel(args.model, absoluteConfig(modelArgs), args.sst)
+    graph = PartitionGraph.fromModelJson(model)
+    ranks = partition(graph, args.ranks, args.imbalance)
+    writePartition(args.output, graph.names, ranks)
+
+    (sizes, cut, minLatency) = cutSummary(graph, ranks)
+    sys.stdout.write("components per rank: %s\n"%" ".join(str(s) for s in sizes))
+    used = len(set(ranks))
+    if used < args.ranks:
+        sys.stderr.write("warning: only %d of %d ranks have components; the model does not split "
+                         "into more units\n"%(used, args.ranks))
+    sys.stdout.write("cut links: %d of %d"%(cut, len(graph.links)))
+    if minLatency is not None:
+        sys.stdout.write(", smallest cut latency %gps"%minLatency)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
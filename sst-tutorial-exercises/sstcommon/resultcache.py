@@ -0,0 +1,324 @@
+"""A local cache of stats.csv results, keyed on the model that was simulated.
+
+The key is a SHA-256 over:
+ * the model as the driver builds it: every component with its type and
+   resolved parameters, and every link, as written by
+   sst --run-mode=init --output-json (so it covers whatever SNBConfig or
+   ChipConfig resolved, not the text of the .cfg file)
+ * the driver's other arguments (statistics level and profile, ...)
+ * the output of sst --version
+ * the size and mtime of the element library (lib<name>.so) behind each
+   component type in the model, found on SST_LIB_PATH and the *_LIBDIR
+   directories of sstsimulator.conf, or the output of sst-info <name> for
+   a library not found there, so rebuilding an element invalidates its
+   results
+
+Entries live in <cache dir>/<key[:2]>/<key>/ and the least recently used
+ones are removed once the cache grows past its size budget.
+
+    python -m sstcommon.resultcache ex7/ex7.py -c ex7/miranda.cfg -s stats.csv
+
+runs the simulation only if the cache has no result for it.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from sstcommon.params import capacityBytes
+
+
+
+DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "sst-results")
+DEFAULT_BUDGET = "10GB"
+RESULT_FILE = "stats.csv"
+
+
+def canonicalModel(model):
+    """The parts of an --output-json model that define the simulation, in a
+    stable order."""
+    components = []
+    for comp in model.get("components", []):
+        components.append({
+            "name" : comp.get("name"),
+            "type" : comp.get("type"),
+            "params" : dict((k, str(v)) for (k, v) in comp.get("params", {}).items()),
+            "statistics" : comp.get("statistics", []),
+            })
+    components.sort(key=lambda c: c["name"])
+    links = sorted(model.get("links", []), key=lambda l: l.get("name"))
+    return {"components" : components, "links" : links}
+
+
+_versions = {}
+
+def sstVersion(sst="sst"):
+    if sst not in _versions:
+        try:
+            _versions[sst] = subprocess.check_output([sst, "--version"],
+                                                     stderr=subprocess.STDOUT).decode("utf-8", "replace").strip()
+        except (OSError, subprocess.CalledProcessError):
+            _versions[sst] = "unknown"
+    return _versions[sst]
+
+
+def _sstTool(sst, tool):
+    # sst-config and sst-info are installed next to sst
+    return os.path.join(os.path.dirname(sst), tool) if os.path.dirname(sst) else tool
+
+
+def _output(command):
+    try:
+        return subprocess.check_output(command, stderr=subprocess.STDOUT).decode("utf-8", "replace").strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def elementLibraries(model):
+    """The element libraries the component types of a model come from
+    (sst's own statistics are covered by its version)."""
+    found = set()
+    pending = list(model.get("components", []))
+    while pending:
+        comp = pending.pop()
+        if "." in (comp.get("type") or ""):
+            found.add(comp["type"].split(".", 1)[0])
+        pending.extend(comp.get("subcomponents", []))
+    found.discard("sst")
+    return sorted(found)
+
+
+def librarySearchPath(sst="sst"):
+    """The directories sst loads element libraries from: SST_LIB_PATH, then
+    every *_LIBDIR in the system and user sstsimulator.conf (sst-register
+    adds these)."""
+    dirs = [d for d in os.environ.get("SST_LIB_PATH", "").split(":") if d]
+    confs = [os.path.join(os.path.expanduser("~"), ".sst", "sstsimulator.conf")]
+    prefix = _output([_sstTool(sst, "sst-config"), "--prefix"])
+    if prefix:
+        confs.insert(0, os.path.join(prefix, "etc", "sst", "sstsimulator.conf"))
+    for conf in confs:
+        if not os.path.exists(conf):
+            continue
+        with open(conf) as f:
+            for line in f:
+                if "=" not in line:
+                    continue
+                key, value = line.split("=", 1)
+                if key.strip().endswith("_LIBDIR") and value.strip() not in dirs:
+                    dirs.append(value.strip())
+    return dirs
+
+
+_libraries = {}
+
+def libraryIdentity(library, sst="sst"):
+    """What identifies the build of an element library: the path, size and
+    mtime of its shared object, or the output of sst-info for it."""
+    if (sst, library) not in _libraries:
+        found = None
+        for directory in librarySearchPath(sst):
+            for suffix in (".so", ".dylib"):
+                path = os.path.join(directory, "lib%s%s"%(library, suffix))
+                if os.path.exists(path):
+                    found = {"path" : path, "size" : os.path.getsize(path), "mtime" : os.path.getmtime(path)}
+                    break
+            if found is not None:
+                break
+        if found is None:
+            found = {"info" : _output([_sstTool(sst, "sst-info"), library]) or "unknown"}
+        _libraries[(sst, library)] = found
+    return _libraries[(sst, library)]
+
+
+def withoutOptions(modelArgs, flags):
+    """modelArgs without each of flags and the value following it."""
+    args = list(modelArgs)
+    for flag in flags:
+        while flag in args:
+            i = args.index(flag)
+            del args[i:i + 2]
+    return args
+
+
+def _hashedArgs(modelArgs):
+    # Where the .cfg file lives and where stats go do not change the
+    # result; the .cfg contents are covered by the model itself.
+    return withoutOptions(modelArgs, ("-s", "--statfile", "-c", "--config"))
+
+
+def absoluteConfig(modelArgs):
+    """modelArgs with the -c/--config path made absolute, since drivers run
+    in their own directory."""
+    args = list(modelArgs)
+    for flag in ("-c", "--config"):
+        if flag in args:
+            i = args.index(flag) + 1
+            args[i] = os.path.abspath(args[i])
+    return args
+
+
+def resolveModel(driver, modelArgs, sst="sst", sstArgs=()):
+    """Build the model with sst --run-mode=init and return it as a dict."""
+    fd, path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        command = ([sst, "--run-mode=init", "--output-json=%s"%path] + list(sstArgs)
+                   + [os.path.abspath(driver)] + list(modelArgs))
+        with open(os.devnull, "w") as devnull:
+            rc = subprocess.call(command, cwd=os.path.dirname(os.path.abspath(driver)),
+                                 stdout=devnull, stderr=subprocess.STDOUT)
+        if rc != 0:
+            raise Exception("Building the model failed (%d): %s"%(rc, " ".join(command)))
+        with open(path) as f:
+            return json.load(f)
+    finally:
+        os.remove(path)
+
+
+def cacheKey(driver, modelArgs, sst="sst", sstArgs=()):
+    """The cache key of running driver with modelArgs."""
+    model = resolveModel(driver, modelArgs, sst, sstArgs)
+    key = {
+        "model" : canonicalModel(model),
+        "args" : _hashedArgs(modelArgs),
+        "sstArgs" : list(sstArgs),
+        "version" : sstVersion(sst),
+        "elements" : dict((library, libraryIdentity(library, sst)) for library in elementLibraries(model)),
+        }
+    text = json.dumps(key, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+
+class ResultCache:
+    """Content-addressed store of stats.csv files with an LRU size budget."""
+    def __init__(self, directory=DEFAULT_DIR, budget=DEFAULT_BUDGET):
+        self.directory = directory
+        self.budget = capacityBytes(budget) if budget else None
+
+    def _entry(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key, statFile):
+        """Copy the cached result for key to statFile; False on a miss."""
+        entry = self._entry(key)
+        result = os.path.join(entry, RESULT_FILE)
+        if not os.path.exists(result):
+            return False
+        shutil.copyfile(result, statFile)
+        # the meta file's mtime records the last use, for eviction
+        os.utime(os.path.join(entry, "meta.json"), None)
+        return True
+
+    def put(self, key, statFile, **meta):
+        """Store statFile under key, then evict down to the budget."""
+        entry = self._entry(key)
+        parent = os.path.dirname(entry)
+        if not os.path.isdir(parent):
+            try:
+                os.makedirs(parent)
+            except OSError:
+                pass
+        # build the entry next to its final place and rename it in, so a
+        # reader never sees half an entry
+        tmp = tempfile.mkdtemp(prefix=key + ".", dir=parent)
+        shutil.copyfile(statFile, os.path.join(tmp, RESULT_FILE))
+        meta = dict(meta)
+        meta["key"] = key
+        meta["stored"] = time.time()
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=1, sort_keys=True)
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            # stored meanwhile by another run of the same model
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def entries(self):
+        """[(last use, bytes, path)] of every entry."""
+        found = []
+        if not os.path.isdir(self.directory):
+            return found
+        for prefix in os.listdir(self.directory):
+            top = os.path.join(self.directory, prefix)
+            if not os.path.isdir(top):
+                continue
+            for key in os.listdir(top):
+                entry = os.path.join(top, key)
+                metaFile = os.path.join(entry, "meta.json")
+                if not os.path.exists(metaFile):
+                    continue
+                size = sum(os.path.getsize(os.path.join(entry, f)) for f in os.listdir(entry))
+                found.append((os.path.getmtime(metaFile), size, entry))
+        return found
+
+    def evict(self):
+        """Remove the least recently used entries until the budget is met."""
+        if self.budget is None:
+            return
+        entries = sorted(self.entries())
+        total = sum(size for (used, size, entry) in entries)
+        for (used, size, entry) in entries:
+            if total <= self.budget:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            try:
+                os.rmdir(os.path.dirname(entry))
+            except OSError:
+                pass
+            total -= size
+
+
+
+def runCached(cache, command, driver, modelArgs, statFile, sst="sst", sstArgs=(), log=None):
+    """Run command (which writes statFile) unless cache already holds the
+    result.  Returns (return code, True if the result came from the cache)."""
+    key = cacheKey(driver, modelArgs, sst, sstArgs)
+    if cache.get(key, statFile):
+        return (0, True)
+    if log is None:
+        rc = subprocess.call(command, cwd=os.path.dirname(os.path.abspath(driver)))
+    else:
+        rc = subprocess.call(command, cwd=os.path.dirname(os.path.abspath(driver)),
+                             stdout=log, stderr=subprocess.STDOUT)
+    if rc == 0 and os.path.exists(statFile):
+        cache.put(key, statFile, driver=os.path.abspath(driver), args=list(modelArgs))
+    return (rc, False)
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run an exercise driver unless its result is cached",
+                                     usage="%(prog)s [options] driver.py -c CONFIG [-s STATFILE] [driver options]")
+    parser.add_argument("--cache-dir", default=DEFAULT_DIR, help="cache directory (default %(default)s)")
+    parser.add_argument("--cache-budget", default=DEFAULT_BUDGET, help="cache size limit (default %(default)s)")
+    parser.add_argument("--sst", default="sst", help="sst executable")
+    parser.add_argument("driver", help="exercise driver, e.g. ex7/ex7.py")
+    args, modelArgs = parser.parse_known_args(argv)
+
+    # the driver runs in its own directory, so pass it absolute paths
+    statFile = "./stats.csv"
+    for flag in ("-s", "--statfile"):
+        if flag in modelArgs:
+            statFile = modelArgs[modelArgs.index(flag) + 1]
+    statFile = os.path.abspath(statFile)
+    modelArgs = absoluteConfig(modelArgs)
+    modelArgs = withoutOptions(modelArgs, ("-s", "--statfile")) + ["-s", statFile]
+
+    cache = ResultCache(args.cache_dir, args.cache_budget)
+    command = [args.sst, os.path.abspath(args.driver)] + modelArgs
+    rc, cached = runCached(cache, command, args.driver, modelArgs, statFile, args.sst)
+    if cached:
+        sys.stdout.write("%s: result taken from the cache\n"%statFile)
+    sys.exit(rc)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""Stop a long simulation once a statistic has converged.
+
+Run a driver with --sample INTERVAL and every statistic is written and reset
+each INTERVAL of simulated time, so stats.csv holds one sample of each
+statistic per interval; --warmup TIME leaves the cold start out of them.
+
+    python -m sstcommon.sampling ex7/ex7.py -c ex7/miranda.cfg -o run7 \\
+        --statistic CacheMisses --sample 10us --warmup 50us --tolerance 0.05
+
+runs the driver under sst, follows run7/stats.csv as it is written and
+takes the total of --statistic over all components in each interval as one
+sample.  Once there are --min-samples samples and the 95% confidence interval
+of their mean is within --tolerance of the mean, sst is stopped (SIGTERM,
+then SIGKILL after --grace seconds) and run7/sampling.json gets the mean,
+the interval, the samples and the simulated time reached.  A run that ends
+on its own before converging is reported as not converged, and so is one
+whose samples only ever grow: that is a running total, not a sample per
+interval.
+
+The samples of one run are not independent, so the interval is only as good
+as the sampling interval is long compared to the program's phases.
+
+With --checkpoint, sst (14 or later) also checkpoints under run7/checkpoint.
+sst only checkpoints periodically, so the period is the warm-up: the first
+checkpoint is the warmed-up state and one more is written every further
+warm-up of simulated time until the run stops.  --restore CHECKPOINT
+continues from the first one instead of building and warming the model
+again; the later ones can be deleted.
+"""
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+
+from sstcommon import stats
+from sstcommon.resultcache import absoluteConfig, withoutOptions
+
+
+
+# two-sided 95% Student t quantiles by degrees of freedom; 1.96 beyond
+_T95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+        2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+        2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+RESULT_FILE = "sampling.json"
+
+
+def tQuantile(degrees):
+    if degrees < 1:
+        return float("inf")
+    return _T95[degrees - 1] if degrees <= len(_T95) else 1.96
+
+
+def confidence(samples):
+    """(mean, half width of the 95% confidence interval of the mean)"""
+    n = len(samples)
+    if n == 0:
+        return (0.0, float("inf"))
+    mean = sum(samples) / float(n)
+    if n < 2:
+        return (mean, float("inf"))
+    variance = sum((x - mean) ** 2 for x in samples) / (n - 1)
+    return (mean, tQuantile(n - 1) * math.sqrt(variance / n))
+
+
+def cumulative(samples):
+    """True when every sample is larger than the one before: the statistic
+    was not reset between dumps and the samples are a running total."""
+    return len(samples) >= 2 and all(b > a for (a, b) in zip(samples, samples[1:]))
+
+
+def converged(samples, tolerance, minSamples):
+    if len(samples) < max(2, minSamples):
+        return False
+    if cumulative(samples):
+        return False
+    (mean, half) = confidence(samples)
+    return half <= tolerance * abs(mean)
+
+
+
+class StatTail:
+    """Reads the rows sst appends to a stats.csv and folds them into one
+    sample per SimTime: the total Sum of one statistic over all components."""
+    def __init__(self, path, statistic, separator=stats.SEPARATOR):
+        self.path = path
+        self.statistic = statistic
+        self.separator = separator
+        self._offset = 0
+        self._partial = ""
+        self._index = None
+        self._time = None
+        self._value = 0.0
+
+    def _rows(self):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path) as f:
+            f.seek(self._offset)
+            text = f.read()
+            self._offset = f.tell()
+        lines = (self._partial + text).split("\n")
+        # the last line may still be being written
+        self._partial = lines.pop()
+        return lines
+
+    def poll(self):
+        """[(simtime, value)] of the samples completed since the last call.
+        A sample is complete once a row of a later SimTime appears."""
+        found = []
+        for line in self._rows():
+            fields = line.split(self.separator)
+            if len(fields) < 2:
+                continue
+            if self._index is None:
+                self._index = stats._headerIndex(fields)
+                if self._index["simtime"] is None:
+                    raise Exception("%s has no SimTime column"%self.path)
+                continue
+            if fields[self._index["statistic"]].strip() != self.statistic:
+                continue
+            simtime = int(stats._number(fields[self._index["simtime"]]))
+            if self._time is not None and simtime != self._time:
+                found.append((self._time, self._value))
+                self._value = 0.0
+            self._time = simtime
+            self._value += sum(stats._number(fields[c]) for c in self._index["sum"])
+        return found
+
+    def finish(self):
+        """The samples left once sst has exited, including the last one."""
+        if self._partial:
+            self._partial += "\n"
+        found = self.poll()
+        if self._time is not None:
+            found.append((self._time, self._value))
+            self._time = None
+        return found
+
+
+
+def checkpointOptions(sst, period, prefix):
+    """sst options to checkpoint every period of simulated time, for the sst
+    installed; SST 14 calls the option --checkpoint-period, later versions
+    --checkpoint-sim-period."""
+    try:
+        usage = subprocess.check_output([sst, "--help"], stderr=subprocess.STDOUT)
+    except (OSError, subprocess.CalledProcessError) as e:
+        usage = getattr(e, "output", None) or b""
+    usage = usage.decode("utf-8", "replace") if isinstance(usage, bytes) else usage
+    for flag in ("--checkpoint-sim-period", "--checkpoint-period"):
+        if flag in usage:
+            return ["%s=%s"%(flag, period), "--checkpoint-prefix=%s"%prefix]
+    raise Exception("%s does not support checkpoints (SST 14 or later does)"%sst)
+
+
+def stop(proc, grace):
+    """Ask sst to stop, and kill it if it has not after grace seconds."""
+    if proc.poll() is not None:
+        return
+    proc.terminate()
+    deadline = time.time() + grace
+    while proc.poll() is None and time.time() < deadline:
+        time.sleep(0.1)
+    if proc.poll() is None:
+        proc.kill()
+        proc.wait()
+
+
+
+class SampledRun:
+    def __init__(self, command, statFile, statistic, tolerance=0.05, minSamples=10, maxSamples=None,
+                 poll=1.0, grace=30.0):
+        self.command = command
+        self.statFile = statFile
+        self.tail = StatTail(statFile, statistic)
+        self.statistic = statistic
+        self.tolerance = tolerance
+        self.minSamples = minSamples
+        self.maxSamples = maxSamples
+        self.pollSeconds = poll
+        self.grace = grace
+        self.samples = []
+        self.times = []
+
+    def _add(self, found):
+        for (simtime, value) in found:
+            self.times.append(simtime)
+            self.samples.append(value)
+
+    def _done(self):
+        if self.maxSamples and len(self.samples) >= self.maxSamples:
+            return True
+        return converged(self.samples, self.tolerance, self.minSamples)
+
+    def run(self, log=None):
+        started = time.time()
+        if os.path.exists(self.statFile):
+            os.remove(self.statFile)
+        proc = subprocess.Popen(self.command, stdout=log, stderr=subprocess.STDOUT if log else None)
+        stopped = False
+        while proc.poll() is None:
+            time.sleep(self.pollSeconds)
+            self._add(self.tail.poll())
+            if self._done():
+                stop(proc, self.grace)
+                stopped = True
+        if stopped:
+            # an interval cut short by the stop is not a sample
+            self._add(self.tail.poll())
+        else:
+            self._add(self.tail.finish())
+        (mean, half) = confidence(self.samples)
+        return {
+            "command" : self.command,
+            "statistic" : self.statistic,
+            "samples" : self.samples,
+            "simtimes" : self.times,
+            "mean" : mean,
+            "halfWidth" : half if half != float("inf") else None,
+            "tolerance" : self.tolerance,
+            "converged" : converged(self.samples, self.tolerance, self.minSamples),
+            "cumulative" : cumulative(self.samples),
+            "stoppedEarly" : stopped,
+            "simtime" : self.times[-1] if self.times else None,
+            "returncode" : proc.returncode,
+            "wallSeconds" : round(time.time() - started, 3),
+            }
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a driver until a statistic converges",
+                                     usage="%(prog)s [options] driver.py [driver options]")
+    parser.add_argument("-o", "--outdir", default="sampling", help="directory for stats.csv, the log and the result")
+    parser.add_argument("--statistic", required=True, help="statistic whose total per interval is sampled")
+    parser.add_argument("--sample", required=True, metavar="INTERVAL", help="simulated time per sample, e.g. 10us")
+    parser.add_argument("--warmup", metavar="TIME", help="simulated time before the first sample, e.g. 50us")
+    parser.add_argument("--tolerance", type=float, default=0.05,
+                        help="stop when the 95%% interval is within this fraction of the mean (default %(default)s)")
+    parser.add_argument("--min-samples", type=int, default=10, help="samples before stopping (default %(default)s)")
+    parser.add_argument("--max-samples", type=int, help="stop after this many samples in any case")
+    parser.add_argument("--poll", type=float, default=1.0, help="seconds between reads of stats.csv")
+    parser.add_argument("--grace", type=float, default=30.0, help="seconds sst gets to exit after SIGTERM")
+    parser.add_argument("--checkpoint", action="store_true", help="checkpoint every warm-up interval, the first at the end of the warm-up")
+    parser.add_argument("--restore", metavar="CHECKPOINT", help="continue from a checkpoint of an earlier run")
+    parser.add_argument("--sst", default="sst", help="sst executable")
+    parser.add_argument("driver", nargs="?", help="exercise driver, e.g. ex7/ex7.py")
+    (args, modelArgs) = parser.parse_known_args(argv)
+
+    if not os.path.isdir(args.outdir):
+        os.makedirs(args.outdir)
+    statFile = os.path.abspath(os.path.join(args.outdir, "stats.csv"))
+    if args.restore:
+        # the model, its statistic options and its stats.csv come from the
+        # checkpoint, so restore into the directory of the run that wrote it
+        command = [args.sst, "--load-checkpoint", args.restore]
+    else:
+        if not args.driver:
+            parser.error("give a driver, or a checkpoint to --restore")
+        sstArgs = []
+        if args.checkpoint:
+            if not args.warmup:
+                parser.error("--checkpoint needs --warmup")
+            prefix = os.path.join(os.path.abspath(args.outdir), "checkpoint")
+            sstArgs = checkpointOptions(args.sst, args.warmup, prefix)
+        modelArgs = withoutOptions(absoluteConfig(modelArgs), ("-s", "--statfile", "--sample", "--warmup"))
+        modelArgs += ["-s", statFile, "--sample", args.sample]
+        if args.warmup:
+            modelArgs += ["--warmup", args.warmup]
+        command = [args.sst] + sstArgs + [os.path.abspath(args.driver)] + modelArgs
+
+    sampled = SampledRun(command, statFile, args.statistic, args.tolerance, args.min_samples,
+                         args.max_samples, args.poll, args.grace)
+    with open(os.path.join(args.outdir, "sst.log"), "w") as log:
+        result = sampled.run(log)
+    with open(os.path.join(args.outdir, RESULT_FILE), "w") as f:
+        json.dump(result, f, indent=1)
+
+    if result["cumulative"] and len(result["samples"]) >= args.min_samples:
+        sys.stderr.write("warning: every sample of %s is larger than the last; the statistic "
+                         "is not being reset between dumps\n"%args.statistic)
+    sys.stdout.write("%s: %d samples, mean %g +/- %s, %s at simtime %s (%.1fs)\n"%(
+        args.statistic, len(result["samples"]), result["mean"],
+        "%g"%result["halfWidth"] if result["halfWidth"] is not None else "?",
+        "converged" if result["converged"] else "not converged", result["simtime"], result["wallSeconds"]))
+    sys.exit(0 if result["converged"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import sst
+
+
+
+# Named sets of statistics, per component type, for runs that only consume
+# a few counters.  "all" keeps the exercises' original behaviour of enabling
+# every statistic of every component.
+STAT_PROFILES = {
+    "cache-miss-only" : {
+        "memHierarchy.Cache" : [
+            "CacheMisses",
+            "GetSMiss_Arrival",
+            "GetXMiss_Arrival",
+            ],
+        },
+    "noc-traffic" : {
+        "merlin.hr_router" : [
+            "send_bit_count",
+            "send_packet_count",
+            "output_port_stalls",
+            "idle_time",
+            ],
+        },
+    "memory-bandwidth" : {
+        "memHierarchy.MemController" : [
+            "requests_received_GetS",
+            "requests_received_GetSX",
+            "requests_received_GetX",
+            "requests_received_PutM",
+            "cycles_with_issue",
+            "total_cycles",
+            ],
+        },
+    }
+
+STAT_PROFILE_NAMES = ["all"] + sorted(STAT_PROFILES)
+
+
+def statisticParams(sampleInterval=None, warmup=None):
+    """Statistic parameters for enableStatistics().  With sampleInterval
+    (e.g. "10us") every statistic is written and reset at that interval, so
+    each output is one sample; with warmup nothing is counted before then."""
+    params = {"type":"sst.AccumulatorStatistic"}
+    if sampleInterval:
+        params["rate"] = sampleInterval
+        params["resetOnOutput"] = "1"
+    if warmup:
+        params["startat"] = warmup
+    return params
+
+
+def enableStatistics(profile, statLevel, statParams=None):
+    """Enable the statistics of a profile on every component built so far,
+    with statParams from statisticParams() (the default).
+
+    Call this after the model is built: enabling by component type only
+    reaches components that already exist.
+    """
+    if statParams is None:
+        statParams = statisticParams()
+    sst.setStatisticLoadLevel(statLevel)
+    if profile == "all":
+        sst.enableAllStatisticsForAllComponents(statParams)
+        return
+    if profile not in STAT_PROFILES:
+        raise Exception("Unknown statistics profile '%s', expected one of %s"%(
+            profile, ", ".join(STAT_PROFILE_NAMES)))
+    for compType, statNames in sorted(STAT_PROFILES[profile].items()):
+        for statName in statNames:
+            sst.enableStatisticForComponentType(compType, statName, statParams)
@@ -0,0 +1,313 @@
+"""Read the stats.csv files written by sst.statOutputCSV.
+
+The drivers write one row per statistic per component:
+
+    ComponentName, StatisticName, StatisticSubId, StatisticType, SimTime, Rank, Sum.u64, SumSQ.u64, Count.u64, Min.u64, Max.u64
+    g0.l1cache_0, CacheHits, , sst.AccumulatorStatistic, 123456, 0, 42, 42, 42, 1, 1
+
+iterChunks() streams the file a block of rows at a time into NumPy columns,
+aggregate() folds those blocks into per-component and/or per-statistic
+totals without keeping the rows, and load() reads the whole file once and
+keeps a binary copy next to it (stats.csv.cache/) that later calls reload
+with memory-mapped arrays.
+
+    python -m sstcommon.stats stats.csv --by statistic
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy
+
+
+
+SEPARATOR = ", "
+CHUNK_ROWS = 100000
+
+# Value columns kept per row.  StatOutputCSV names them "<field>.<type>"
+# (Sum.u64, Sum.f64, ...); a field present with several types is summed,
+# since a row only fills in the type of its own statistic and writes 0 for
+# the others.
+VALUE_FIELDS = ("Sum", "SumSQ", "Count", "Min", "Max")
+COLUMNS = ("component", "statistic", "simtime") + tuple(f.lower() for f in VALUE_FIELDS)
+_DTYPES = {
+    "component" : numpy.int32,
+    "statistic" : numpy.int32,
+    "simtime"   : numpy.uint64,
+    "sum"       : numpy.float64,
+    "sumsq"     : numpy.float64,
+    "count"     : numpy.uint64,
+    "min"       : numpy.float64,
+    "max"       : numpy.float64,
+}
+
+
+
+class Names:
+    """Maps strings to small integer codes, in order of first appearance."""
+    def __init__(self, names=()):
+        self.names = list(names)
+        self.codes = dict((n, i) for (i, n) in enumerate(self.names))
+
+    def code(self, name):
+        try:
+            return self.codes[name]
+        except KeyError:
+            self.codes[name] = len(self.names)
+            self.names.append(name)
+            return self.codes[name]
+
+    def __len__(self):
+        return len(self.names)
+
+
+
+class StatsTable:
+    """Columns of a stats.csv (or part of one).
+
+    component and statistic are integer codes into componentNames and
+    statisticNames.  The name lists are shared between the chunks of one
+    iterChunks() call, so codes are comparable across chunks.
+    """
+    def __init__(self, columns, componentNames, statisticNames):
+        self.columns = columns
+        self.componentNames = componentNames
+        self.statisticNames = statisticNames
+
+    def __len__(self):
+        return len(self.columns["component"])
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def select(self, component=None, statistic=None):
+        """Rows for one component and/or statistic name, as a new table."""
+        mask = numpy.ones(len(self), dtype=bool)
+        if component is not None:
+            mask &= self.columns["component"] == self.componentNames.index(component)
+        if statistic is not None:
+            mask &= self.columns["statistic"] == self.statisticNames.index(statistic)
+        return StatsTable(dict((k, v[mask]) for (k, v) in self.columns.items()),
+                          self.componentNames, self.statisticNames)
+
+
+
+def _headerIndex(header):
+    fields = [f.strip() for f in header]
+    index = {
+        "component" : fields.index("ComponentName"),
+        "statistic" : fields.index("StatisticName"),
+        "simtime"   : fields.index("SimTime") if "SimTime" in fields else None,
+    }
+    for field in VALUE_FIELDS:
+        index[field.lower()] = [i for (i, f) in enumerate(fields)
+                                if f.split(".")[0] == field]
+    return index
+
+
+def _number(text):
+    text = text.strip()
+    return float(text) if text else 0.0
+
+
+def _flush(rows, components, statistics):
+    columns = dict((name, numpy.asarray(values, dtype=_DTYPES[name]))
+                   for (name, values) in rows.items())
+    return StatsTable(columns, components.names, statistics.names)
+
+
+def iterChunks(path, chunkRows=CHUNK_ROWS, separator=SEPARATOR):
+    """Yield the rows of a stats.csv as StatsTable blocks of chunkRows rows."""
+    components = Names()
+    statistics = Names()
+    with open(path) as f:
+        header = f.readline()
+        if not header:
+            return
+        index = _headerIndex(header.rstrip("\n").split(separator))
+        rows = dict((name, []) for name in COLUMNS)
+        comp_i, stat_i, time_i = index["component"], index["statistic"], index["simtime"]
+        value_i = [(name.lower(), index[name.lower()]) for name in VALUE_FIELDS]
+        n = 0
+        for line in f:
+            fields = line.rstrip("\n").split(separator)
+            if len(fields) < 2:
+                continue
+            rows["component"].append(components.code(fields[comp_i].strip()))
+            rows["statistic"].append(statistics.code(fields[stat_i].strip()))
+            rows["simtime"].append(int(_number(fields[time_i])) if time_i is not None else 0)
+            for (name, cols) in value_i:
+                rows[name].append(sum(_number(fields[c]) for c in cols))
+            n += 1
+            if n == chunkRows:
+                yield _flush(rows, components, statistics)
+                rows = dict((name, []) for name in COLUMNS)
+                n = 0
+        if n:
+            yield _flush(rows, components, statistics)
+
+
+
+class Aggregate:
+    """Running sum/count/min/max per group, fed one StatsTable at a time."""
+    def __init__(self, by):
+        if by not in ("component", "statistic", "both"):
+            raise Exception("Unknown aggregation '%s'"%by)
+        self.by = by
+        self.keys = {}
+        self.sum = numpy.zeros(0)
+        self.count = numpy.zeros(0, dtype=numpy.uint64)
+        self.min = numpy.zeros(0)
+        self.max = numpy.zeros(0)
+        self.rows = numpy.zeros(0, dtype=numpy.int64)
+
+    def _groups(self, table):
+        if self.by == "component":
+            return table["component"].astype(numpy.int64), lambda k: table.componentNames[k]
+        if self.by == "statistic":
+            return table["statistic"].astype(numpy.int64), lambda k: table.statisticNames[k]
+        width = max(len(table.statisticNames), 1)
+        keys = table["component"].astype(numpy.int64) * width + table["statistic"]
+        return keys, lambda k: (table.componentNames[k // width], table.statisticNames[k % width])
+
+    def add(self, table):
+        if not len(table):
+            return
+        keys, name = self._groups(table)
+        uniq, inverse = numpy.unique(keys, return_inverse=True)
+        slots = numpy.empty(len(uniq), dtype=numpy.int64)
+        for (i, k) in enumerate(uniq.tolist()):
+            label = name(k)
+            if label not in self.keys:
+                self.keys[label] = len(self.keys)
+            slots[i] = self.keys[label]
+        self._grow(len(self.keys))
+        rowSlots = slots[inverse]
+        numpy.add.at(self.sum, rowSlots, table["sum"])
+        numpy.add.at(self.count, rowSlots, table["count"])
+        numpy.add.at(self.rows, rowSlots, 1)
+        numpy.minimum.at(self.min, rowSlots, table["min"])
+        numpy.maximum.at(self.max, rowSlots, table["max"])
+
+    def _grow(self, n):
+        extra = n - len(self.sum)
+        if extra <= 0:
+            return
+        self.sum = numpy.concatenate([self.sum, numpy.zeros(extra)])
+        self.count = numpy.concatenate([self.count, numpy.zeros(extra, dtype=numpy.uint64)])
+        self.rows = numpy.concatenate([self.rows, numpy.zeros(extra, dtype=numpy.int64)])
+        self.min = numpy.concatenate([self.min, numpy.full(extra, numpy.inf)])
+        self.max = numpy.concatenate([self.max, numpy.full(extra, -numpy.inf)])
+
+    def result(self):
+        """{group: {"sum", "count", "min", "max", "rows"}}, where group is a
+        component name, a statistic name or a (component, statistic) pair."""
+        out = {}
+        for (label, i) in self.keys.items():
+            out[label] = {
+                "sum"   : float(self.sum[i]),
+                "count" : int(self.count[i]),
+                "min"   : float(self.min[i]),
+                "max"   : float(self.max[i]),
+                "rows"  : int(self.rows[i]),
+            }
+        return out
+
+
+def aggregate(path, by="statistic", chunkRows=CHUNK_ROWS, separator=SEPARATOR):
+    """Totals per "component", per "statistic" or per pair ("both"),
+    streaming the file so only one chunk of rows is in memory at a time."""
+    agg = Aggregate(by)
+    for table in iterChunks(path, chunkRows, separator):
+        agg.add(table)
+    return agg.result()
+
+
+
+def cachePath(path):
+    return path + ".cache"
+
+
+def _cacheIsFresh(path, cache):
+    try:
+        with open(os.path.join(cache, "meta.json")) as f:
+            meta = json.load(f)
+    except (IOError, OSError, ValueError):
+        return False
+    st = os.stat(path)
+    return meta.get("size") == st.st_size and meta.get("mtime") == st.st_mtime
+
+
+def saveTable(table, directory, **meta):
+    """Store a table as one .npy file per column plus the name lists, and
+    any extra JSON-serialisable meta data, in directory."""
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    for (name, column) in table.columns.items():
+        numpy.save(os.path.join(directory, name + ".npy"), column)
+    meta = dict(meta)
+    meta["columns"] = sorted(table.columns)
+    meta["components"] = list(table.componentNames)
+    meta["statistics"] = list(table.statisticNames)
+    with open(os.path.join(directory, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+
+def loadTable(directory):
+    """Reload a table stored by saveTable(), with memory-mapped columns.
+    Returns (table, meta)."""
+    with open(os.path.join(directory, "meta.json")) as f:
+        meta = json.load(f)
+    columns = dict((name, numpy.load(os.path.join(directory, name + ".npy"), mmap_mode="r"))
+                   for name in meta.get("columns", COLUMNS))
+    return StatsTable(columns, meta["components"], meta["statistics"]), meta
+
+
+def writeCache(table, path):
+    st = os.stat(path)
+    saveTable(table, cachePath(path), size=st.st_size, mtime=st.st_mtime)
+
+
+def readCache(path):
+    return loadTable(cachePath(path))[0]
+
+
+def load(path, cache=True, separator=SEPARATOR):
+    """The whole file as one StatsTable, from the binary cache when it is
+    newer than the last change to path."""
+    if cache and _cacheIsFresh(path, cachePath(path)):
+        return readCache(path)
+    chunks = list(iterChunks(path, separator=separator))
+    if chunks:
+        columns = dict((name, numpy.concatenate([c[name] for c in chunks])) for name in COLUMNS)
+        table = StatsTable(columns, chunks[-1].componentNames, chunks[-1].statisticNames)
+    else:
+        table = StatsTable(dict((name, numpy.zeros(0, dtype=_DTYPES[name])) for name in COLUMNS), [], [])
+    if cache:
+        writeCache(table, path)
+    return table
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarise an SST stats.csv")
+    parser.add_argument("statfile", help="statistics file written by sst.statOutputCSV")
+    parser.add_argument("-b", "--by", choices=("component", "statistic", "both"), default="statistic",
+                        help="group rows by component, statistic or both")
+    parser.add_argument("--cache", action="store_true",
+                        help="also write the binary columnar cache next to the file")
+    args = parser.parse_args(argv)
+
+    if args.cache:
+        load(args.statfile)
+    result = aggregate(args.statfile, by=args.by)
+    for label in sorted(result, key=str):
+        r = result[label]
+        if isinstance(label, tuple):
+            label = "%s, %s"%label
+        sys.stdout.write("%s, %g, %d, %g, %g\n"%(label, r["sum"], r["count"], r["min"], r["max"]))
+
+
+if __name__ == "__main__":
+    main()
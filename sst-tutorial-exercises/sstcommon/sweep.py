@@ -0,0 +1,369 @@
+"""Run an exercise driver over many variations of its .cfg file.
+
+A sweep is a set of .cfg options, each with a list of values:
+
+    python -m sstcommon.sweep ex7/ex7.py -c ex7/miranda.cfg -o sweep7 \\
+        --set Groups.cores=1,2,4 --set Memory.interleave_size=0,64,256 \\
+        --set Network.bandwidth=48GB/s,96GB/s
+
+runs every combination (or, with --lhs N, N points of a Latin hypercube
+over the value lists).  Each point gets its own directory under the output
+directory with the modified .cfg, point.json, the driver's output and its
+stats.csv.  The runs share a pool of worker threads, each waiting on one
+sst process, sized by the number of cores and, with --mem-per-run, by the
+available memory.  Afterwards the stats.csv files are merged into one
+columnar table with a "point" column (see loadResults()).
+
+For STREAM models the points can be pruned before any simulation with the
+closed-form estimate of sstcommon.estimate: --skip-limited-by memory drops
+the points bound by the memory controllers, and --per-region K simulates
+only K points of each group that has the same limiting resource and a
+similar estimated bandwidth.  Each point.json holds its estimate.
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
+
+try:
+    import ConfigParser
+except ImportError:
+    import configparser as ConfigParser
+
+import numpy
+
+from sstcommon import stats
+from sstcommon.estimate import estimateFile, Unsupported
+from sstcommon.resultcache import ResultCache, runCached, DEFAULT_DIR, DEFAULT_BUDGET
+from sstcommon.params import capacityBytes
+
+
+
+def parseSet(text):
+    """"Section.option=v1,v2,..." -> (("Section", "option"), [v1, v2, ...])"""
+    if "=" not in text:
+        raise Exception("Expected Section.option=value,... but got '%s'"%text)
+    key, values = text.split("=", 1)
+    if "." not in key:
+        raise Exception("Sweep key '%s' is not of the form Section.option"%key)
+    section, option = key.split(".", 1)
+    return ((section, option.lower()), [v.strip() for v in values.split(",")])
+
+
+def expandGrid(space):
+    """Every combination of the values in space, a list of (key, values)."""
+    keys = [key for (key, values) in space]
+    return [dict(zip(keys, combo))
+            for combo in itertools.product(*[values for (key, values) in space])]
+
+
+def latinHypercube(space, samples, seed=None):
+    """samples points in which every option visits its values as evenly as
+    samples allows, with the options combined at random."""
+    rng = random.Random(seed)
+    points = [dict() for i in range(samples)]
+    for (key, values) in space:
+        strata = list(range(samples))
+        rng.shuffle(strata)
+        for (point, stratum) in zip(points, strata):
+            u = (stratum + rng.random()) / samples
+            point[key] = values[min(int(u * len(values)), len(values) - 1)]
+    return points
+
+
+def pointName(index):
+    return "point_%05d"%index
+
+
+def writePointConfig(baseCfg, point, path):
+    """Write baseCfg with the options of point replaced to path."""
+    cp = ConfigParser.ConfigParser()
+    if not cp.read(baseCfg):
+        raise Exception('Unable to read file "%s"'%baseCfg)
+    for ((section, option), value) in sorted(point.items()):
+        if not cp.has_section(section):
+            cp.add_section(section)
+        cp.set(section, option, value)
+    with open(path, "w") as f:
+        cp.write(f)
+
+
+def _availableMemory():
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (IOError, OSError):
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def workerCount(jobs=None, memPerRun=None):
+    """jobs if given, else one per core, reduced so that memPerRun (a
+    capacity string such as "2GB") times the count fits in free memory."""
+    count = jobs or cpu_count()
+    if memPerRun:
+        available = _availableMemory()
+        if available is not None:
+            count = min(count, max(1, available // capacityBytes(memPerRun)))
+    return max(1, count)
+
+
+class SweepRun:
+    """One point of a sweep: its directory, .cfg file and sst command.
+
+    With a ResultCache, points whose model has been simulated before take
+    their stats.csv from the cache instead of running.
+    """
+    def __init__(self, index, point, outDir, driver, baseCfg, sst="sst", sstArgs=(), cache=None):
+        self.index = index
+        self.point = point
+        self.dir = os.path.abspath(os.path.join(outDir, pointName(index)))
+        self.cfg = os.path.join(self.dir, os.path.basename(baseCfg))
+        self.statFile = os.path.join(self.dir, "stats.csv")
+        self.driver = os.path.abspath(driver)
+        self.baseCfg = baseCfg
+        self.sst = sst
+        self.sstArgs = list(sstArgs)
+        self.modelArgs = ["-c", self.cfg, "-s", self.statFile]
+        self.command = [sst] + self.sstArgs + [self.driver] + self.modelArgs
+        self.cache = cache
+        self.cached = False
+        self.estimate = None
+        self.skipped = None
+        self.prepared = False
+
+    def prepare(self):
+        """Write the point's .cfg and point.json, and remove the stats.csv
+        of an earlier sweep into the same directory."""
+        if not os.path.isdir(self.dir):
+            os.makedirs(self.dir)
+        writePointConfig(self.baseCfg, self.point, self.cfg)
+        if os.path.exists(self.statFile):
+            os.remove(self.statFile)
+        self.saveDescription()
+        self.prepared = True
+
+    def saveDescription(self):
+        with open(os.path.join(self.dir, "point.json"), "w") as f:
+            json.dump(self.describe(), f, indent=1, sort_keys=True)
+
+    def describe(self):
+        found = {
+            "index" : self.index,
+            "point" : dict(("%s.%s"%key, value) for (key, value) in self.point.items()),
+            "command" : self.command,
+            }
+        if self.estimate is not None:
+            found["estimate"] = self.estimate
+        if self.skipped is not None:
+            found["skipped"] = self.skipped
+        return found
+
+    def run(self):
+        """Run sst in the driver's directory (the drivers import utils.py
+        from there).  Returns (index, return code, seconds)."""
+        start = time.time()
+        with open(os.path.join(self.dir, "sst.log"), "w") as log:
+            if self.cache is not None:
+                rc, self.cached = runCached(self.cache, self.command, self.driver, self.modelArgs,
+                                            self.statFile, self.sst, self.sstArgs, log)
+            else:
+                rc = subprocess.call(self.command, cwd=os.path.dirname(self.driver),
+                                     stdout=log, stderr=subprocess.STDOUT)
+        return (self.index, rc, time.time() - start)
+
+
+def estimateRuns(runs, log=sys.stdout):
+    """Attach the closed-form STREAM estimate (sstcommon.estimate) to every
+    prepared run whose configuration it models, and say which runs it does
+    not; those are always simulated."""
+    for job in runs:
+        try:
+            job.estimate = estimateFile(job.cfg)
+        except Unsupported as e:
+            job.estimate = None
+            log.write("%s: no estimate: %s\n"%(pointName(job.index), e))
+
+
+def _region(estimate):
+    # same limiting resource, bandwidth within a factor of 2**0.25
+    return (estimate["limiter"], int(math.floor(4 * math.log(estimate["bandwidth"], 2))))
+
+
+def prefilter(runs, skipLimitedBy=(), perRegion=None):
+    """The runs worth simulating, by their estimates.  Runs limited by a
+    resource in skipLimitedBy are dropped, and of the runs in one region
+    (same limiter, similar bandwidth) at most perRegion are kept, spread
+    over the region.  Runs without an estimate are always kept; dropped
+    ones get a skipped reason."""
+    keep = []
+    regions = {}
+    for job in runs:
+        if job.estimate is None:
+            keep.append(job)
+        elif job.estimate["limiter"] in skipLimitedBy:
+            job.skipped = "limited by %s"%job.estimate["limiter"]
+        else:
+            regions.setdefault(_region(job.estimate), []).append(job)
+    for (region, members) in sorted(regions.items()):
+        if perRegion is None or len(members) <= perRegion:
+            keep.extend(members)
+            continue
+        chosen = set(int(i * len(members) / float(perRegion)) for i in range(perRegion))
+        for (i, job) in enumerate(members):
+            if i in chosen:
+                keep.append(job)
+            else:
+                job.skipped = "a point with a similar estimate (limited by %s) is simulated"%region[0]
+    keep.sort(key=lambda job: job.index)
+    return keep
+
+
+def _run(job):
+    try:
+        return job.run()
+    except Exception as e:
+        with open(os.path.join(job.dir, "sst.log"), "a") as log:
+            log.write("%s\n"%e)
+        return (job.index, -1, 0.0)
+
+
+def runSweep(runs, workers, log=sys.stdout):
+    """Run every SweepRun, workers at a time, preparing the ones not prepared
+    yet.  Returns {index: return code}."""
+    for job in runs:
+        if not job.prepared:
+            job.prepare()
+    results = {}
+    byIndex = dict((job.index, job) for job in runs)
+    pool = ThreadPool(workers)
+    try:
+        for (index, rc, seconds) in pool.imap_unordered(_run, runs):
+            results[index] = rc
+            if rc != 0:
+                status = "failed (%d)"%rc
+            elif byIndex[index].cached:
+                status = "cached"
+            else:
+                status = "ok"
+            log.write("%s: %s in %.1fs\n"%(pointName(index), status, seconds))
+            log.flush()
+    finally:
+        pool.close()
+        pool.join()
+    return results
+
+
+def mergeResults(runs, outDir, results):
+    """Merge the stats.csv of every run that succeeded (return code 0 in the
+    results of runSweep) into a single table with an extra "point" column,
+    stored in outDir/results."""
+    components = stats.Names()
+    statistics = stats.Names()
+    parts = []
+    for job in runs:
+        if results.get(job.index) != 0 or not os.path.exists(job.statFile):
+            continue
+        for chunk in stats.iterChunks(job.statFile):
+            compMap = numpy.array([components.code(n) for n in chunk.componentNames], dtype=numpy.int32)
+            statMap = numpy.array([statistics.code(n) for n in chunk.statisticNames], dtype=numpy.int32)
+            columns = dict(chunk.columns)
+            columns["component"] = compMap[chunk["component"]] if len(chunk) else chunk["component"]
+            columns["statistic"] = statMap[chunk["statistic"]] if len(chunk) else chunk["statistic"]
+            columns["point"] = numpy.full(len(chunk), job.index, dtype=numpy.int32)
+            parts.append(columns)
+    names = stats.COLUMNS + ("point",)
+    if parts:
+        merged = dict((name, numpy.concatenate([p[name] for p in parts])) for name in names)
+    else:
+        merged = dict((name, numpy.zeros(0, dtype=numpy.int32)) for name in names)
+    table = stats.StatsTable(merged, components.names, statistics.names)
+    stats.saveTable(table, os.path.join(outDir, "results"),
+                    points=[job.describe() for job in runs])
+    return table
+
+
+def loadResults(outDir):
+    """The merged table of a finished sweep and the description of each
+    point, as (StatsTable, list of dicts)."""
+    table, meta = stats.loadTable(os.path.join(outDir, "results"))
+    return table, meta["points"]
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run an exercise driver over a set of .cfg variations")
+    parser.add_argument("driver", help="exercise driver, e.g. ex7/ex7.py")
+    parser.add_argument("-c", "--config", help="base configuration file", required=True)
+    parser.add_argument("-o", "--outdir", help="directory for the runs and merged results", default="sweep")
+    parser.add_argument("--set", dest="sets", action="append", default=[], metavar="SECTION.OPTION=V1,V2,...",
+                        help="values to sweep for one .cfg option; repeat for more options")
+    parser.add_argument("--lhs", type=int, metavar="N", help="run N Latin-hypercube points instead of the full grid")
+    parser.add_argument("--seed", type=int, help="random seed for --lhs")
+    parser.add_argument("-j", "--jobs", type=int, help="simulations to run at once (default: one per core)")
+    parser.add_argument("--mem-per-run", help="memory one simulation needs, e.g. 4GB; limits --jobs to what fits")
+    parser.add_argument("--sst", default="sst", help="sst executable")
+    parser.add_argument("--dry-run", action="store_true", help="write the point directories but run nothing")
+    parser.add_argument("--cache", action="store_true",
+                        help="reuse results of models simulated before (see sstcommon/resultcache.py)")
+    parser.add_argument("--cache-dir", default=DEFAULT_DIR, help="result cache directory (default %(default)s)")
+    parser.add_argument("--cache-budget", default=DEFAULT_BUDGET, help="result cache size limit (default %(default)s)")
+    parser.add_argument("--estimate", action="store_true",
+                        help="record the closed-form STREAM estimate of each point (see sstcommon/estimate.py)")
+    parser.add_argument("--skip-limited-by", action="append", default=[], metavar="RESOURCE",
+                        choices=["cores", "memory", "memlink", "network"],
+                        help="do not simulate points the estimate finds limited by RESOURCE; implies --estimate")
+    parser.add_argument("--per-region", type=int, metavar="K",
+                        help="simulate at most K points per region of similar estimates; implies --estimate")
+    args = parser.parse_args(argv)
+
+    space = [parseSet(s) for s in args.sets]
+    if not space:
+        parser.error("nothing to sweep; give at least one --set")
+    points = latinHypercube(space, args.lhs, args.seed) if args.lhs else expandGrid(space)
+    cache = ResultCache(args.cache_dir, args.cache_budget) if args.cache else None
+    runs = [SweepRun(i, p, args.outdir, args.driver, args.config, args.sst, cache=cache)
+            for (i, p) in enumerate(points)]
+
+    allRuns = runs
+    if args.estimate or args.skip_limited_by or args.per_region:
+        for job in runs:
+            job.prepare()
+        estimateRuns(runs)
+        runs = prefilter(runs, args.skip_limited_by, args.per_region)
+        for job in allRuns:
+            # record the estimates and why points were skipped
+            job.saveDescription()
+        sys.stdout.write("%d of %d points left after the estimates\n"%(len(runs), len(allRuns)))
+
+    workers = workerCount(args.jobs, args.mem_per_run)
+    sys.stdout.write("%d points, %d at a time\n"%(len(runs), workers))
+    if args.dry_run:
+        for job in runs:
+            if not job.prepared:
+                job.prepare()
+        return
+    results = runSweep(runs, workers)
+    table = mergeResults(allRuns, args.outdir, results)
+    failed = sorted(i for (i, rc) in results.items() if rc != 0)
+    sys.stdout.write("%d rows from %d points in %s\n"%(len(table), len(runs) - len(failed),
+                                                      os.path.join(args.outdir, "results")))
+    if failed:
+        sys.stdout.write("failed: %s\n"%", ".join(pointName(i) for i in failed))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""Router-level topologies as integer link tables.
+
+Every generator returns a Topology whose links are four parallel integer
+arrays (src, src_port, dst, dst_port), one entry per bidirectional link,
+plus the (router, port) pair each endpoint attaches to.  Nothing here talks
+to sst until TopologyGenerator.build() is called, so a topology can be
+generated and inspected outside a simulation.
+
+Port numbers follow the layouts merlin's routers expect, so the arrays can
+be handed straight to merlin.hr_router components:
+
+  torus/mesh  for each dimension d: port 2d toward +d, port 2d+1 toward -d;
+              endpoint ports follow the 2*dims network ports
+  fattree     ports [0, k) go down, ports [k, 2k) go up
+  dragonfly   [0, p) hosts, then a-1 ports to the other routers of the
+              group, then h global ports
+"""
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from sstcommon.params import FrozenParams
+
+
+
+def _product(values):
+    result = 1
+    for v in values:
+        result *= v
+    return result
+
+
+def _column(values):
+    if numpy is not None:
+        return numpy.asarray(values, dtype=numpy.int64)
+    return list(values)
+
+
+def _concat(parts):
+    if numpy is not None:
+        if not parts:
+            return numpy.zeros(0, dtype=numpy.int64)
+        return numpy.concatenate(parts)
+    result = []
+    for part in parts:
+        result.extend(part)
+    return result
+
+
+def parseShape(shape):
+    """Turn "4x4x2" (or a sequence of sizes) into a list of ints."""
+    if isinstance(shape, str):
+        return [int(x) for x in shape.split('x')]
+    return [int(x) for x in shape]
+
+
+
+class Topology:
+    """A generated topology.  See the module docstring for the port layout."""
+    def __init__(self, kind, num_routers, num_ports, links, endpoints, merlinParams):
+        self.kind = kind
+        self.num_routers = num_routers
+        self.num_ports = num_ports
+        self.src, self.src_port, self.dst, self.dst_port = links
+        self.endpoint_router, self.endpoint_port = endpoints
+        self.merlinParams = FrozenParams(merlinParams)
+
+    def numLinks(self):
+        return len(self.src)
+
+    def numEndPoints(self):
+        return len(self.endpoint_router)
+
+    def linkTuples(self, latency):
+        """The links as connectBatch() tuples, all with the same latency."""
+        return list(zip(*[self._ints(self.src), self._ints(self.src_port),
+                          self._ints(self.dst), self._ints(self.dst_port),
+                          [latency] * self.numLinks()]))
+
+    def endPointTuples(self):
+        return list(zip(self._ints(self.endpoint_router), self._ints(self.endpoint_port)))
+
+    @staticmethod
+    def _ints(column):
+        if numpy is not None:
+            return column.tolist()
+        return column
+
+    def validate(self):
+        """Raise if a port is used twice or is outside the router's ports."""
+        used = {}
+        ports = list(zip(self._ints(self.src), self._ints(self.src_port)))
+        ports += list(zip(self._ints(self.dst), self._ints(self.dst_port)))
+        ports += self.endPointTuples()
+        for (router, port) in ports:
+            if not (0 <= router < self.num_routers) or not (0 <= port < self.num_ports):
+                raise Exception("%s: port %d of router %d does not exist"%(self.kind, port, router))
+            if (router, port) in used:
+                raise Exception("%s: port %d of router %d is connected twice"%(self.kind, port, router))
+            used[(router, port)] = True
+
+
+
+def _cube(kind, shape, wrap, local_ports):
+    shape = parseShape(shape)
+    dims = len(shape)
+    num_routers = _product(shape)
+    parts = ([], [], [], [])
+    stride = 1
+    if numpy is not None:
+        ids = numpy.arange(num_routers, dtype=numpy.int64)
+    for d, size in enumerate(shape):
+        if size > 1:
+            if numpy is not None:
+                coord = (ids // stride) % size
+                if wrap:
+                    src = ids
+                    dst = ids + stride * ((coord + 1) % size - coord)
+                else:
+                    src = ids[coord < size - 1]
+                    dst = src + stride
+                parts[0].append(src)
+                parts[1].append(numpy.full(len(src), 2 * d, dtype=numpy.int64))
+                parts[2].append(dst)
+                parts[3].append(numpy.full(len(src), 2 * d + 1, dtype=numpy.int64))
+            else:
+                src = []
+                dst = []
+                for r in range(num_routers):
+                    coord = (r // stride) % size
+                    if coord < size - 1:
+                        src.append(r)
+                        dst.append(r + stride)
+                    elif wrap:
+                        src.append(r)
+                        dst.append(r - stride * coord)
+                parts[0].append(src)
+                parts[1].append([2 * d] * len(src))
+                parts[2].append(dst)
+                parts[3].append([2 * d + 1] * len(src))
+        stride *= size
+
+    if numpy is not None:
+        ep_router = numpy.repeat(numpy.arange(num_routers, dtype=numpy.int64), local_ports)
+        ep_port = numpy.tile(numpy.arange(local_ports, dtype=numpy.int64) + 2 * dims, num_routers)
+    else:
+        ep_router = [r for r in range(num_routers) for l in range(local_ports)]
+        ep_port = [2 * dims + l for r in range(num_routers) for l in range(local_ports)]
+
+    shapeStr = "x".join(str(s) for s in shape)
+    widthStr = "x".join("1" for s in shape)
+    merlinParams = {
+        "num_ports": 2 * dims + local_ports,
+        "topology": "merlin.%s"%kind,
+        "num_dims": dims,
+        "%s:shape"%kind: shapeStr,
+        "%s:width"%kind: widthStr,
+        "%s:local_ports"%kind: local_ports,
+    }
+    return Topology(kind, num_routers, 2 * dims + local_ports,
+                    tuple(_concat(p) for p in parts),
+                    (ep_router, ep_port), merlinParams)
+
+
+def torus(shape, local_ports=1):
+    """A k-ary n-cube: shape "8x8" is an 8x8 torus with wrap-around links."""
+    return _cube("torus", shape, True, local_ports)
+
+
+def ring(stops, local_ports=1):
+    """A one-dimensional torus."""
+    return _cube("torus", [stops], True, local_ports)
+
+
+def mesh(shape, local_ports=1):
+    """Like torus() but without the wrap-around links."""
+    return _cube("mesh", shape, False, local_ports)
+
+
+def fatTree(radix, levels):
+    """A radix-ary, levels-deep fat tree (a k-ary n-tree).
+
+    Each level has radix**(levels-1) routers, numbered level by level; the
+    radix**levels endpoints hang off the bottom level.  Up port j of a router
+    at level l goes to the router at level l+1 whose base-radix digit l is j,
+    arriving on the down port equal to the sender's digit l, so every down
+    port of every router leads to a contiguous block of endpoints.
+    """
+    k = radix
+    per_level = k ** (levels - 1)
+    num_routers = per_level * levels
+    parts = ([], [], [], [])
+    for level in range(levels - 1):
+        place = k ** level
+        base = level * per_level
+        if numpy is not None:
+            s = numpy.repeat(numpy.arange(per_level, dtype=numpy.int64), k)
+            j = numpy.tile(numpy.arange(k, dtype=numpy.int64), per_level)
+            digit = (s // place) % k
+            parts[0].append(s + base)
+            parts[1].append(j + k)
+            parts[2].append(s - digit * place + j * place + base + per_level)
+            parts[3].append(digit)
+        else:
+            pairs = [(s, j) for s in range(per_level) for j in range(k)]
+            parts[0].append([s + base for (s, j) in pairs])
+            parts[1].append([j + k for (s, j) in pairs])
+            parts[2].append([s - ((s // place) % k) * place + j * place + base + per_level
+                             for (s, j) in pairs])
+            parts[3].append([(s // place) % k for (s, j) in pairs])
+
+    if numpy is not None:
+        ep_router = numpy.repeat(numpy.arange(per_level, dtype=numpy.int64), k)
+        ep_port = numpy.tile(numpy.arange(k, dtype=numpy.int64), per_level)
+    else:
+        ep_router = [r for r in range(per_level) for p in range(k)]
+        ep_port = [p for r in range(per_level) for p in range(k)]
+
+    shapeStr = ":".join(["%d,%d"%(k, k)] * (levels - 1) + ["%d"%k])
+    merlinParams = {
+        "num_ports": 2 * k,
+        "topology": "merlin.fattree",
+        "fattree:shape": shapeStr,
+    }
+    return Topology("fattree", num_routers, 2 * k,
+                    tuple(_concat(p) for p in parts),
+                    (ep_router, ep_port), merlinParams)
+
+
+def dragonfly(hosts_per_router, routers_per_group, intergroup_per_router, num_groups):
+    """A dragonfly with all-to-all groups.
+
+    Global link i of group g (i = router * intergroup_per_router + port)
+    leads to the (i mod (num_groups-1))-th other group, counting up from 0
+    and skipping g itself, which is the arrangement merlin's "absolute"
+    global routing assumes.  routers_per_group * intergroup_per_router must
+    be a multiple of num_groups - 1 so every global port has a peer.
+    """
+    p, a, h, g = hosts_per_router, routers_per_group, intergroup_per_router, num_groups
+    num_ports = p + (a - 1) + h
+    num_routers = a * g
+    globals_per_group = a * h
+    if g > 1 and globals_per_group % (g - 1):
+        raise Exception("dragonfly: %d routers x %d global ports per group cannot be spread evenly over %d other groups"%(a, h, g - 1))
+
+    src, src_port, dst, dst_port = [], [], [], []
+    # Intra-group all-to-all
+    pairs = [(r, q) for r in range(a) for q in range(r + 1, a)]
+    for grp in range(g):
+        base = grp * a
+        src.append([base + r for (r, q) in pairs])
+        src_port.append([p + q - 1 for (r, q) in pairs])
+        dst.append([base + q for (r, q) in pairs])
+        dst_port.append([p + r for (r, q) in pairs])
+
+    # Global links, each emitted once from the lower-numbered group
+    if g > 1:
+        if numpy is not None:
+            grp = numpy.repeat(numpy.arange(g, dtype=numpy.int64), globals_per_group)
+            i = numpy.tile(numpy.arange(globals_per_group, dtype=numpy.int64), g)
+            rnd, offset = i // (g - 1), i % (g - 1)
+            peer = offset + (offset >= grp)
+            keep = grp < peer
+            grp, i, rnd, peer = grp[keep], i[keep], rnd[keep], peer[keep]
+            j = rnd * (g - 1) + grp
+            src.append(grp * a + i // h)
+            src_port.append(p + a - 1 + i % h)
+            dst.append(peer * a + j // h)
+            dst_port.append(p + a - 1 + j % h)
+        else:
+            lists = ([], [], [], [])
+            for grp in range(g):
+                for i in range(globals_per_group):
+                    rnd, offset = i // (g - 1), i % (g - 1)
+                    peer = offset + (1 if offset >= grp else 0)
+                    if grp < peer:
+                        j = rnd * (g - 1) + grp
+                        lists[0].append(grp * a + i // h)
+                        lists[1].append(p + a - 1 + i % h)
+                        lists[2].append(peer * a + j // h)
+                        lists[3].append(p + a - 1 + j % h)
+            src.append(lists[0])
+            src_port.append(lists[1])
+            dst.append(lists[2])
+            dst_port.append(lists[3])
+
+    links = tuple(_concat([_column(x) for x in col]) for col in (src, src_port, dst, dst_port))
+    if numpy is not None:
+        ep_router = numpy.repeat(numpy.arange(num_routers, dtype=numpy.int64), p)
+        ep_port = numpy.tile(numpy.arange(p, dtype=numpy.int64), num_routers)
+    else:
+        ep_router = [r for r in range(num_routers) for x in range(p)]
+        ep_port = [x for r in range(num_routers) for x in range(p)]
+
+    merlinParams = {
+        "num_ports": num_ports,
+        "topology": "merlin.dragonfly",
+        "dragonfly:hosts_per_router": p,
+        "dragonfly:routers_per_group": a,
+        "dragonfly:intergroup_per_router": h,
+        "dragonfly:num_groups": g,
+        "dragonfly:algorithm": "minimal",
+    }
+    return Topology("dragonfly", num_routers, num_ports, links,
+                    (ep_router, ep_port), merlinParams)
+
+
+
+class TopologyGenerator:
+    """Builds a Topology into sst, with the same prepParams()/setEndPoint()/
+    build() calls as the merlin topology generators, so it can stand in for
+    one in ChipConfig.build().
+
+    Router parameters are taken from sst.merlin._params when prepParams() is
+    called, exactly as the merlin generators do, with the topology's own
+    routing parameters layered on top.  Given a sstcommon.graph.ModelGraph
+    as model, the routers and links are recorded in it instead of being
+    created with sst.
+    """
+    def __init__(self, topo, routerName="rtr.%d", linkName="rtr_link_%d", nicName="nic.%d", model=None):
+        self.topo = topo
+        self.model = model
+        self.routerName = routerName
+        self.linkName = linkName
+        self.nicName = nicName
+        self.endPoint = None
+        self.params = dict()
+
+    def getName(self):
+        return "Array-backed %s"%self.topo.kind
+
+    def prepParams(self):
+        from sst import merlin
+        self.params = dict(merlin._params)
+        self.params.update(self.topo.merlinParams)
+
+    def setEndPoint(self, endPoint):
+        self.endPoint = endPoint
+
+    def build(self):
+        from sstcommon.links import connectBatch, linkNames, portName
+        model = self.model
+        if model is None:
+            import sst as model
+
+        latency = self.params["link_lat"]
+        names = linkNames(self.routerName, self.topo.num_routers)
+        routers = [None] * self.topo.num_routers
+        for r in range(self.topo.num_routers):
+            rtr = model.Component(names[r], "merlin.hr_router")
+            rtr.addParams(self.params)
+            rtr.addParam("id", r)
+            routers[r] = rtr
+
+        connectBatch(routers, self.topo.linkTuples(latency), self.linkName)
+
+        if self.endPoint is None:
+            return
+        endpoints = self.topo.endPointTuples()
+        nicNames = linkNames(self.nicName, len(endpoints))
+        for (nID, (router, port)) in enumerate(endpoints):
+            ep = self.endPoint.build(nID, {})
+            if ep:
+                model.Link(nicNames[nID]).connect(ep, (routers[router], portName(port), latency))
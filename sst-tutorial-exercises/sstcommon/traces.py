@@ -0,0 +1,375 @@
+"""Memory traces replayed by Prospero, one file per core.
+
+A trace is Prospero's binary format: one 21-byte record per request,
+
+    uint64 cycle, char 'R' or 'W', uint64 address, uint32 length
+
+little-endian and packed.  A .cfg file replays a set of them with
+
+    [CPU]
+    application: prospero
+    [prospero]
+    traces: ../traces/core{core}.trace.zst
+    max_outstanding: 16
+
+where {core} is the core number.  Files ending in .gz are read by Prospero
+itself; .zst (zstandard module) and .lz4 (lz4 module) files are unpacked
+once, a chunk at a time, into an uncompressed copy next to the trace, or in
+cache_dir under a name that includes a hash of the trace's absolute path so
+traces of the same name in different directories can share one cache_dir.
+The path, size and mtime of the trace are kept next to the copy, which is
+reused while they still match.  Uncompressed files are read with mmap.
+
+    python -m sstcommon.traces stream -o traces --cores 8 --n 1000000 --codec zst
+    python -m sstcommon.traces capture -o traces --codec zst --tool sstmemtrace.so -- ../stream
+    python -m sstcommon.traces info traces/core0.trace.zst
+
+"stream" writes the accesses of stream.c's triad kernel split across cores
+the way the STREAM generator splits them, without running anything.
+"capture" runs a binary under Prospero's Pin tool ($INTEL_PIN_DIRECTORY/pin)
+and stores the per-thread traces it writes as core<N>.trace.<codec>.
+"""
+import argparse
+import glob
+import gzip
+import hashlib
+import json
+import mmap
+import os
+import re
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+
+from sstcommon.workloads import Workload
+
+
+
+RECORD = struct.Struct("<QcQI")
+CHUNK_RECORDS = 65536
+READ = b"R"
+WRITE = b"W"
+
+# element size of stream.c's double arrays
+STREAM_ELEMENT = 8
+
+
+def _zstd(path, mode):
+    try:
+        import zstandard
+    except ImportError:
+        raise Exception("%s: .zst traces need the zstandard module"%path)
+    if "r" in mode:
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"))
+    return zstandard.ZstdCompressor().stream_writer(open(path, "wb"))
+
+
+def _lz4(path, mode):
+    try:
+        import lz4.frame
+    except ImportError:
+        raise Exception("%s: .lz4 traces need the lz4 module"%path)
+    return lz4.frame.open(path, mode)
+
+
+def _gzip(path, mode):
+    return gzip.open(path, mode)
+
+
+CODECS = {
+    "gz" : _gzip,
+    "zst" : _zstd,
+    "lz4" : _lz4,
+    }
+
+
+def codecOf(path):
+    """The compression of path from its extension, or None."""
+    ext = path.rsplit(".", 1)[-1]
+    return ext if ext in CODECS else None
+
+
+def openTrace(path, mode="rb"):
+    codec = codecOf(path)
+    if codec is None:
+        return open(path, mode)
+    return CODECS[codec](path, mode)
+
+
+
+def _unpack(data, count):
+    unpack = RECORD.unpack_from
+    size = RECORD.size
+    return [unpack(data, i * size) for i in range(count)]
+
+
+def iterChunks(path, chunkRecords=CHUNK_RECORDS):
+    """Yield the records of a trace as lists of (cycle, op, address, length)
+    tuples of up to chunkRecords each."""
+    size = RECORD.size
+    if codecOf(path) is None:
+        with open(path, "rb") as f:
+            length = os.fstat(f.fileno()).st_size
+            if length < size:
+                return
+            view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                end = length - length % size
+                step = chunkRecords * size
+                for start in range(0, end, step):
+                    chunk = view[start:min(start + step, end)]
+                    yield _unpack(chunk, len(chunk) // size)
+            finally:
+                view.close()
+        return
+    f = openTrace(path)
+    try:
+        left = b""
+        while True:
+            data = f.read(chunkRecords * size)
+            if not data:
+                break
+            data = left + data
+            count = len(data) // size
+            yield _unpack(data, count)
+            left = data[count * size:]
+    finally:
+        f.close()
+
+
+def iterRecords(path, chunkRecords=CHUNK_RECORDS):
+    for chunk in iterChunks(path, chunkRecords):
+        for record in chunk:
+            yield record
+
+
+class TraceWriter:
+    """Writes records to a trace, compressed as its extension says."""
+    def __init__(self, path):
+        self.path = path
+        self.records = 0
+        self._file = openTrace(path, "wb")
+        self._pending = []
+
+    def write(self, cycle, op, address, length):
+        self._pending.append(RECORD.pack(cycle, op, address, length))
+        if len(self._pending) >= CHUNK_RECORDS:
+            self._flush()
+
+    def _flush(self):
+        self._file.write(b"".join(self._pending))
+        self.records += len(self._pending)
+        self._pending = []
+
+    def close(self):
+        self._flush()
+        self._file.close()
+
+
+def copyTrace(source, target):
+    """Copy a binary trace, changing its compression to target's."""
+    if codecOf(source) is None and codecOf(target) is None:
+        shutil.copyfile(source, target)
+        return
+    out = openTrace(target, "wb")
+    src = openTrace(source)
+    try:
+        while True:
+            data = src.read(CHUNK_RECORDS * RECORD.size)
+            if not data:
+                break
+            out.write(data)
+    finally:
+        src.close()
+        out.close()
+
+
+def uncompressed(path, cacheDir=None):
+    """The path of an uncompressed copy of a .zst or .lz4 trace, made on
+    first use and redone when the trace is not the one it was made from."""
+    path = os.path.abspath(path)
+    name = os.path.basename(path).rsplit(".", 1)[0]
+    if cacheDir:
+        digest = hashlib.sha256(path.encode("utf-8")).hexdigest()[:16]
+        copy = os.path.join(cacheDir, "%s.%s"%(digest, name))
+    else:
+        copy = os.path.join(os.path.dirname(path), name)
+    found = os.stat(path)
+    source = {"path" : path, "size" : found.st_size, "mtime" : found.st_mtime}
+    sourceFile = copy + ".source"
+    if os.path.exists(copy) and os.path.exists(sourceFile):
+        with open(sourceFile) as f:
+            if json.load(f) == source:
+                return copy
+    if cacheDir and not os.path.isdir(cacheDir):
+        os.makedirs(cacheDir)
+    tmp = "%s.tmp%d"%(copy, os.getpid())
+    copyTrace(path, tmp)
+    os.rename(tmp, copy)
+    with open(tmp, "w") as f:
+        json.dump(source, f)
+    os.rename(tmp, sourceFile)
+    return copy
+
+
+def prosperoReader(path, cacheDir=None):
+    """(Prospero trace reader, file to give it) for a trace."""
+    codec = codecOf(path)
+    if codec == "gz":
+        return ("prospero.ProsperoCompressedBinaryTraceReader", path)
+    if codec is not None:
+        path = uncompressed(path, cacheDir)
+    return ("prospero.ProsperoBinaryTraceReader", path)
+
+
+
+class TraceWorkload(Workload):
+    """Replays one trace per core on a prospero.prosperoCPU."""
+    cpuType = "prospero.prosperoCPU"
+
+    def tracePath(self, core_id):
+        return self.settings['traces'].replace("{core}", str(core_id))
+
+    def validate(self):
+        if 'traces' not in self.settings:
+            raise Exception("Option 'traces' missing from section '%s'"%self.application)
+        if "{core}" not in self.settings['traces']:
+            raise Exception("Option 'traces' of section '%s' needs {core} for the core number"%self.application)
+        if not os.path.exists(self.tracePath(0)):
+            raise Exception('Unable to read trace "%s"'%self.tracePath(0))
+
+    def coreConfig(self, config, core_id):
+        path = self.tracePath(core_id)
+        if not os.path.exists(path):
+            raise Exception('Unable to read trace "%s" of core %d'%(path, core_id))
+        (reader, path) = prosperoReader(path, self.settings.get('cache_dir'))
+        params = dict(config.coreCommonParams())
+        params.update({
+            'max_issue_per_cycle': config.max_reqs_cycle,
+            'max_outstanding': self.settings.get('max_outstanding', 16),
+            'cache_line': 64,
+            'reader': reader,
+            'readerParams.file': os.path.abspath(path),
+            })
+        return params
+
+
+
+def streamTrace(outDir, cores, n, codec=None, cyclesPerElement=1):
+    """Write the traces of stream.c's triad a[i] = b[i] + s * c[i] over n
+    elements, each core taking an equal slice of the three arrays."""
+    array = n * STREAM_ELEMENT
+    share = n // cores
+    paths = []
+    for core in range(cores):
+        path = os.path.join(outDir, "core%d.trace"%core + ("." + codec if codec else ""))
+        writer = TraceWriter(path)
+        first = share * core
+        for i in range(first, first + share):
+            offset = i * STREAM_ELEMENT
+            cycle = (i - first) * cyclesPerElement
+            writer.write(cycle, READ, array + offset, STREAM_ELEMENT)
+            writer.write(cycle, READ, 2 * array + offset, STREAM_ELEMENT)
+            writer.write(cycle, WRITE, offset, STREAM_ELEMENT)
+        writer.close()
+        paths.append(path)
+    return paths
+
+
+def capture(command, outDir, tool, codec=None, pin=None):
+    """Run command under Prospero's Pin tool and keep one trace per thread,
+    numbered by thread, as outDir/core<N>.trace[.codec]."""
+    if pin is None:
+        pin = os.path.join(os.getenv("INTEL_PIN_DIRECTORY", "/dev/null"), "pin")
+    work = tempfile.mkdtemp(prefix="capture", dir=outDir)
+    try:
+        prefix = os.path.join(work, "sstprospero")
+        rc = subprocess.call([pin, "-t", tool, "-o", prefix, "-f", "binary", "--"] + list(command))
+        if rc != 0:
+            raise Exception("%s exited with %d"%(" ".join(command), rc))
+        found = glob.glob(prefix + "-*")
+        if not found:
+            raise Exception("The Pin tool wrote no traces to %s"%work)
+        # sstprospero-<thread>-..., ordered by thread
+        threads = sorted(found, key=lambda p: int(re.match(r"sstprospero-([0-9]+)", os.path.basename(p)).group(1)))
+        paths = []
+        for (core, trace) in enumerate(threads):
+            path = os.path.join(outDir, "core%d.trace"%core + ("." + codec if codec else ""))
+            copyTrace(trace, path)
+            paths.append(path)
+        return paths
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def summarize(path):
+    """{records, reads, writes, bytes, first and last cycle, address range}"""
+    found = {"records" : 0, "reads" : 0, "writes" : 0, "bytes" : 0,
+             "cycles" : None, "addresses" : None}
+    low = high = None
+    first = last = None
+    for chunk in iterChunks(path):
+        if not chunk:
+            continue
+        found["records"] += len(chunk)
+        found["reads"] += sum(1 for r in chunk if r[1] == READ)
+        found["bytes"] += sum(r[3] for r in chunk)
+        addresses = [r[2] for r in chunk]
+        low = min(addresses) if low is None else min(low, min(addresses))
+        high = max(addresses) if high is None else max(high, max(addresses))
+        if first is None:
+            first = chunk[0][0]
+        last = chunk[-1][0]
+    found["writes"] = found["records"] - found["reads"]
+    if first is not None:
+        found["cycles"] = (first, last)
+        found["addresses"] = (low, high)
+    return found
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write and inspect Prospero memory traces")
+    commands = parser.add_subparsers(dest="command")
+    stream = commands.add_parser("stream", help="write the traces of stream.c's triad kernel")
+    stream.add_argument("-o", "--outdir", default="traces")
+    stream.add_argument("--cores", type=int, default=1)
+    stream.add_argument("--n", type=int, default=1000000, help="elements per array")
+    stream.add_argument("--codec", choices=sorted(CODECS), help="compression (default none)")
+    grab = commands.add_parser("capture", help="trace a binary with Prospero's Pin tool")
+    grab.add_argument("-o", "--outdir", default="traces")
+    grab.add_argument("--codec", choices=sorted(CODECS), help="compression (default none)")
+    grab.add_argument("--tool", required=True, help="Prospero's Pin tool (sstmemtrace.so)")
+    grab.add_argument("--pin", help="pin executable (default $INTEL_PIN_DIRECTORY/pin)")
+    grab.add_argument("binary", nargs=argparse.REMAINDER, help="command to trace, after --")
+    info = commands.add_parser("info", help="summarize traces")
+    info.add_argument("traces", nargs="+")
+    args = parser.parse_args(argv)
+
+    if args.command in ("stream", "capture") and not os.path.isdir(args.outdir):
+        os.makedirs(args.outdir)
+    if args.command == "stream":
+        paths = streamTrace(args.outdir, args.cores, args.n, args.codec)
+    elif args.command == "capture":
+        binary = [a for a in args.binary if a != "--"]
+        if not binary:
+            parser.error("give the command to trace after --")
+        paths = capture(binary, args.outdir, args.tool, args.codec, args.pin)
+    elif args.command == "info":
+        for path in args.traces:
+            found = summarize(path)
+            sys.stdout.write("%s: %d records (%d reads, %d writes), %d bytes"%(
+                path, found["records"], found["reads"], found["writes"], found["bytes"]))
+            if found["cycles"]:
+                sys.stdout.write(", cycles %d-%d, addresses 0x%x-0x%x"%(found["cycles"] + found["addresses"]))
+            sys.stdout.write("\n")
+        return
+    else:
+        parser.error("give a command: stream, capture or info")
+    sys.stdout.write("wrote %d traces to %s\n"%(len(paths), args.outdir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""The applications a .cfg file can name in [CPU] application.
+
+Each application maps to a Workload class, which says which CPU component
+runs it, on which port each core's L1 attaches, and what parameters each core
+gets.  The classes are named as "module:Class" and only imported when a
+configuration first uses them, so a driver running Ariel never imports the
+Miranda tables.  Another application is added with
+
+    register("miranda.CopyGenerator", "mypackage.copy:CopyWorkload")
+
+or with the class itself.  The application's options are the .cfg section of
+the same name; validate() checks them when the configuration is read.
+"""
+import os
+
+from sstcommon.params import FrozenParams
+
+
+
+class Workload:
+    """An application run by one CPU component per core."""
+    cpuType = None
+    # one component drives every core (Ariel)
+    sharedCPU = False
+
+    def __init__(self, application, settings):
+        self.application = application
+        self.settings = settings
+
+    def validate(self):
+        pass
+
+    def cpuPort(self, core_id):
+        return "cache_link"
+
+    def coreConfig(self, config, core_id):
+        """The parameters of core core_id of config."""
+        raise Exception("Workload %s does not define coreConfig"%self.application)
+
+
+
+class ArielWorkload(Workload):
+    """A binary run by Ariel under Pin; the [ariel] section holds the ariel
+    component's parameters, starting with the executable."""
+    cpuType = "ariel.ariel"
+    sharedCPU = True
+
+    def __init__(self, application, settings):
+        Workload.__init__(self, application, settings)
+        self._params = None
+
+    def validate(self):
+        if 'executable' not in self.settings and 'OMP_EXE' not in os.environ:
+            raise Exception("No Ariel executable specified")
+
+    def cpuPort(self, core_id):
+        return "cache_link_%d"%core_id
+
+    def coreConfig(self, config, core_id):
+        # A single Ariel component drives every core, so this never varies.
+        if self._params is None:
+            params = dict(config.coreCommonParams())
+            params.update(config.arielDefaults())
+            params.update(self.settings)
+            if 'executable' not in params:
+                params['OMP_EXE'] = os.environ['OMP_EXE']
+            self._params = FrozenParams(params)
+        return self._params
+
+
+
+_MIRANDA = "sstcommon.generators:MirandaWorkload"
+
+WORKLOADS = {
+    "ariel" : ArielWorkload,
+    "miranda.STREAMBenchGenerator" : _MIRANDA,
+    "miranda.GUPSGenerator" : _MIRANDA,
+    "miranda.RandomGenerator" : _MIRANDA,
+    "miranda.SingleStreamGenerator" : _MIRANDA,
+    "miranda.Stencil3DBenchGenerator" : _MIRANDA,
+    "prospero" : "sstcommon.traces:TraceWorkload",
+    }
+
+
+def register(application, workload):
+    """Make application available, as a Workload class or "module:Class"."""
+    WORKLOADS[application] = workload
+
+
+def workloadClass(application):
+    if application not in WORKLOADS:
+        raise Exception("Unknown application '%s'"%application)
+    workload = WORKLOADS[application]
+    if isinstance(workload, str):
+        (module, name) = workload.split(":")
+        workload = getattr(__import__(module, fromlist=[name]), name)
+        WORKLOADS[application] = workload
+    return workload
+
+
+def loadWorkload(application, settings):
+    """The validated Workload of application, with settings from its section."""
+    workload = workloadClass(application)(application, settings)
+    workload.validate()
+    return workload
@@ -0,0 +1,143 @@
+#ifndef _ACTIVITY_TRACE_H
+#define _ACTIVITY_TRACE_H
+
+// Binary event trace shared by all components in a process.
+//
+// The file starts with a 16 byte header (8 byte magic, uint32 version,
+// uint32 record size) followed by fixed-width TraceRecords, all in host
+// byte order; trace_decode.py tells little- from big-endian files by the
+// version and record size in the header.  Each component fills its own
+// buffer of records and appends it to the file as one block, so records of
+// different components are grouped in blocks rather than sorted by tick.
+//
+#include <cstdint>
+#include <cstdio>
+#include <mutex>
+#include <stdexcept>
+#include <string>
+#include <vector>
+
+namespace ExampleTwo
+{
+    // Event types, matching "event type" in the JSON log.
+    const uint32_t TRACE_SEND    = 0;
+    const uint32_t TRACE_RECEIVE = 1;
+
+    // Port numbers: port_a, port_b, then port_0 .. port_5.
+    const uint32_t TRACE_PORT_A = 0;
+    const uint32_t TRACE_PORT_B = 1;
+    const uint32_t TRACE_PORT_0 = 2;
+
+    const char     TRACE_MAGIC[8] = {'S','S','T','A','C','T','V','1'};
+    const uint32_t TRACE_VERSION  = 1;
+
+    struct TraceRecord
+    {
+        uint64_t componentId;
+        uint64_t tick;
+        uint32_t port;
+        uint32_t eventType;
+    };
+
+    // One output file per process, opened by the first component that
+    // traces and closed when the last one is done with it.
+    //
+    class TraceFile
+    {
+    public:
+        static FILE* open(const std::string &path)
+        {
+            std::lock_guard<std::mutex> lock(mutex());
+            if (0 == users()++)
+            {
+                file() = fopen(path.c_str(), "wb");
+                if (nullptr == file())
+                {
+                    users() = 0;
+                    throw std::runtime_error("Unable to open trace file " + path);
+                }
+                uint32_t header[2] = { TRACE_VERSION, sizeof(TraceRecord) };
+                fwrite(TRACE_MAGIC, sizeof(TRACE_MAGIC), 1, file());
+                fwrite(header, sizeof(header), 1, file());
+            }
+            return file();
+        }
+
+        // fwrite() locks the stream, so blocks from different threads do
+        // not interleave.
+        static void write(const TraceRecord *records, size_t count)
+        {
+            if (count > 0)
+            {
+                fwrite(records, sizeof(TraceRecord), count, file());
+            }
+        }
+
+        static void close()
+        {
+            std::lock_guard<std::mutex> lock(mutex());
+            if (users() > 0 && 0 == --users())
+            {
+                fclose(file());
+                file() = nullptr;
+            }
+        }
+
+    private:
+        static std::mutex& mutex() { static std::mutex m; return m; }
+        static FILE*& file() { static FILE* f = nullptr; return f; }
+        static unsigned int& users() { static unsigned int n = 0; return n; }
+    };
+
+    // Fixed-size buffer of records for one component.  When it fills, the
+    // whole buffer is written as a single block and reused.
+    //
+    class TraceBuffer
+    {
+    public:
+        TraceBuffer() : count_(0) {}
+
+        void open(const std::string &path, size_t records)
+        {
+            records_.resize(records > 0 ? records : 1);
+            TraceFile::open(path);
+        }
+
+        bool isOpen() const { return !records_.empty(); }
+
+        void add(uint64_t componentId, uint64_t tick, uint32_t port, uint32_t eventType)
+        {
+            TraceRecord &r = records_[count_++];
+            r.componentId = componentId;
+            r.tick = tick;
+            r.port = port;
+            r.eventType = eventType;
+            if (count_ == records_.size())
+            {
+                flush();
+            }
+        }
+
+        void flush()
+        {
+            TraceFile::write(records_.data(), count_);
+            count_ = 0;
+        }
+
+        void close()
+        {
+            if (isOpen())
+            {
+                flush();
+                TraceFile::close();
+                records_.clear();
+            }
+        }
+
+    private:
+        std::vector<TraceRecord> records_;
+        size_t count_;
+    };
+}
+
+#endif
@@ -1,25 +1,44 @@
 # Execute from the command line with the command:
-#   sst ExampleConfig.py 2>&1 | tee test.log
+#   sst config_network.py <clock ticks> <number of nodes> [log|binary] [options]
 #
+# builds a ring of ExampleComponents: link<i> joins port_a of node_<i+1> to
+# port_b of node_<i>, and the last link closes the ring.  Options:
+#
+#   --chords S[,S...]  up to three more rings over port_0..port_5: for the
+#                      j-th stride S, port_<2j> of node_<i> is linked to
+#                      port_<2j+1> of node_<i+S>
+#   --debug LEVEL      component log level (default 3, which the heatmap
+#                      needs; use 1 with the binary trace for large rings)
+#   --mode event       components handle events as they arrive and only
+#                      clock while some wait, instead of polling every cycle
+#   --dry-run          build the model, report the build time and stop
+#                      the simulation before the first tick
+#
+# Every node shares one parameter dict and the names are generated up front,
+# so building a ring takes the same Python work per node at any size:
+#
+#   sst config_network.py 10 1000000 binary --debug 1 --chords 1000 --dry-run
+#
+import argparse
+import time
+
 import sst
-import sys
 
-if len(sys.argv)!=3:
-    print("ERROR: two arguments required:")
-    print("   number of clock ticks [integer]>0")
-    print("   number of nodes [integer]>0")
-    exit()
-try:
-    clockTicks = int(sys.argv[1])
-except ValueError:
-    print("ERROR for arg 1: number of clock ticks [integer]>0")
-    exit()
+parser = argparse.ArgumentParser(description="Ring of ExampleComponents")
+parser.add_argument("clockTicks", type=int, help="number of clock ticks [integer]>0")
+parser.add_argument("number_of_nodes", type=int, help="number of nodes [integer]>0")
+parser.add_argument("trace", nargs="?", default="log", choices=("log", "binary"), help="trace mode")
+parser.add_argument("--chords", default="", help="strides of extra rings over port_0..port_5")
+parser.add_argument("--debug", default="3", choices=[str(level) for level in range(6)],
+                    help="0 = FATAL, 1 = WARN, 2 = INFO, 3 = DEBUG, 4 = TRACE, 5 = ALL")
+parser.add_argument("--mode", default="clock", choices=("clock", "event"),
+                    help="poll port_b every cycle, or handle events as they arrive")
+parser.add_argument("--dry-run", action="store_true", help="build only, and report the build time")
+args = parser.parse_args()
 
-try:
-    number_of_nodes = int(sys.argv[2])
-except ValueError:
-    print("ERROR for arg 2: number of nodes [integer]>0")
-    exit()
+clockTicks = args.clockTicks
+number_of_nodes = args.number_of_nodes
+trace = args.trace
 
 if clockTicks<1:
     print("ERROR: clockTicks less than 1 creates an infinite loop")
@@ -28,51 +47,70 @@ if number_of_nodes<1:
     print("ERROR: invalid configuration")
     exit()
 
+strides = [int(stride) for stride in args.chords.split(",") if stride.strip()]
+if len(strides) > 3:
+    print("ERROR: at most three chord strides, one per pair of port_0..port_5")
+    exit()
+for stride in strides:
+    if stride % number_of_nodes == 0:
+        print("ERROR: chord stride " + str(stride) + " links every node to itself")
+        exit()
+
 print("ticks:",clockTicks)
 print("nodes:",number_of_nodes)
+
+started = time.time()
+
 # Initialize local variables.
 #
-clockTicks = sys.argv[1]   # Number of clock ticks before the simulation ends
 clock = "1GHz"      # Simulation clock rate
-debug = "3"         # debug level
-                    # 0 = FATAL, 1 = WARN, 2 = INFO, 3 = DEBUG, 4 = TRACE, 5 = ALL
-
+trace_file = "activity_trace.bin"   # used when trace is "binary"
 link_delay="0ns"
 
 # Define the component.
 #
 # The parameters are a dictionary and can be any key/value pair defined
-# by the component itself.
+# by the component itself; sst copies them, so every node gets this one.
 #
 # The second parameter is <library>.<registered_name>
 # These correspond to the second and third parameters of the
 # SST_ELI_REGISTER_COMPONENT macro in Example00Component.h,
 # respectively.
 #
-#number_of_nodes = int(sys.argv[2])
-
-node_dict = {}
-
-node_dict[0] = sst.Component("node_0", "twoexample.ExampleComponent")
-node_dict[0].addParams({
+params = {
     "clock"      : clock,
-    "clockTicks" : clockTicks,
-    "debug"      : debug
-})
+    "clockTicks" : str(clockTicks),
+    "debug"      : args.debug,
+    "trace"      : trace,
+    "traceFile"  : trace_file,
+    "mode"       : args.mode
+}
 
-link_index = 0
-for index in range(1,number_of_nodes):
+names = ["node_%d"%index for index in range(number_of_nodes)]
+nodes = [None] * number_of_nodes
+for index in range(number_of_nodes):
+    node = sst.Component(names[index], "twoexample.ExampleComponent")
+    node.addParams(params)
+    nodes[index] = node
 
-    node_dict[index] = sst.Component("node_"+str(index), "twoexample.ExampleComponent")
-    node_dict[index].addParams({
-        "clock"      : clock,
-        "clockTicks" : clockTicks,
-        "debug"      : debug
-    })
+link_names = ["link%d"%index for index in range(number_of_nodes * (1 + len(strides)))]
+for index in range(1,number_of_nodes):
+    sst.Link(link_names[index-1]).connect((nodes[index], "port_a", link_delay),
+                                          (nodes[index-1], "port_b", link_delay))
+link_index = number_of_nodes - 1
+sst.Link(link_names[link_index]).connect((nodes[number_of_nodes-1], "port_b", link_delay),
+                                         (nodes[0], "port_a", link_delay))
+link_index += 1
 
-    sst.Link("link"+str(link_index)).connect((node_dict[index], "port_a", link_delay),
-                                             (node_dict[index-1], "port_b",  link_delay))
-    link_index+=1
+for (chord, stride) in enumerate(strides):
+    out_port = "port_%d"%(2 * chord)
+    in_port = "port_%d"%(2 * chord + 1)
+    for index in range(number_of_nodes):
+        sst.Link(link_names[link_index]).connect((nodes[index], out_port, link_delay),
+                                                 (nodes[(index + stride) % number_of_nodes], in_port, link_delay))
+        link_index += 1
 
-sst.Link("link"+str(link_index)).connect((node_dict[number_of_nodes-1], "port_b", link_delay),
-                                         (node_dict[0], "port_a",  link_delay))
+if args.dry_run:
+    print("built %d nodes and %d links in %.3fs"%(number_of_nodes, link_index, time.time() - started))
+    # run construction and init only; a stop-at of 0ns would mean no stop time
+    sst.setProgramOption("run-mode", "init")
@@ -0,0 +1,155 @@
+# Sender x receiver event counts as a scipy.sparse matrix
+#
+#   matrix = interaction_matrix.InteractionMatrix(window_ticks=1000)
+#   for frame in log_ingest.iter_frames('simulation.log'):
+#       matrix.add_events(frame, links)
+#   interaction_matrix.plot(matrix.total())
+#
+# Counts are added a chunk at a time, so the log never has to be in memory
+# and no dense N x N array is built; plot() sums the matrix into at most
+# max_pixels x max_pixels blocks before drawing it.
+#
+import numpy
+import scipy.sparse
+import scipy.sparse.csgraph
+
+import log_ingest
+
+# pending (sender, receiver) pairs are folded into the sparse sum once
+# there are this many of them
+COMPACT_SIZE = 1000000
+
+
+class InteractionMatrix:
+    """Running count of events sent from component i to component j.
+
+    With window_ticks, counts are also kept per window of that many ticks
+    so the interaction pattern can be followed over time.
+    """
+
+    def __init__(self, num_components=0, window_ticks=None):
+        self.num_components = num_components
+        self.window_ticks = window_ticks
+        self._total = None
+        self._windows = {}
+        self._pending = []
+        self._pending_size = 0
+
+    def add(self, senders, receivers, ticks=None):
+        """Count one event per (senders[k], receivers[k])."""
+        senders = numpy.asarray(senders, dtype=numpy.int64)
+        receivers = numpy.asarray(receivers, dtype=numpy.int64)
+        if not len(senders):
+            return
+        self.num_components = max(self.num_components,
+                                  int(senders.max()) + 1, int(receivers.max()) + 1)
+        if self.window_ticks is None:
+            windows = numpy.zeros(len(senders), dtype=numpy.int64)
+        else:
+            windows = numpy.asarray(ticks, dtype=numpy.int64) // self.window_ticks
+        self._pending.append((windows, senders, receivers))
+        self._pending_size += len(senders)
+        if self._pending_size >= COMPACT_SIZE:
+            self._compact()
+
+    def add_events(self, records, links):
+        """Count the send events of a log_ingest/trace_decode record array,
+        using a link_table.LinkTable to find each receiver."""
+        sends = records[records['event type'] == log_ingest.EVENT_CODES['send']]
+        receivers, _ = links.peer(sends['component id'], sends['port'])
+        connected = receivers >= 0
+        self.add(sends['component id'][connected].astype(numpy.int64),
+                 receivers[connected], sends['on tick'][connected])
+
+    def _coo(self, senders, receivers, shape):
+        counts = numpy.ones(len(senders), dtype=numpy.int64)
+        return scipy.sparse.coo_matrix((counts, (senders, receivers)), shape=shape).tocsr()
+
+    def _accumulate(self, matrix, update):
+        if matrix is None:
+            return update
+        if matrix.shape != update.shape:
+            matrix = matrix.copy()
+            matrix.resize(update.shape)
+        return matrix + update
+
+    def _compact(self):
+        if not self._pending:
+            return
+        windows = numpy.concatenate([p[0] for p in self._pending])
+        senders = numpy.concatenate([p[1] for p in self._pending])
+        receivers = numpy.concatenate([p[2] for p in self._pending])
+        self._pending = []
+        self._pending_size = 0
+
+        shape = (self.num_components, self.num_components)
+        self._total = self._accumulate(self._total, self._coo(senders, receivers, shape))
+        if self.window_ticks is not None:
+            order = numpy.argsort(windows, kind='stable')
+            windows, senders, receivers = windows[order], senders[order], receivers[order]
+            starts = numpy.flatnonzero(numpy.r_[True, windows[1:] != windows[:-1]])
+            ends = numpy.r_[starts[1:], len(windows)]
+            for start, end in zip(starts, ends):
+                window = int(windows[start])
+                update = self._coo(senders[start:end], receivers[start:end], shape)
+                self._windows[window] = self._accumulate(self._windows.get(window), update)
+
+    def total(self):
+        """Counts over the whole run as a CSR matrix."""
+        self._compact()
+        if self._total is None:
+            return scipy.sparse.csr_matrix((self.num_components, self.num_components), dtype=numpy.int64)
+        if self._total.shape[0] != self.num_components:
+            self._total.resize((self.num_components, self.num_components))
+        return self._total
+
+    def snapshots(self):
+        """Yield (first tick, CSR matrix) for every window that has events."""
+        if self.window_ticks is None:
+            raise ValueError('InteractionMatrix was built without window_ticks')
+        self._compact()
+        shape = (self.num_components, self.num_components)
+        for window in sorted(self._windows):
+            matrix = self._windows[window]
+            if matrix.shape != shape:
+                matrix.resize(shape)
+            yield window * self.window_ticks, matrix
+
+
+def cluster_order(matrix):
+    """A component order that places components that interact next to each
+    other (reverse Cuthill-McKee on the symmetrised matrix)."""
+    symmetric = (matrix + matrix.T).tocsr()
+    return scipy.sparse.csgraph.reverse_cuthill_mckee(symmetric, symmetric_mode=True)
+
+
+def block_sums(matrix, block_size, order=None):
+    """Sum matrix over block_size x block_size tiles and return the small
+    dense result.  order, if given, permutes the components first."""
+    n = matrix.shape[0]
+    if order is None:
+        order = numpy.arange(n)
+    num_blocks = (n + block_size - 1) // block_size
+    # row k of the aggregator puts component order[k] into block k // block_size
+    aggregator = scipy.sparse.csr_matrix(
+        (numpy.ones(n, dtype=numpy.int64), (order, numpy.arange(n) // block_size)),
+        shape=(n, num_blocks))
+    return (aggregator.T @ matrix @ aggregator).toarray()
+
+
+def plot(matrix, max_pixels=512, cluster=True, ax=None, title='events sent (row) to receiver (column)'):
+    """Draw the matrix, summed into blocks so that at most max_pixels
+    blocks are drawn along each axis."""
+    import matplotlib.pyplot as plt
+    n = matrix.shape[0]
+    block_size = max(1, (n + max_pixels - 1) // max_pixels)
+    order = cluster_order(matrix) if cluster else None
+    blocks = block_sums(matrix, block_size, order)
+    if ax is None:
+        _, ax = plt.subplots()
+    im = ax.imshow(blocks, interpolation='nearest')
+    ax.figure.colorbar(im, ax=ax)
+    if block_size > 1:
+        title += ' (%d components per block)' % block_size
+    ax.set_title(title)
+    return ax
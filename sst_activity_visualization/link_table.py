@@ -0,0 +1,78 @@
+# Look up the far end of every link in config_network.json
+#
+#   links = link_table.LinkTable.from_json('config_network.json')
+#   to_id, to_port = links.peer(sends['component id'], sends['port'])
+#
+# SST numbers components in the order the Python driver creates them, which
+# is the order of "components" in the JSON written by --output-json, so the
+# component ids in the log can be matched to the names used by the links.
+# Ports are the codes of trace_decode.PORTS.
+#
+import json
+
+import numpy
+
+from trace_decode import PORTS
+
+PORT_CODES = {name: code for code, name in enumerate(PORTS)}
+
+
+class LinkTable:
+    """(component id, port) -> (peer component id, peer port), for both
+    ends of every link, held as sorted NumPy arrays."""
+
+    def __init__(self, network):
+        self.component_names = [component['name'] for component in network['components']]
+        self.component_ids = {}
+        for index, component in enumerate(network['components']):
+            self.component_ids[component['name']] = int(component.get('id', index))
+
+        left_id, left_port, right_id, right_port = [], [], [], []
+        for link in network['links']:
+            left_id.append(self.component_ids[link['left']])
+            left_port.append(PORT_CODES[link['leftPort']])
+            right_id.append(self.component_ids[link['right']])
+            right_port.append(PORT_CODES[link['rightPort']])
+
+        # each link is entered twice, once from each end
+        src_id = numpy.array(left_id + right_id, dtype=numpy.uint64)
+        src_port = numpy.array(left_port + right_port, dtype=numpy.uint64)
+        dst_id = numpy.array(right_id + left_id, dtype=numpy.uint64)
+        dst_port = numpy.array(right_port + left_port, dtype=numpy.uint64)
+
+        keys = self._keys(src_id, src_port)
+        order = numpy.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        if len(self.keys) > 1 and numpy.any(self.keys[1:] == self.keys[:-1]):
+            raise ValueError('a component port is connected to more than one link')
+        self.peer_id = dst_id[order]
+        self.peer_port = dst_port[order]
+
+    @classmethod
+    def from_json(cls, path):
+        with open(path, 'r') as file_handle:
+            return cls(json.load(file_handle))
+
+    @staticmethod
+    def _keys(component_ids, ports):
+        return (numpy.asarray(component_ids, dtype=numpy.uint64) * numpy.uint64(len(PORTS))
+                + numpy.asarray(ports, dtype=numpy.uint64))
+
+    def peer(self, component_ids, ports):
+        """Peer component ids and ports for arrays of (component id, port).
+
+        Unconnected ports get component id -1 and port -1.
+        """
+        keys = self._keys(component_ids, ports)
+        if not len(self.keys):
+            missing = numpy.full(len(keys), -1, dtype=numpy.int64)
+            return missing, missing.copy()
+        index = numpy.searchsorted(self.keys, keys)
+        index[index == len(self.keys)] = 0
+        found = self.keys[index] == keys
+        peer_id = numpy.where(found, self.peer_id[index].astype(numpy.int64), -1)
+        peer_port = numpy.where(found, self.peer_port[index].astype(numpy.int64), -1)
+        return peer_id, peer_port
+
+    def name(self, component_id):
+        return self.component_names[component_id]
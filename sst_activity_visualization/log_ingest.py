@@ -0,0 +1,99 @@
+# Read the send/receive events of a simulation log into NumPy record arrays
+#
+#   import log_ingest
+#   for frame in log_ingest.iter_frames('simulation.log'):
+#       ...
+#
+# Works on both simulation.log (logger prefix still in front of each JSON
+# payload) and simulation.dat (JSON only).  Lines are streamed and parsed
+# in batches, so a log never has to fit in memory as text; each batch comes
+# back with the same dtype as trace_decode.read_trace(), so the analysis
+# does not care whether the run used the JSON log or the binary trace.
+#
+import json
+
+import numpy
+
+from trace_decode import RECORD, EVENT_TYPES, PORTS
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    loads = json.loads
+
+BATCH_SIZE = 100000
+
+EVENT_CODES = {name: code for code, name in enumerate(EVENT_TYPES)}
+PORT_CODES = {name: code for code, name in enumerate(PORTS)}
+
+
+def iter_payloads(path):
+    """Yield the JSON text of every line of path that carries an event."""
+    with open(path, 'r') as file_handle:
+        for line in file_handle:
+            start = line.find('{')
+            if start < 0:
+                continue
+            end = line.rfind('}')
+            if end > start:
+                yield line[start:end + 1]
+
+
+def parse_batch(payloads):
+    """Parse a list of JSON payloads, dropping any that are malformed."""
+    try:
+        return loads('[' + ','.join(payloads) + ']')
+    except ValueError:
+        events = []
+        for payload in payloads:
+            try:
+                events.append(loads(payload))
+            except ValueError:
+                pass
+        return events
+
+
+def to_records(events):
+    """Convert parsed events to a RECORD array."""
+    events = [event for event in events if event.get('event type') in EVENT_CODES]
+    records = numpy.empty(len(events), dtype=RECORD)
+    sends = [event['event type'] == 'send' for event in events]
+    records['event type'] = [EVENT_CODES[event['event type']] for event in events]
+    records['component id'] = [int(event['from component id'] if send else event['to component id'])
+                               for event, send in zip(events, sends)]
+    records['port'] = [PORT_CODES[event['from port'] if send else event['to port']]
+                       for event, send in zip(events, sends)]
+    records['on tick'] = [int(event['on tick']) for event in events]
+    return records
+
+
+def iter_frames(path, batch_size=BATCH_SIZE):
+    """Yield the events of a log as RECORD arrays of up to batch_size rows."""
+    batch = []
+    for payload in iter_payloads(path):
+        batch.append(payload)
+        if len(batch) == batch_size:
+            yield to_records(parse_batch(batch))
+            batch = []
+    if batch:
+        yield to_records(parse_batch(batch))
+
+
+def read_log(path, batch_size=BATCH_SIZE):
+    """All events of a log as one RECORD array."""
+    frames = list(iter_frames(path, batch_size))
+    if not frames:
+        return numpy.empty(0, dtype=RECORD)
+    return numpy.concatenate(frames)
+
+
+def to_dataframe(records):
+    """A pandas DataFrame of records, with event type and port as names."""
+    import pandas
+    return pandas.DataFrame({
+        'event type': pandas.Categorical.from_codes(records['event type'], EVENT_TYPES),
+        'component id': records['component id'],
+        'port': pandas.Categorical.from_codes(records['port'], PORTS),
+        'on tick': records['on tick'],
+    })
@@ -7,6 +7,8 @@
 #include <vector>
 // sleep
 #include <unistd.h>
+// rank, for the trace file name
+#include <sst/core/simulation.h>
 
 using namespace ExampleTwo; // defined in the .h which was included above
 
@@ -15,7 +17,11 @@ using namespace ExampleTwo; // defined in the .h which was included above
 ExampleComponent::ExampleComponent(SST::ComponentId_t id, SST::Params &params) :
     SST::Component(id),
     componentId_(id),
-    clockTickCount_(0)
+    clockTickCount_(0),
+    eventMode_(false),
+    clockTC_(nullptr),
+    clockHandler_(nullptr),
+    clockRunning_(true)
 {
     // Read in the parameters from the python config file.  See SST_ELI_DOCUMENT_PARAMS
     // for an explanation of what each parameter represents.
@@ -26,6 +32,14 @@ ExampleComponent::ExampleComponent(SST::ComponentId_t id, SST::Params &params) :
         params.find<int>("clockTicks", 10));
     unsigned int debug =
         params.find<int>("debug", ALL);
+    std::string trace =
+        params.find<std::string>("trace", "log");
+    std::string traceFile =
+        params.find<std::string>("traceFile", "activity_trace.bin");
+    size_t traceBufferRecords = static_cast<size_t>(
+        params.find<int>("traceBufferRecords", 4096));
+    std::string mode =
+        params.find<std::string>("mode", "clock");
 
     // Create the logger.
     //
@@ -38,15 +52,50 @@ ExampleComponent::ExampleComponent(SST::ComponentId_t id, SST::Params &params) :
     logger_.verbose(CALL_INFO, INFO,  0x00, "Initializing component %lu.\n", id);
     logger_.verbose(CALL_INFO, DEBUG, 0x00, "Parameters successfully read from config file.\n");
     logger_.verbose(CALL_INFO, DEBUG, 0x00, "clockTicks = %lu\n", clockTicks_);
+
+    // In binary mode send/receive events go to a shared trace file instead
+    // of the logger.  Each rank writes its own file.
+    //
+    if (trace == "binary")
+    {
+        SST::Simulation* sim = SST::Simulation::getSimulation();
+        if (sim->getNumRanks().rank > 1)
+        {
+            traceFile += "." + std::to_string(sim->getRank().rank);
+        }
+        trace_.open(traceFile, traceBufferRecords);
+        logger_.verbose(CALL_INFO, DEBUG, 0x00, "Writing binary trace to %s\n", traceFile.c_str());
+    }
+    else if (trace != "log")
+    {
+        logger_.fatal(CALL_INFO, -1, "Unknown trace mode %s for component %lu\n", trace.c_str(), componentId_);
+    }
+    if (mode == "event")
+    {
+        eventMode_ = true;
+    }
+    else if (mode != "clock")
+    {
+        logger_.fatal(CALL_INFO, -1, "Unknown mode %s for component %lu\n", mode.c_str(), componentId_);
+    }
     logger_.verbose(CALL_INFO, INFO,  0x00, "Constructing new Example Instance.\n");
 
     // Configure the links (connections to other components).
     // The link is associated with a component's registered port.
-    // No handler for this example.
+    // In clock mode port_b has no handler and is polled; in event mode its
+    // events are delivered to handleEvent.
     //
     logger_.verbose(CALL_INFO, DEBUG, 0x00, "Configuring link.\n");
     port_a = configureLink("port_a");
-    port_b = configureLink("port_b");
+    if (eventMode_)
+    {
+        port_b = configureLink("port_b",
+            new SST::Event::Handler<ExampleComponent>(this, &ExampleComponent::handleEvent));
+    }
+    else
+    {
+        port_b = configureLink("port_b");
+    }
     std::vector<SST::Link*> ports;
 
     // from https://chryswoods.com/beginning_c++/lists.html
@@ -69,9 +118,19 @@ ExampleComponent::ExampleComponent(SST::ComponentId_t id, SST::Params &params) :
 
     // Configure the component clock.
     //
+    // In event mode the clock stops itself whenever no event is waiting and
+    // handleEvent starts it again.
+    //
     logger_.verbose(CALL_INFO, DEBUG, 0x00, "Clock rate is: %s for %lu\n", clock.c_str(), componentId_);
-    registerClock(clock,
-        new SST::Clock::Handler<ExampleComponent>(this, &ExampleComponent::clockTick));
+    if (eventMode_)
+    {
+        clockHandler_ = new SST::Clock::Handler<ExampleComponent>(this, &ExampleComponent::eventTick);
+    }
+    else
+    {
+        clockHandler_ = new SST::Clock::Handler<ExampleComponent>(this, &ExampleComponent::clockTick);
+    }
+    clockTC_ = registerClock(clock, clockHandler_);
     logger_.verbose(CALL_INFO, INFO,  0x00, "Successfully initialized clock for %lu.\n", componentId_);
 
     // Register this component with the simulation.
@@ -93,6 +152,12 @@ ExampleComponent::ExampleComponent(SST::ComponentId_t id, SST::Params &params) :
 void ExampleComponent::setup(void)
 {
     logger_.verbose(CALL_INFO, TRACE, 0x00, "Entering setup for component id %lu\n", componentId_);
+    // In event mode every component puts one event on the ring to start.
+    if (eventMode_)
+    {
+        recordSend();
+        port_a->send(new ExampleEvent());
+    }
     logger_.verbose(CALL_INFO, TRACE, 0x00, "Leaving setup for component id %lu\n", componentId_);
 }
 
@@ -103,6 +168,7 @@ void ExampleComponent::setup(void)
 void ExampleComponent::finish(void)
 {
     logger_.verbose(CALL_INFO, TRACE, 0x00, "Entering finish for component id %lu\n", componentId_);
+    trace_.close();
     logger_.verbose(CALL_INFO, TRACE, 0x00, "Leaving finish for component id %lu\n", componentId_);
 }
 
@@ -116,7 +182,7 @@ bool ExampleComponent::clockTick(SST::Cycle_t cycle)
 
     // Poll the link for incoming messages and process them as necessary.
     //
-    logger_.verbose(CALL_INFO, DEBUG, 0x00, "{\"event type\": \"receive\", \"to port\": \"port_b\", \"to component id\": \"%lu\", \"on tick\": \"%lu\"}\n", componentId_, clockTickCount_);
+    recordReceive();
     ExampleEvent* ev = static_cast<ExampleEvent*>(port_b->recv());
 
     // nullptr is a keyword that can be used at all places where NULL is expected.
@@ -145,9 +211,79 @@ bool ExampleComponent::clockTick(SST::Cycle_t cycle)
 
     // Send an event over the link.
     //
-    logger_.verbose(CALL_INFO, INFO, 0x00, "{\"event type\": \"send\", \"from port\": \"port_a\", \"from component id\": \"%lu\", \"on tick\": \"%lu\"}\n", componentId_, clockTickCount_);
+    recordSend();
     port_a->send(ev);
 
     logger_.verbose(CALL_INFO, TRACE, 0x00, "Leaving clock for component %lu\n", componentId_);
     return done;
 }
+
+
+// Event mode: an event arrived on port_b.  Queue it for the clock, and start
+// the clock if it had stopped.
+//
+void ExampleComponent::handleEvent(SST::Event* ev)
+{
+    recordReceive();
+    pending_.push_back(ev);
+    if (!clockRunning_)
+    {
+        reregisterClock(clockTC_, clockHandler_);
+        clockRunning_ = true;
+    }
+}
+
+
+// Event mode clock handler: forward one waiting event per cycle, and stop
+// the clock (by returning true) once none are left.
+//
+bool ExampleComponent::eventTick(SST::Cycle_t cycle)
+{
+    if (!pending_.empty())
+    {
+        SST::Event* ev = pending_.front();
+        pending_.pop_front();
+
+        clockTickCount_+= 1;
+        logger_.verbose(CALL_INFO, INFO, 0x00, "Clock tick count for component %lu : %lu out of %lu\n", componentId_, clockTickCount_, clockTicks_);
+        if (clockTickCount_ == clockTicks_)
+        {
+            logger_.verbose(CALL_INFO, INFO, 0x00, "Ending sim for component %lu.\n", componentId_);
+            primaryComponentOKToEndSim();
+        }
+
+        recordSend();
+        port_a->send(ev);
+    }
+    clockRunning_ = !pending_.empty();
+    return !clockRunning_;
+}
+
+
+// Record a receive on port_b or a send on port_a, in the binary trace or
+// as a JSON log line.
+//
+void ExampleComponent::recordReceive()
+{
+    if (trace_.isOpen())
+    {
+        trace_.add(componentId_, clockTickCount_, TRACE_PORT_B, TRACE_RECEIVE);
+    }
+    else
+    {
+        logger_.verbose(CALL_INFO, DEBUG, 0x00, "{\"event type\": \"receive\", \"to port\": \"port_b\", \"to component id\": \"%lu\", \"on tick\": \"%lu\"}\n", componentId_, clockTickCount_);
+    }
+}
+
+
+void ExampleComponent::recordSend()
+{
+    if (trace_.isOpen())
+    {
+        trace_.add(componentId_, clockTickCount_, TRACE_PORT_A, TRACE_SEND);
+    }
+    else
+    {
+        logger_.verbose(CALL_INFO, INFO, 0x00, "{\"event type\": \"send\", \"from port\": \"port_a\", \"from component id\": \"%lu\", \"on tick\": \"%lu\"}\n", componentId_, clockTickCount_);
+    }
+}
@@ -18,6 +18,12 @@
 
 #include <sst/core/link.h>
 
+// events waiting for the clock in event mode
+#include <deque>
+
+// binary event trace (see trace_decode.py)
+#include "ActivityTrace.h"
+
 
 // not strictly necessary to create a C++ namespace but is useful to prevent name clashes
 namespace ExampleTwo
@@ -38,6 +44,10 @@ namespace ExampleTwo
     // This is a very simple component.  It only registers a clock and
     // prints log messages as the clock handler is called.
     //
+    // With "mode" set to "event" it does not poll: events arriving on port_b
+    // go to a handler, and the clock only runs while some are waiting to be
+    // forwarded on port_a.
+    //
     // all components inherit from SST::Component
     //
     class ExampleComponent : public SST::Component
@@ -69,13 +79,23 @@ namespace ExampleTwo
             //
             bool clockTick(SST::Cycle_t cycle);
 
+            // Event mode: port_b's handler, and the clock handler that
+            // forwards one waiting event per cycle.
+            //
+            void handleEvent(SST::Event* ev);
+            bool eventTick(SST::Cycle_t cycle);
+
             // Shared documentation macros.
             // see https://sst-simulator.org/SSTPages/SSTDeveloperNewELIMigrationGuide/#parameters
             SST_ELI_DOCUMENT_PARAMS(
                 // triples of "name", "description", "default value"
                 { "debug", "Debug location:  (0: NONE, 1: STDOUT, 2: STDERR, 3: FILE)", "0" },
                 { "clock", "Component clock rate", "1GHz" },
-                { "clockTicks", "Number of times the handler is called before ending.", "10" }
+                { "clockTicks", "Number of times the handler is called before ending.", "10" },
+                { "trace", "How send/receive events are recorded:  log (JSON through the logger) or binary", "log" },
+                { "traceFile", "Binary trace file, suffixed with the rank when running on several ranks", "activity_trace.bin" },
+                { "traceBufferRecords", "Records buffered per component before a block is written", "4096" },
+                { "mode", "clock: poll port_b every cycle; event: handle events as they arrive and clock only while some wait", "clock" }
             )
             // these values will be overridden by the Python configuration if supplied
 
@@ -110,7 +130,14 @@ namespace ExampleTwo
             // the following isn't conducive to a loop
             SST_ELI_DOCUMENT_PORTS(
               { "port_a", "the port", {}},
-              { "port_b", "the port", {}}
+              { "port_b", "the port", {}},
+              // chord rings of config_network.py --chords; no events are sent on these
+              { "port_0", "chord port", {}},
+              { "port_1", "chord port", {}},
+              { "port_2", "chord port", {}},
+              { "port_3", "chord port", {}},
+              { "port_4", "chord port", {}},
+              { "port_5", "chord port", {}}
               )
 
         private:
@@ -121,6 +148,15 @@ namespace ExampleTwo
             uint64_t componentId_;      // SST supplied component id.
             uint64_t clockTicks_;       // Maximum number of clock ticks.
             uint64_t clockTickCount_;   // Clock ticks counter.
+            TraceBuffer trace_;         // Binary trace records, when "trace" is binary.
+            bool eventMode_;            // "mode" is event.
+            SST::TimeConverter* clockTC_;           // The clock, to reregister it in event mode.
+            SST::Clock::HandlerBase* clockHandler_;
+            bool clockRunning_;
+            std::deque<SST::Event*> pending_;       // Received, not yet forwarded.
+
+            void recordReceive();
+            void recordSend();
 
     };  // Close the class
 }   // Close the namespace
@@ -0,0 +1,77 @@
+# Decode the binary trace written by ExampleComponent with "trace": "binary"
+#
+#   python3 trace_decode.py activity_trace.bin > simulation.dat
+#
+# writes the same JSON lines that "make run" extracts from simulation.log,
+# so the heatmap notebooks can read either.  From Python, read_trace()
+# returns the records as a NumPy structured array.
+#
+import json
+import sys
+
+import numpy
+
+MAGIC = b"SSTACTV1"
+VERSION = 1
+HEADER_SIZE = 16
+
+# must match TraceRecord in ActivityTrace.h; the writer uses its host byte
+# order, so read_trace() switches to big-endian when the header says so
+RECORD = numpy.dtype([
+    ("component id", "<u8"),
+    ("on tick", "<u8"),
+    ("port", "<u4"),
+    ("event type", "<u4"),
+])
+
+EVENT_TYPES = ["send", "receive"]
+PORTS = ["port_a", "port_b"] + ["port_" + str(index) for index in range(6)]
+
+
+def read_trace(path):
+    """Return the records of a trace file, memory-mapped, in the byte order
+    it was written in."""
+    with open(path, "rb") as trace_file:
+        header = trace_file.read(HEADER_SIZE)
+    if len(header) != HEADER_SIZE or header[:8] != MAGIC:
+        raise ValueError(path + " is not an activity trace")
+    for order in "<>":
+        version, record_size = numpy.frombuffer(header[8:], dtype=order + "u4")
+        if version == VERSION and record_size == RECORD.itemsize:
+            return numpy.memmap(path, dtype=RECORD.newbyteorder(order), mode="r", offset=HEADER_SIZE)
+    version, record_size = numpy.frombuffer(header[8:], dtype="<u4")
+    raise ValueError(path + ": unsupported trace version " + str(version) +
+                     " with " + str(record_size) + " byte records")
+
+
+def sort_by_tick(records):
+    """Records in tick order; the file groups them per component block."""
+    return records[numpy.argsort(records["on tick"], kind="stable")]
+
+
+def to_log_lines(records):
+    """Yield the JSON line the logger would have printed for each record."""
+    for component_id, tick, port, event_type in zip(records["component id"].tolist(),
+                                                    records["on tick"].tolist(),
+                                                    records["port"].tolist(),
+                                                    records["event type"].tolist()):
+        if EVENT_TYPES[event_type] == "send":
+            line = {"event type": "send",
+                    "from port": PORTS[port],
+                    "from component id": str(component_id),
+                    "on tick": str(tick)}
+        else:
+            line = {"event type": "receive",
+                    "to port": PORTS[port],
+                    "to component id": str(component_id),
+                    "on tick": str(tick)}
+        yield json.dumps(line)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("ERROR: usage: trace_decode.py trace.bin [trace.bin.1 ...]")
+        exit()
+    for path in sys.argv[1:]:
+        for line in to_log_lines(sort_by_tick(read_trace(path))):
+            sys.stdout.write(line + "\n")